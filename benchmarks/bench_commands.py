@@ -0,0 +1,47 @@
+"""Per-message dispatch overhead as the number of commands grows.
+
+Compares one Telethon-style ``NewMessage(pattern=...)`` handler per command
+(every message is tested against every pattern) with :class:`CommandRouter`.
+Run with ``python benchmarks/bench_commands.py``.
+"""
+
+from __future__ import annotations
+
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from telebot.commands import CommandRouter  # noqa: E402
+
+SIZES = (2, 10, 50, 200)
+MESSAGES = ["hello everyone", "今天签到了吗", "/checkin", "/cmd7 with args", "/unknown", "see /me later"] * 50
+
+
+async def noop(event, command):
+    return None
+
+
+def per_pattern(patterns: list[re.Pattern[str]], text: str) -> int:
+    return sum(1 for pattern in patterns if pattern.match(text))
+
+
+def main() -> None:
+    print(f"{'commands':>9} {'patterns µs/msg':>16} {'router µs/msg':>14}")
+    for size in SIZES:
+        names = ["checkin", "me"] + [f"cmd{index}" for index in range(size - 2)]
+        patterns = [re.compile(f"/{name}") for name in names]
+        router = CommandRouter()
+        for name in names:
+            router.register(name, noop)
+        number = 20
+        pattern_time = timeit.timeit(lambda: [per_pattern(patterns, text) for text in MESSAGES], number=number)
+        router_time = timeit.timeit(lambda: [router.resolve(text) for text in MESSAGES], number=number)
+        scale = 1e6 / (number * len(MESSAGES))
+        print(f"{size:>9} {pattern_time * scale:>16.2f} {router_time * scale:>14.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""Memory and per-check latency of FloodProtector for 1M distinct users.
+
+Run with ``python benchmarks/bench_flood.py [users]``. The legacy
+deque-per-user tracker is measured alongside for comparison.
+"""
+
+from __future__ import annotations
+
+import sys
+import time
+import tracemalloc
+from collections import defaultdict, deque
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from telebot.flood import FloodConfig, FloodProtector  # noqa: E402
+
+CONFIG = {"enabled": True, "max_messages": 6, "interval_seconds": 20, "mute_seconds": 120}
+
+
+class LegacyFloodProtector:
+    """The previous deque-per-key implementation."""
+
+    def __init__(self) -> None:
+        self._messages = defaultdict(deque)
+
+    def check(self, chat_id, user_id, config, *, now):
+        cfg = FloodConfig(**config)
+        bucket = self._messages[(chat_id, user_id)]
+        while bucket and now - bucket[0] > cfg.interval_seconds:
+            bucket.popleft()
+        bucket.append(now)
+        if len(bucket) > cfg.max_messages:
+            bucket.clear()
+            return True
+        return None
+
+
+def feed(protector, users: int) -> None:
+    for user_id in range(users):
+        protector.check(user_id % 1000, user_id, CONFIG, now=user_id * 1e-5)
+
+
+def measure(factory, users: int) -> tuple[float, float]:
+    protector = factory()
+    started = time.perf_counter()
+    feed(protector, users)
+    elapsed = time.perf_counter() - started
+    del protector
+    tracemalloc.start()
+    protector = factory()
+    feed(protector, users)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / users, elapsed / users * 1e6
+
+
+def main() -> None:
+    users = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    print(f"{'implementation':<16} {'bytes/key':>10} {'µs/check':>9}")
+    for name, factory in (
+        ("legacy deque", LegacyFloodProtector),
+        ("sliding window", lambda: FloodProtector(max_keys=users)),
+        ("capped 100k", lambda: FloodProtector(max_keys=100_000)),
+    ):
+        bytes_per_key, latency = measure(factory, users)
+        print(f"{name:<16} {bytes_per_key:>10.1f} {latency:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Compare the keyword automaton against the per-rule regex loop.
+
+Run with ``python benchmarks/bench_keywords.py``.
+"""
+
+from __future__ import annotations
+
+import random
+import re
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from telebot.rules import RuleEngine  # noqa: E402
+
+SIZES = (10, 1_000, 10_000)
+LATIN = "abcdefghijklmnopqrstuvwxyz"
+CJK = "广告推广加群免费领取优惠返利代理兼职赚钱福利红包"
+
+
+def make_keywords(count: int, rng: random.Random) -> list[str]:
+    keywords = set()
+    while len(keywords) < count:
+        alphabet = CJK if rng.random() < 0.5 else LATIN
+        keywords.add("".join(rng.choice(alphabet) for _ in range(rng.randint(3, 8))))
+    return sorted(keywords)
+
+
+def make_messages(count: int, rng: random.Random) -> list[str]:
+    words = ["hello", "大家好", "今天天气不错", "meeting at 5pm", "有人吗", "check this out"]
+    return [" ".join(rng.choice(words) for _ in range(rng.randint(3, 12))) for _ in range(count)]
+
+
+def regex_loop(patterns: list[re.Pattern[str]], text: str) -> int:
+    return sum(1 for pattern in patterns if pattern.search(text))
+
+
+def main() -> None:
+    rng = random.Random(42)
+    messages = make_messages(200, rng)
+    print(f"{'keywords':>9} {'regex loop µs/msg':>18} {'automaton µs/msg':>17} {'speedup':>8}")
+    for size in SIZES:
+        keywords = make_keywords(size, rng)
+        patterns = [re.compile(re.escape(keyword), re.IGNORECASE) for keyword in keywords]
+        engine = RuleEngine.from_config({"banned_keywords": keywords})
+        repeat = max(1, 2_000 // size)
+        loop_time = timeit.timeit(lambda: [regex_loop(patterns, text) for text in messages], number=repeat)
+        automaton_time = timeit.timeit(lambda: [engine.match(text) for text in messages], number=repeat)
+        per_loop = loop_time / (repeat * len(messages)) * 1e6
+        per_automaton = automaton_time / (repeat * len(messages)) * 1e6
+        print(f"{size:>9} {per_loop:>18.2f} {per_automaton:>17.2f} {per_loop / per_automaton:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,260 @@
+"""End-to-end benchmark of the message pipeline.
+
+Replays a message corpus through ``TelebotApplication.on_new_message``:
+command routing, config fetch, raid and flood checks, rule matching and
+the resulting actions. Telegram is replaced by fake events and a fake
+client. Supabase is a ``SupabaseConfigStore`` backed by an
+``httpx.MockTransport`` with configurable latency.
+
+    python benchmarks/bench_pipeline.py --messages 20000 --latency-ms 5
+    python benchmarks/bench_pipeline.py --corpus export.jsonl --output benchmarks/results.jsonl
+
+A corpus file holds one JSON object per line with ``chat_id``, ``user_id`` and
+``text``. Each run is printed and, with ``--output``, appended as one JSON line
+tagged with the current git commit so results can be compared across commits.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from dataclasses import dataclass
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Iterator
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1]))
+
+from telebot.bot import TelebotApplication  # noqa: E402
+from telebot.config import Settings  # noqa: E402
+from telebot.supabase import SupabaseConfigStore  # noqa: E402
+
+BENCH_CONFIG = {
+    "banned_keywords": ["广告", "spam", "加微信", "free money"] + [f"badword{index}" for index in range(200)],
+    "auto_replies": [{"keyword": "签到", "reply": "输入 /checkin 开始签到", "delete_original": False}],
+    "punishments": [{"regex": r"(?:t\.me|telegram\.me)/\w+", "mute_seconds": 60, "notice": "请勿发送群链接"}],
+    "point_rules": [{"regex": r"[一-龥]{5,}", "points": 1}],
+    "flood_control": {"enabled": True, "max_messages": 6, "interval_seconds": 20, "mute_seconds": 120},
+    "raid_control": {"enabled": True, "max_joins": 15, "max_new_senders": 8},
+}
+WORDS = ["大家好", "今天天气不错", "hello", "有人吗", "meeting at 5pm", "签到", "check this", "哈哈哈", "thanks"]
+SPAM = ["广告 加微信 free money", "join t.me/spamgroup now", "spam spam spam", "badword17 here"]
+
+
+@dataclass
+class Message:
+    chat_id: int
+    user_id: int
+    text: str
+
+
+class FakeEvent:
+    __slots__ = ("raw_text", "chat_id", "sender_id", "id", "sender", "chat", "input_chat")
+
+    def __init__(self, message: Message, message_id: int) -> None:
+        self.raw_text = message.text
+        self.chat_id = message.chat_id
+        self.sender_id = message.user_id
+        self.id = message_id
+        self.sender = SimpleNamespace(id=message.user_id, username=f"user{message.user_id}", first_name="U")
+        self.chat = SimpleNamespace(id=message.chat_id, title="Bench")
+        self.input_chat = message.chat_id
+
+    async def respond(self, text: str) -> None:
+        return None
+
+    async def get_sender(self):
+        return self.sender
+
+    async def get_chat(self):
+        return self.chat
+
+
+class FakeClient:
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def delete_messages(self, chat, ids) -> None:
+        self.calls += 1
+
+    async def edit_permissions(self, *args, **kwargs) -> None:
+        self.calls += 1
+
+
+def fake_supabase(latency: float):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        if latency:
+            await asyncio.sleep(latency)
+        path = request.url.path
+        if path.endswith("/group_configs"):
+            chat_id = request.url.params.get("chat_id", "eq.0").split(".", 1)[1]
+            return httpx.Response(200, json=[{"chat_id": chat_id, "payload": BENCH_CONFIG}])
+        if path.endswith("/points_balances"):
+            return httpx.Response(200, json=[{"balance": 0}])
+        return httpx.Response(201)
+
+    return handler
+
+
+def synthetic_corpus(count: int, chats: int, users: int, spam_ratio: float, seed: int) -> Iterator[Message]:
+    rng = random.Random(seed)
+    for _ in range(count):
+        if rng.random() < spam_ratio:
+            text = rng.choice(SPAM)
+        else:
+            text = " ".join(rng.choice(WORDS) for _ in range(rng.randint(1, 6)))
+        yield Message(chat_id=-1000 - rng.randrange(chats), user_id=rng.randrange(users), text=text)
+
+
+def file_corpus(path: Path) -> Iterator[Message]:
+    with path.open(encoding="utf-8") as handle:
+        for line in handle:
+            if line.strip():
+                record = json.loads(line)
+                yield Message(int(record["chat_id"]), int(record.get("user_id", 0)), record.get("text") or "")
+
+
+def build_app(latency: float) -> tuple[TelebotApplication, FakeClient]:
+    # Outbound rate limits are lifted so draining measures the pipeline, not Telegram's quotas.
+    settings = Settings(
+        supabase_url="https://bench.supabase.co",
+        supabase_service_role_key="bench",
+        outbound_global_rate=1e6,
+        outbound_global_burst=1e6,
+        outbound_chat_message_rate=1e6,
+        outbound_chat_message_burst=1e6,
+        outbound_chat_moderation_rate=1e6,
+        outbound_chat_moderation_burst=1e6,
+        outbound_max_pending=1_000_000,
+    )
+    client = FakeClient()
+    app = TelebotApplication(settings, client=client)  # type: ignore[arg-type]
+    store = SupabaseConfigStore(settings)
+    store._client = httpx.AsyncClient(base_url=settings.supabase_url, transport=httpx.MockTransport(fake_supabase(latency)))
+    app.store = store
+    return app, client
+
+
+async def replay(messages: list[Message], latency: float, concurrency: int) -> dict:
+    app, client = build_app(latency)
+    latencies: list[float] = []
+
+    async def one(message: Message, message_id: int) -> None:
+        started = time.perf_counter()
+        await app.on_new_message(FakeEvent(message, message_id))
+        latencies.append(time.perf_counter() - started)
+
+    blocks_before = sys.getallocatedblocks()
+    started = time.perf_counter()
+    for offset in range(0, len(messages), concurrency):
+        window = messages[offset : offset + concurrency]
+        await asyncio.gather(*(one(message, offset + index) for index, message in enumerate(window)))
+    handled = time.perf_counter() - started
+    blocks_after = sys.getallocatedblocks()
+    await app.deletions.close()
+    await app.outbound.drain()
+    drained = time.perf_counter() - started
+    await app.outbound.close()
+    await app.store.close()
+
+    ordered = sorted(latencies)
+    return {
+        "messages": len(messages),
+        "messages_per_second": len(messages) / handled if handled else 0.0,
+        "p50_ms": statistics.median(ordered) * 1e3,
+        "p99_ms": ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))] * 1e3,
+        "max_ms": ordered[-1] * 1e3,
+        "net_blocks_per_message": (blocks_after - blocks_before) / len(messages),
+        "handle_seconds": handled,
+        "drain_seconds": drained - handled,
+        "telegram_calls": client.calls,
+        "config_cache_hit_rate": _hit_rate(app),
+        "snapshots_compiled": app.store.snapshot_stats.compiled,
+    }
+
+
+def _hit_rate(app: TelebotApplication) -> float:
+    stats = app.store.total_cache_stats()
+    return stats.hits / max(1, stats.hits + stats.stale_hits + stats.misses)
+
+
+async def allocations(messages: list[Message], latency: float) -> float:
+    """Average peak bytes allocated while handling one message, under tracemalloc."""
+
+    app, _ = build_app(latency)
+    sample = messages[:2_000]
+    growth = 0
+    tracemalloc.start()
+    for index, message in enumerate(sample):
+        before = tracemalloc.get_traced_memory()[0]
+        tracemalloc.reset_peak()
+        await app.on_new_message(FakeEvent(message, index))
+        growth += tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+    await app.deletions.close()
+    await app.outbound.drain()
+    await app.outbound.close()
+    await app.store.close()
+    return growth / len(sample) if sample else 0.0
+
+
+def git_commit() -> str | None:
+    try:
+        result = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True)
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return result.stdout.strip()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--corpus", type=Path, help="JSONL message export to replay instead of synthetic traffic")
+    parser.add_argument("--messages", type=int, default=10_000)
+    parser.add_argument("--chats", type=int, default=50)
+    parser.add_argument("--users", type=int, default=5_000)
+    parser.add_argument("--spam-ratio", type=float, default=0.05)
+    parser.add_argument("--latency-ms", type=float, default=2.0, help="simulated Supabase latency per request")
+    parser.add_argument("--concurrency", type=int, default=1, help="messages handled concurrently")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--output", type=Path, help="append the result as a JSON line to this file")
+    args = parser.parse_args()
+
+    if args.corpus:
+        messages = list(file_corpus(args.corpus))
+    else:
+        messages = list(synthetic_corpus(args.messages, args.chats, args.users, args.spam_ratio, args.seed))
+    latency = args.latency_ms / 1e3
+
+    result = asyncio.run(replay(messages, latency, max(1, args.concurrency)))
+    result["peak_bytes_per_message"] = asyncio.run(allocations(messages, latency))
+    record = {
+        "benchmark": "pipeline",
+        "commit": git_commit(),
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "params": {
+            "corpus": str(args.corpus) if args.corpus else "synthetic",
+            "latency_ms": args.latency_ms,
+            "concurrency": args.concurrency,
+            "chats": args.chats,
+            "users": args.users,
+            "spam_ratio": args.spam_ratio,
+        },
+        "results": result,
+    }
+    print(json.dumps(record, ensure_ascii=False, indent=2))
+    if args.output:
+        with args.output.open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Background writer that batches audit records into bulk inserts."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+AuditRecord = Dict[str, Any]
+AuditSink = Callable[[List[AuditRecord]], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class AuditWriterStats:
+    enqueued: int = 0
+    written: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    blocked_submits: int = 0
+    last_flush_seconds: float = 0.0
+    max_flush_seconds: float = 0.0
+    total_flush_seconds: float = 0.0
+
+
+class AuditLogWriter:
+    """Queue audit records and hand them to ``sink`` in batches.
+
+    A batch is written once ``batch_size`` records are queued or
+    ``flush_interval`` seconds have passed. The queue holds at most
+    ``max_queue`` records; :meth:`submit` waits for room when it is full so a
+    slow backend slows producers down instead of growing memory.
+    """
+
+    def __init__(
+        self,
+        sink: AuditSink,
+        *,
+        batch_size: int = 100,
+        flush_interval: float = 1.0,
+        max_queue: int = 10_000,
+    ) -> None:
+        self._sink = sink
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.stats = AuditWriterStats()
+        self._queue: asyncio.Queue[AuditRecord] = asyncio.Queue(maxsize=max(max_queue, self.batch_size))
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._closed = False
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize()
+
+    def start(self) -> None:
+        if self._task is None and not self._closed:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, record: AuditRecord) -> None:
+        if self._closed:
+            raise RuntimeError("audit writer is closed")
+        self.start()
+        if self._queue.full():
+            self.stats.blocked_submits += 1
+        await self._queue.put(record)
+        self.stats.enqueued += 1
+        if self._queue.qsize() >= self.batch_size:
+            self._wakeup.set()
+
+    async def flush(self) -> None:
+        """Write everything queued so far."""
+
+        while not self._queue.empty():
+            await self._write_batch()
+
+    async def close(self) -> None:
+        """Stop accepting records and write out the remaining queue."""
+
+        self._closed = True
+        self._wakeup.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _run(self) -> None:
+        while True:
+            if self._closed and self._queue.empty():
+                return
+            if not self._closed and self._queue.qsize() < self.batch_size:
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+                except asyncio.TimeoutError:
+                    pass
+            await self._write_batch()
+
+    async def _write_batch(self) -> None:
+        batch: List[AuditRecord] = []
+        while len(batch) < self.batch_size and not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        if not batch:
+            return
+        started = time.perf_counter()
+        try:
+            await self._sink(batch)
+        except Exception:  # noqa: BLE001 - keep the writer alive for later batches
+            self.stats.failed_batches += 1
+            logger.exception("failed to write %d audit records", len(batch))
+            return
+        finally:
+            elapsed = time.perf_counter() - started
+            self.stats.last_flush_seconds = elapsed
+            self.stats.total_flush_seconds += elapsed
+            self.stats.max_flush_seconds = max(self.stats.max_flush_seconds, elapsed)
+        self.stats.batches += 1
+        self.stats.written += len(batch)
@@ -3,94 +3,309 @@
 from __future__ import annotations
 
 import asyncio
+import logging
+from dataclasses import dataclass, field, fields, replace
 from datetime import datetime, timedelta, timezone
 
 from telethon import TelegramClient, events
 from telethon.errors.rpcerrorlist import ChatAdminRequiredError
 
+from .commands import CommandRouter, ParsedCommand
 from .config import Settings, load_settings
-from .rules import Action, ActionType, RuleEngine
+from .deadline import DeadlineExceeded, deadline
+from .deletions import DeleteBatcher, DeletionReport
+from .duplicates import DuplicateDetector
+from .entities import EntityCache
+from .ingress import IngressQueue
+from .normalize import NormalizedText
+from .metrics import MetricsRegistry, MetricsServer, Sample
+from .rules import Action, ActionType
 from .supabase import SupabaseConfigStore
 from .flood import FloodProtector
-from .welcome import load_welcome_policy, render_missing_username_notice, render_welcome_message
+from .raid import RaidAlert, RaidDetector
+from .regex_guard import RegexGuard
+from .scheduler import OutboundScheduler, OutboundShed, Priority
+from .warmstart import WarmStart
+from .welcome import render_missing_username_notice, render_welcome_message
+
+logger = logging.getLogger(__name__)
+
+# optional side effects dropped first when the ingress queue falls behind;
+# mute notices and commands are shed as well (see ``enforce`` and ``_dispatch_command``)
+SHEDDABLE_ACTIONS = frozenset({ActionType.ADD_POINTS, ActionType.REPLY})
+
+
+@dataclass(slots=True)
+class Verdict:
+    """Everything :meth:`TelebotApplication.enforce` should do for one message, in order."""
+
+    actions: list[tuple[Action, str]] = field(default_factory=list)
+    earlier: list[tuple[int, int]] = field(default_factory=list)
+    alert: RaidAlert | None = None
+
+    def add(self, action: Action, reason: str) -> None:
+        self.actions.append((action, reason))
 
 
 class TelebotApplication:
     """High level wrapper that wires Telethon events with the rule engine."""
 
-    def __init__(self, settings: Settings | None = None) -> None:
+    def __init__(self, settings: Settings | None = None, *, client: TelegramClient | None = None) -> None:
         self.settings = settings or load_settings()
-        self.client = TelegramClient("telebot", self.settings.api_id, self.settings.api_hash)
-        self.store = SupabaseConfigStore(self.settings)
+        self.client = client or TelegramClient("telebot", self.settings.api_id, self.settings.api_hash)
+        self.metrics = MetricsRegistry(enabled=bool(self.settings.metrics_port))
+        self.store = SupabaseConfigStore(self.settings, metrics=self.metrics)
+        self._metrics_server: MetricsServer | None = None
+        self.commands = CommandRouter()
         self._handlers_registered = False
         self._flood_protector = FloodProtector()
+        self._raid_detector = RaidDetector()
+        self._duplicates = DuplicateDetector()
+        self.regex_guard = RegexGuard(
+            workers=self.settings.regex_guard_workers, timeout=self.settings.regex_guard_timeout_seconds
+        )
+        self.outbound = OutboundScheduler(
+            global_rate=self.settings.outbound_global_rate,
+            global_burst=self.settings.outbound_global_burst,
+            chat_rates={
+                Priority.MODERATION: (self.settings.outbound_chat_moderation_rate, self.settings.outbound_chat_moderation_burst),
+                Priority.COSMETIC: (self.settings.outbound_chat_message_rate, self.settings.outbound_chat_message_burst),
+            },
+            max_pending=self.settings.outbound_max_pending,
+        )
+        self.entities = EntityCache()
+        self.ingress = IngressQueue(
+            lambda event, degraded: self.on_new_message(event, degraded=degraded),
+            workers=self.settings.ingress_workers,
+            max_pending=self.settings.ingress_max_pending,
+            shed_pending=self.settings.ingress_shed_pending,
+            shed_lag=self.settings.ingress_shed_lag_seconds,
+            on_lag=lambda lag: self.metrics.observe("ingress.lag", lag),
+        )
+        self.warm_start: WarmStart | None = None
+        if self.settings.warm_state_path:
+            self.warm_start = WarmStart(
+                self.settings.warm_state_path,
+                flood=self._flood_protector,
+                store=self.store,
+                interval=self.settings.warm_state_interval_seconds,
+            )
+        self.deletions = DeleteBatcher(
+            self._delete_batch,
+            on_batch=self._record_deletions,
+            window=self.settings.delete_batch_seconds,
+        )
+        self.commands.register("checkin", self.handle_checkin, description="每日签到领取积分")
+        self.commands.register("me", self.handle_me, description="查询当前积分")
+        self.metrics.describe("telebot_rule_hits_total", "Messages matched per rule, by its position in the group config.")
+        self.metrics.describe("telebot_ingress_shed_total", "Side effects skipped while the ingress queue was behind.")
+        self.metrics.register_collector(
+            "telebot_cache_requests_total", "counter", "Cache lookups by cache and result.", self._cache_samples
+        )
+        self.metrics.register_collector(
+            "telebot_ingress", "gauge", "Ingress queue backlog and load shedding.", self._ingress_samples
+        )
+        self.metrics.register_collector(
+            "telebot_audit", "gauge", "Audit writer queue depth, batches and flush latency.",
+            lambda: _stats_samples(self.store.audit_writer.stats, queue_depth=self.store.audit_writer.queue_depth),
+        )
+        self.metrics.register_collector(
+            "telebot_points", "gauge", "Points ledger awards, pending keys and flushes.",
+            lambda: _stats_samples(self.store.points_ledger.stats, pending_keys=len(self.store.points_ledger)),
+        )
+        self.metrics.register_collector(
+            "telebot_outbound", "gauge", "Outbound Telegram call backlog, lanes and outcomes.",
+            lambda: _stats_samples(self.outbound.stats, pending=self.outbound.pending, lanes=self.outbound.lanes),
+        )
+        self.metrics.register_collector(
+            "telebot_outbox", "gauge", "Outbox backlog, deliveries and circuit breaker state.", self._outbox_samples
+        )
+        self.metrics.register_collector(
+            "telebot_regex_guard_seconds_total", "counter", "Time spent in guarded regex searches per rule.",
+            lambda: [({"rule": name}, cost.seconds) for name, cost in self.regex_guard.costs.items()],
+        )
+        self.metrics.register_collector(
+            "telebot_regex_guard_timeouts_total", "counter", "Guarded regex searches cut off by the time budget.",
+            lambda: [({"rule": name}, cost.timeouts) for name, cost in self.regex_guard.costs.items()],
+        )
 
     def register_handlers(self) -> None:
         if self._handlers_registered:
             return
+        self.client.add_event_handler(self.receive_message, events.NewMessage())
+        self.client.add_event_handler(self.handle_join, events.ChatAction())
+        self._handlers_registered = True
 
-        @self.client.on(events.NewMessage(pattern=r"/checkin"))
-        async def _(event: events.NewMessage.Event) -> None:  # pragma: no cover - Telethon runtime
-            await self.store.increment_points(event.chat_id, event.sender_id, 5)
-            await event.respond("✅ 签到成功，本次获得 5 积分。")
-
-        @self.client.on(events.NewMessage(pattern=r"/me"))
-        async def _me(event: events.NewMessage.Event) -> None:  # pragma: no cover - Telethon runtime
-            chat_id = event.chat_id
-            user_id = event.sender_id or 0
-            points = await self.store.get_points(chat_id, user_id)
-            await event.respond(f"📊 当前积分：{points}")
-
-        @self.client.on(events.ChatAction())
-        async def handle_join(event: events.ChatAction.Event) -> None:  # pragma: no cover - Telethon runtime
-            if not (event.user_joined or event.user_added):
-                return
-            config = await self.store.fetch_group_config(event.chat_id)
-            policy = load_welcome_policy(config.get("welcome"))
-            if not policy.enabled:
-                return
-            user = await event.get_user()
-            if user is None:
-                return
-            if policy.require_username and not getattr(user, "username", None):
-                notice = render_missing_username_notice(policy, first_name=user.first_name or "")
-                if notice:
-                    await event.respond(notice)
-                return
-            chat = await event.get_chat()
-            message = render_welcome_message(
-                policy,
-                mention=self._format_mention(user),
-                first_name=user.first_name or "",
-                chat_title=getattr(chat, "title", "本群"),
-            )
-            await event.respond(message)
+    async def receive_message(self, event: events.NewMessage.Event) -> None:
+        """Telethon handler: queue the message on the ingress stage and return."""
 
-        @self.client.on(events.NewMessage())
-        async def handle_message(event: events.NewMessage.Event) -> None:  # pragma: no cover - Telethon runtime
-            if not event.raw_text:
-                return
-            chat_id = event.chat_id
-            user_id = event.sender_id or 0
-            config = await self.store.fetch_group_config(chat_id)
-            flood_action = self._flood_protector.check(chat_id, user_id, config.get("flood_control"))
-            if flood_action:
-                await self._apply_action(flood_action.type, event, flood_action, chat_id, user_id, reason="flood_control")
-                return
-            engine = RuleEngine.from_config(config)
-            matches = engine.match(event.raw_text)
-            if not matches:
-                return
-            message_deleted = False
-            for match in matches:
-                if match.rule.delete_original and not message_deleted:
-                    await self._delete_message(event, chat_id, user_id, reason=match.rule.name)
-                    message_deleted = True
-                await self._apply_action(match.action.type, event, match.action, chat_id, user_id, reason=match.rule.name, already_deleted=message_deleted)
-                if match.action.type is ActionType.DELETE:
-                    message_deleted = True
+        if self.settings.ingress_workers <= 0:
+            await self.on_new_message(event)
+        elif not self.ingress.submit(event.chat_id, event):
+            logger.warning("ingress queue full, dropping message %s in chat %s", event.id, event.chat_id)
 
-        self._handlers_registered = True
+    async def on_new_message(self, event: events.NewMessage.Event, *, degraded: bool = False) -> None:
+        """Single entry point for new messages: commands first, then moderation.
+
+        Commands still go through the flood, raid and duplicate detectors; a
+        bare command skips only keyword and regex rules, while commands with
+        arguments are matched against them too so they cannot smuggle spam.
+        Everything awaited here shares the ``message_deadline_seconds`` budget.
+        ``degraded`` is set by the ingress stage when it is falling behind.
+        """
+
+        with self.metrics.time("on_new_message"), deadline(self.settings.message_deadline_seconds):
+            try:
+                self.entities.observe(event)
+                with self.metrics.time("commands"):
+                    command = await self._dispatch_command(event, degraded=degraded)
+                await self.handle_message(event, degraded=degraded, rules=command is None or bool(command.args))
+            except DeadlineExceeded:
+                self.metrics.inc("telebot_deadline_exceeded_total")
+                logger.warning("gave up on message %s in chat %s: deadline exceeded", event.id, event.chat_id)
+
+    async def _dispatch_command(self, event: events.NewMessage.Event, *, degraded: bool) -> ParsedCommand | None:
+        """Run the command in ``event``; commands only reply and award points, so they are shed when degraded."""
+
+        if not degraded:
+            return await self.commands.dispatch(event, event.raw_text)
+        resolved = self.commands.resolve(event.raw_text)
+        if resolved is None:
+            return None
+        self.metrics.inc("telebot_ingress_shed_total", action="command")
+        return resolved[1]
+
+    async def handle_checkin(self, event: events.NewMessage.Event, command: ParsedCommand) -> None:
+        await self.store.increment_points(event.chat_id, event.sender_id, 5)
+        self._reply(event, "✅ 签到成功，本次获得 5 积分。")
+
+    async def handle_me(self, event: events.NewMessage.Event, command: ParsedCommand) -> None:
+        chat_id = event.chat_id
+        user_id = event.sender_id or 0
+        points = await self.store.get_points(chat_id, user_id)
+        self._reply(event, f"📊 当前积分：{points}")
+
+    async def handle_join(self, event: events.ChatAction.Event) -> None:
+        if not (event.user_joined or event.user_added):
+            return
+        self.entities.observe(event)
+        config = await self.store.fetch_snapshot(event.chat_id)
+        restricted: set[int] = set()
+        for joined_id in event.user_ids or []:
+            alert = self._raid_detector.record_join(event.chat_id, joined_id, config.raid)
+            if alert:
+                await self._start_lockdown(event, alert)
+                restricted.update(alert.suspects)
+        restrict_seconds = self._raid_detector.lockdown_restriction(event.chat_id)
+        if restrict_seconds is not None:
+            # welcomes are suppressed and every joiner is restricted until the raid is over
+            for joined_id in event.user_ids or []:
+                if joined_id not in restricted:
+                    self._restrict_user(event.chat_id, joined_id, restrict_seconds)
+            return
+        policy = config.welcome
+        if not policy.enabled:
+            return
+        user = await self.entities.get_user(event)
+        if user is None:
+            return
+        if policy.require_username and not user.username:
+            notice = render_missing_username_notice(policy, first_name=user.first_name)
+            if notice:
+                self._reply(event, notice)
+            return
+        chat = await self.entities.get_chat(event)
+        message = render_welcome_message(
+            policy,
+            mention=self._format_mention(user),
+            first_name=user.first_name,
+            chat_title=chat.title if chat and chat.title else "本群",
+        )
+        self._reply(event, message)
+
+    async def handle_message(self, event: events.NewMessage.Event, *, degraded: bool = False, rules: bool = True) -> None:
+        verdict = await self.evaluate(event, rules=rules)
+        if verdict is not None:
+            with self.metrics.time("enforce"):
+                await self.enforce(event, verdict, degraded=degraded)
+
+    async def evaluate(self, event: events.NewMessage.Event, *, rules: bool = True) -> Verdict | None:
+        """Run detectors and rules for ``event`` and decide what to do, without doing it.
+
+        With ``rules`` unset only the raid, flood and duplicate detectors run.
+        Only the config fetch may wait on I/O here; deletions, mutes, replies,
+        points and audit writes are left to :meth:`enforce`.
+        """
+
+        if not event.raw_text:
+            return None
+        chat_id = event.chat_id
+        user_id = event.sender_id or 0
+        metrics = self.metrics
+        with metrics.time("fetch_group_config"):
+            config = await self.store.fetch_snapshot(chat_id)
+        verdict = Verdict()
+        with metrics.time("raid"):
+            verdict.alert = self._raid_detector.record_message(chat_id, user_id, config.raid)
+        if self._raid_detector.in_lockdown(chat_id) and self._raid_detector.is_recent_member(chat_id, user_id):
+            metrics.inc("telebot_rule_hits_total", rule="raid_control")
+            verdict.add(Action(type=ActionType.DELETE), "raid_control")
+            return verdict
+        with metrics.time("flood"):
+            flood_action = self._flood_protector.check(chat_id, user_id, config.flood)
+        if flood_action:
+            metrics.inc("telebot_rule_hits_total", rule="flood_control")
+            verdict.add(flood_action, "flood_control")
+            return verdict
+        text = NormalizedText(event.raw_text)
+        with metrics.time("duplicates"):
+            duplicate = self._duplicates.check(chat_id, user_id, event.id, text, config.duplicates)
+        if duplicate:
+            metrics.inc("telebot_rule_hits_total", rule="duplicate_control")
+            verdict.earlier = duplicate.earlier
+            verdict.add(Action(type=ActionType.DELETE), "duplicate_control")
+            # the notice goes out once per cluster, not for every copy
+            notice = duplicate.action.message if duplicate.triggered else None
+            if duplicate.action.type is ActionType.MUTE:
+                verdict.add(Action(type=ActionType.MUTE, duration=duplicate.action.duration, message=notice), "duplicate_control")
+            elif notice:
+                verdict.add(Action(type=ActionType.REPLY, message=notice), "duplicate_control")
+            return verdict
+        engine = config.engine
+        if not rules:
+            return verdict if verdict.alert else None
+        with metrics.time("match"):
+            matches = await engine.amatch(text, self.regex_guard) if engine.guarded else engine.match(text)
+        if not matches:
+            return verdict if verdict.alert else None
+        for match in matches:
+            metrics.inc("telebot_rule_hits_total", rule=match.rule.source or match.rule.name)
+            if match.rule.delete_original:
+                verdict.add(Action(type=ActionType.DELETE), match.rule.name)
+            verdict.add(match.action, match.rule.name)
+        return verdict
+
+    async def enforce(self, event: events.NewMessage.Event, verdict: Verdict, *, degraded: bool = False) -> None:
+        """Carry out ``verdict``; when ``degraded``, point awards, replies and mute notices are skipped."""
+
+        chat_id = event.chat_id
+        user_id = event.sender_id or 0
+        if verdict.alert:
+            await self._start_lockdown(event, verdict.alert)
+        for earlier_user, earlier_message in verdict.earlier:
+            self.deletions.add(chat_id, earlier_message, earlier_user, "duplicate_control", entity=getattr(event, "input_chat", None))
+        message_deleted = False
+        for action, reason in verdict.actions:
+            if degraded and action.type in SHEDDABLE_ACTIONS:
+                self.metrics.inc("telebot_ingress_shed_total", action=action.type.value)
+                continue
+            if degraded and action.type is ActionType.MUTE and action.message:
+                # the mute itself is moderation, its notice is not
+                self.metrics.inc("telebot_ingress_shed_total", action="mute_notice")
+                action = replace(action, message=None)
+            await self._apply_action(action.type, event, action, chat_id, user_id, reason=reason, already_deleted=message_deleted)
+            if action.type is ActionType.DELETE:
+                message_deleted = True
 
     async def _apply_action(
         self,
@@ -108,41 +323,161 @@ class TelebotApplication:
                 await self._delete_message(event, chat_id, user_id, reason=reason)
         elif action_type is ActionType.REPLY:
             if action.message:
-                await event.respond(action.message)
+                self._reply(event, action.message)
         elif action_type is ActionType.MUTE:
             await self._mute_member(event, duration=action.duration or 60, notice=action.message)
         elif action_type is ActionType.ADD_POINTS:
             await self.store.increment_points(chat_id, user_id, action.points or 1)
 
     async def _delete_message(self, event: events.NewMessage.Event, chat_id: int, user_id: int, *, reason: str | None) -> None:
-        await event.delete()
-        await self.store.record_action(
+        self.deletions.add(chat_id, event.id, user_id, reason or "rule", entity=getattr(event, "input_chat", None))
+
+    async def _delete_batch(self, chat_id: int, chat: object, message_ids: list[int]) -> None:
+        sent = await self.outbound.submit(chat_id, Priority.MODERATION, lambda: self._telegram_delete(chat, message_ids))
+        if not sent:
+            # reported per message as not deleted by the batcher
+            raise OutboundShed(f"dropped deletion of {len(message_ids)} messages")
+
+    async def _telegram_delete(self, chat: object, message_ids: list[int]) -> bool:
+        with self.metrics.time("telegram.delete_messages"):
+            await self.client.delete_messages(chat, message_ids)
+        return True
+
+    async def _record_deletions(self, chat_id: int, reports: list[DeletionReport]) -> None:
+        await self.store.record_actions(
             chat_id,
-            user_id,
-            "delete",
-            {"message_id": event.id, "reason": reason or "rule"},
+            [
+                (
+                    report.user_id,
+                    "delete",
+                    {"message_id": report.message_id, "reason": report.reason, "deleted": report.deleted, "error": report.error},
+                )
+                for report in reports
+            ],
         )
 
     async def _mute_member(self, event: events.NewMessage.Event, duration: int, notice: str | None) -> None:
-        chat = await event.get_chat()
-        sender = await event.get_sender()
+        chat = await self.entities.get_chat(event)
+        sender = await self.entities.get_sender(event)
         if sender is None:
             return
+        chat_entity = chat.input_entity if chat else event.chat_id
+        until = datetime.now(tz=timezone.utc) + timedelta(seconds=duration)
+        self.outbound.submit(
+            event.chat_id,
+            Priority.MODERATION,
+            lambda: self._edit_permissions(chat_entity, sender.input_entity, until),
+        )
+        if notice:
+            self._reply(event, notice)
+
+    async def _start_lockdown(self, event: events.common.EventCommon, alert: RaidAlert) -> None:
+        for suspect in alert.suspects:
+            self._restrict_user(alert.chat_id, suspect, alert.restrict_seconds)
+        await self.store.record_action(
+            alert.chat_id,
+            0,
+            "raid_lockdown",
+            {"reason": alert.reason, "suspects": alert.suspects},
+        )
+        if alert.notice:
+            self._reply(event, alert.notice)
+
+    def _restrict_user(self, chat_id: int, user_id: int, duration: int) -> None:
         until = datetime.now(tz=timezone.utc) + timedelta(seconds=duration)
+        self.outbound.submit(chat_id, Priority.MODERATION, lambda: self._edit_permissions(chat_id, user_id, until))
+
+    async def _edit_permissions(self, chat: object, user: object, until: datetime) -> None:
         try:
-            await self.client.edit_permissions(chat, sender, send_messages=False, until_date=until)
+            with self.metrics.time("telegram.edit_permissions"):
+                await self.client.edit_permissions(chat, user, send_messages=False, until_date=until)
         except ChatAdminRequiredError:  # pragma: no cover - runtime guard
             return
-        if notice:
-            await event.respond(notice)
+
+    def _reply(self, event: events.common.EventCommon, message: str) -> None:
+        self.outbound.submit(event.chat_id, Priority.COSMETIC, lambda: self._telegram_respond(event, message))
+
+    async def _telegram_respond(self, event: events.common.EventCommon, message: str) -> None:
+        with self.metrics.time("telegram.send_message"):
+            await event.respond(message)
+
+    def _ingress_samples(self) -> list[Sample]:
+        stats = self.ingress.stats
+        return [
+            ({"value": "pending"}, self.ingress.pending),
+            ({"value": "lag_seconds"}, self.ingress.lag()),
+            ({"value": "max_lag_seconds"}, stats.max_lag),
+            ({"value": "processed"}, stats.processed),
+            ({"value": "degraded"}, stats.degraded),
+            ({"value": "dropped"}, stats.dropped),
+            ({"value": "failed"}, stats.failed),
+        ]
+
+    def _outbox_samples(self) -> list[Sample]:
+        outbox = self.store.outbox
+        if outbox is None:
+            return []
+        return _stats_samples(
+            outbox.stats, backlog_bytes=outbox.backlog_bytes, breaker_open=int(outbox.breaker.state == "open")
+        )
+
+    def _cache_samples(self) -> list[Sample]:
+        config = self.store.total_cache_stats()
+        samples: list[Sample] = [
+            ({"cache": "config", "result": "hit"}, config.hits),
+            ({"cache": "config", "result": "stale"}, config.stale_hits),
+            ({"cache": "config", "result": "miss"}, config.misses),
+            ({"cache": "snapshot", "result": "compiled"}, self.store.snapshot_stats.compiled),
+            ({"cache": "snapshot", "result": "reused"}, self.store.snapshot_stats.reused),
+        ]
+        for name, cache in (("users", self.entities.users), ("chats", self.entities.chats)):
+            samples.append(({"cache": name, "result": "hit"}, cache.hits))
+            samples.append(({"cache": name, "result": "miss"}, cache.misses))
+        return samples
 
     async def start(self) -> None:  # pragma: no cover - requires Telegram credentials
         self.register_handlers()
+        if self.metrics.enabled:
+            self._metrics_server = MetricsServer(self.metrics, host=self.settings.metrics_host, port=self.settings.metrics_port)
+            await self._metrics_server.start()
         await self.client.start(bot_token=self.settings.bot_token)
+        me = await self.client.get_me()
+        self.commands.bot_username = getattr(me, "username", None)
+        await self.warm_up()
+        self.store.open_outbox()
+        self.store.start_config_sync()
         await self.client.run_until_disconnected()
 
+    async def warm_up(self) -> None:
+        """Restore the warm-start snapshot, then bring the config cache up to date.
+
+        With a restored change-feed watermark only rows updated since the
+        snapshot are fetched; otherwise every ``group_configs`` row is. When
+        Supabase cannot be reached the bot starts cold and fetches configs on
+        demand.
+        """
+
+        if self.warm_start is not None:
+            self.warm_start.load()
+            self.warm_start.start()
+        try:
+            if self.store.config_watermark is not None:
+                await self.store.poll_config_changes()
+            else:
+                await self.store.prefetch_group_configs()
+        except Exception as error:  # noqa: BLE001 - a cold cache is better than not starting
+            logger.warning("config warm-up failed, starting with a cold cache: %s", error)
+
     async def shutdown(self) -> None:
+        await self.ingress.close()
+        await self.deletions.close()
+        await self.outbound.close()
         await self.store.close()
+        if self.warm_start is not None:
+            await self.warm_start.close()
+        await self.regex_guard.close()
+        if self._metrics_server:
+            await self._metrics_server.close()
         await self.client.disconnect()
 
     @staticmethod
@@ -156,6 +491,14 @@ class TelebotApplication:
         return full or "新成员"
 
 
+def _stats_samples(stats: object, **gauges: float) -> list[Sample]:
+    """``value``-labelled samples for ``gauges`` followed by every field of a stats dataclass."""
+
+    samples: list[Sample] = [({"value": name}, value) for name, value in gauges.items()]
+    samples.extend(({"value": item.name}, getattr(stats, item.name)) for item in fields(stats))
+    return samples
+
+
 def run() -> None:  # pragma: no cover - CLI helper
     app = TelebotApplication()
     asyncio.run(app.start())
@@ -0,0 +1,86 @@
+"""Command parsing and routing for bot commands such as ``/checkin``."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+@dataclass(slots=True)
+class ParsedCommand:
+    name: str
+    args: str = ""
+    mention: str | None = None
+
+
+CommandHandler = Callable[[Any, ParsedCommand], Awaitable[None]]
+
+
+def parse_command(text: str | None) -> ParsedCommand | None:
+    """Split ``/name@bot args`` into its parts; ``None`` for non-command text."""
+
+    if not text or text[0] != "/":
+        return None
+    parts = text[1:].split(maxsplit=1)
+    if not parts:
+        return None
+    head, rest = parts[0], parts[1:]
+    name, _, mention = head.partition("@")
+    if not name:
+        return None
+    return ParsedCommand(name=name.lower(), args=rest[0].strip() if rest else "", mention=mention or None)
+
+
+class CommandRouter:
+    """Route command messages through a table instead of one handler per pattern.
+
+    The command prefix is parsed once per message and looked up in a dict, so
+    adding commands does not add work for ordinary messages. Commands
+    addressed to another bot (``/me@other_bot``) are ignored.
+    """
+
+    def __init__(self, bot_username: str | None = None) -> None:
+        self.bot_username = bot_username
+        self._handlers: Dict[str, CommandHandler] = {}
+        self.descriptions: Dict[str, str] = {}
+
+    def __contains__(self, name: str) -> bool:
+        return name.lower() in self._handlers
+
+    def __len__(self) -> int:
+        return len(self._handlers)
+
+    def register(self, name: str, handler: CommandHandler, *, description: str = "") -> None:
+        key = name.lower().lstrip("/")
+        if key in self._handlers:
+            raise ValueError(f"command /{key} is already registered")
+        self._handlers[key] = handler
+        self.descriptions[key] = description
+
+    def command(self, name: str, *, description: str = "") -> Callable[[CommandHandler], CommandHandler]:
+        def decorator(handler: CommandHandler) -> CommandHandler:
+            self.register(name, handler, description=description)
+            return handler
+
+        return decorator
+
+    def resolve(self, text: str | None) -> Optional[tuple[CommandHandler, ParsedCommand]]:
+        command = parse_command(text)
+        if command is None:
+            return None
+        handler = self._handlers.get(command.name)
+        if handler is None:
+            return None
+        if command.mention and self.bot_username and command.mention.lower() != self.bot_username.lower():
+            return None
+        return handler, command
+
+    async def dispatch(self, event: Any, text: str | None) -> ParsedCommand | None:
+        """Run the matching handler and return the parsed command, if any."""
+
+        resolved = self.resolve(text)
+        if resolved is None:
+            return None
+        handler, command = resolved
+        await handler(event, command)
+        return command
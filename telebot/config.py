@@ -16,8 +16,51 @@ class Settings:
     supabase_url: Optional[str] = None
     supabase_service_role_key: Optional[str] = None
     supabase_anon_key: Optional[str] = None
+    supabase_max_connections: int = 50
+    supabase_max_keepalive: int = 20
+    supabase_keepalive_seconds: float = 30.0
+    supabase_http2: bool = False
+    supabase_connect_timeout: float = 3.0
+    supabase_read_timeout: float = 10.0
+    supabase_pool_timeout: float = 2.0
+    message_deadline_seconds: float = 5.0
+    ingress_workers: int = 16
+    ingress_max_pending: int = 10_000
+    ingress_shed_pending: int = 2_000
+    ingress_shed_lag_seconds: float = 2.0
+    regex_guard_workers: int = 2
+    regex_guard_timeout_seconds: float = 0.05
     config_cache_seconds: int = 60
+    config_stale_seconds: int = 600
+    config_negative_cache_seconds: int = 300
+    config_poll_seconds: float = 5.0
+    config_prefetch_page_size: int = 500
     default_language: str = "zh"
+    audit_batch_size: int = 100
+    audit_flush_seconds: float = 1.0
+    audit_queue_size: int = 10_000
+    points_flush_seconds: float = 1.0
+    points_batch_size: int = 500
+    outbound_global_rate: float = 25.0
+    outbound_global_burst: float = 30.0
+    outbound_chat_message_rate: float = 20 / 60
+    outbound_chat_message_burst: float = 5.0
+    outbound_chat_moderation_rate: float = 10.0
+    outbound_chat_moderation_burst: float = 20.0
+    outbound_max_pending: int = 2_000
+    delete_batch_seconds: float = 0.2
+    local_store_path: Optional[str] = None
+    local_audit_limit: int = 10_000
+    outbox_path: Optional[str] = None
+    outbox_segment_bytes: int = 4 * 1024 * 1024
+    outbox_batch_size: int = 500
+    outbox_max_backoff_seconds: float = 30.0
+    outbox_breaker_failures: int = 5
+    outbox_breaker_reset_seconds: float = 30.0
+    warm_state_path: Optional[str] = None
+    warm_state_interval_seconds: float = 60.0
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 0
 
     @property
     def has_supabase(self) -> bool:
@@ -35,6 +78,49 @@ def load_settings() -> Settings:
         supabase_url=os.getenv("SUPABASE_URL"),
         supabase_service_role_key=os.getenv("SUPABASE_SERVICE_ROLE_KEY"),
         supabase_anon_key=os.getenv("SUPABASE_ANON_KEY"),
+        supabase_max_connections=int(os.getenv("SUPABASE_MAX_CONNECTIONS", "50")),
+        supabase_max_keepalive=int(os.getenv("SUPABASE_MAX_KEEPALIVE", "20")),
+        supabase_keepalive_seconds=float(os.getenv("SUPABASE_KEEPALIVE_SECONDS", "30")),
+        supabase_http2=os.getenv("SUPABASE_HTTP2", "").lower() in {"1", "true", "yes"},
+        supabase_connect_timeout=float(os.getenv("SUPABASE_CONNECT_TIMEOUT", "3")),
+        supabase_read_timeout=float(os.getenv("SUPABASE_READ_TIMEOUT", "10")),
+        supabase_pool_timeout=float(os.getenv("SUPABASE_POOL_TIMEOUT", "2")),
+        message_deadline_seconds=float(os.getenv("MESSAGE_DEADLINE_SECONDS", "5")),
+        ingress_workers=int(os.getenv("INGRESS_WORKERS", "16")),
+        ingress_max_pending=int(os.getenv("INGRESS_MAX_PENDING", "10000")),
+        ingress_shed_pending=int(os.getenv("INGRESS_SHED_PENDING", "2000")),
+        ingress_shed_lag_seconds=float(os.getenv("INGRESS_SHED_LAG_SECONDS", "2")),
+        regex_guard_workers=int(os.getenv("REGEX_GUARD_WORKERS", "2")),
+        regex_guard_timeout_seconds=float(os.getenv("REGEX_GUARD_TIMEOUT_SECONDS", "0.05")),
         config_cache_seconds=int(os.getenv("CONFIG_CACHE_SECONDS", "60")),
+        config_stale_seconds=int(os.getenv("CONFIG_STALE_SECONDS", "600")),
+        config_negative_cache_seconds=int(os.getenv("CONFIG_NEGATIVE_CACHE_SECONDS", "300")),
+        config_poll_seconds=float(os.getenv("CONFIG_POLL_SECONDS", "5")),
+        config_prefetch_page_size=int(os.getenv("CONFIG_PREFETCH_PAGE_SIZE", "500")),
         default_language=os.getenv("DEFAULT_LANGUAGE", "zh"),
+        audit_batch_size=int(os.getenv("AUDIT_BATCH_SIZE", "100")),
+        audit_flush_seconds=float(os.getenv("AUDIT_FLUSH_SECONDS", "1.0")),
+        audit_queue_size=int(os.getenv("AUDIT_QUEUE_SIZE", "10000")),
+        points_flush_seconds=float(os.getenv("POINTS_FLUSH_SECONDS", "1.0")),
+        points_batch_size=int(os.getenv("POINTS_BATCH_SIZE", "500")),
+        outbound_global_rate=float(os.getenv("OUTBOUND_GLOBAL_RATE", "25")),
+        outbound_global_burst=float(os.getenv("OUTBOUND_GLOBAL_BURST", "30")),
+        outbound_chat_message_rate=float(os.getenv("OUTBOUND_CHAT_MESSAGE_RATE", str(20 / 60))),
+        outbound_chat_message_burst=float(os.getenv("OUTBOUND_CHAT_MESSAGE_BURST", "5")),
+        outbound_chat_moderation_rate=float(os.getenv("OUTBOUND_CHAT_MODERATION_RATE", "10")),
+        outbound_chat_moderation_burst=float(os.getenv("OUTBOUND_CHAT_MODERATION_BURST", "20")),
+        outbound_max_pending=int(os.getenv("OUTBOUND_MAX_PENDING", "2000")),
+        delete_batch_seconds=float(os.getenv("DELETE_BATCH_SECONDS", "0.2")),
+        local_store_path=os.getenv("LOCAL_STORE_PATH") or None,
+        local_audit_limit=int(os.getenv("LOCAL_AUDIT_LIMIT", "10000")),
+        outbox_path=os.getenv("OUTBOX_PATH") or None,
+        outbox_segment_bytes=int(os.getenv("OUTBOX_SEGMENT_BYTES", str(4 * 1024 * 1024))),
+        outbox_batch_size=int(os.getenv("OUTBOX_BATCH_SIZE", "500")),
+        outbox_max_backoff_seconds=float(os.getenv("OUTBOX_MAX_BACKOFF_SECONDS", "30")),
+        outbox_breaker_failures=int(os.getenv("OUTBOX_BREAKER_FAILURES", "5")),
+        outbox_breaker_reset_seconds=float(os.getenv("OUTBOX_BREAKER_RESET_SECONDS", "30")),
+        warm_state_path=os.getenv("WARM_STATE_PATH") or None,
+        warm_state_interval_seconds=float(os.getenv("WARM_STATE_INTERVAL_SECONDS", "60")),
+        metrics_host=os.getenv("METRICS_HOST", "127.0.0.1"),
+        metrics_port=int(os.getenv("METRICS_PORT", "0")),
     )
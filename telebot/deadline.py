@@ -0,0 +1,62 @@
+"""Per-message time budget shared by every await on the message path."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, Optional, TypeVar
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("telebot_deadline", default=None)
+
+
+class DeadlineExceeded(TimeoutError):
+    """The current message ran out of its time budget."""
+
+
+@contextmanager
+def deadline(seconds: float) -> Iterator[None]:
+    """Bound everything awaited inside the block to ``seconds`` from now.
+
+    Nested budgets can only shrink the enclosing one; ``seconds <= 0`` leaves
+    the current budget untouched.
+    """
+
+    if seconds <= 0:
+        yield
+        return
+    expires_at = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires_at if current is None else min(current, expires_at))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left in the current budget, or ``None`` when there is none."""
+
+    expires_at = _deadline.get()
+    if expires_at is None:
+        return None
+    return expires_at - time.monotonic()
+
+
+async def within(awaitable: Awaitable[T]) -> T:
+    """Await ``awaitable`` but give up with :class:`DeadlineExceeded` when the budget runs out."""
+
+    left = remaining()
+    if left is None:
+        return await awaitable
+    if left <= 0:
+        if asyncio.iscoroutine(awaitable):
+            awaitable.close()
+        raise DeadlineExceeded("message deadline exceeded")
+    try:
+        return await asyncio.wait_for(awaitable, left)
+    except asyncio.TimeoutError as exc:
+        raise DeadlineExceeded("message deadline exceeded") from exc
@@ -0,0 +1,135 @@
+"""Coalesce message deletions per chat into ``delete_messages`` calls."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+TELEGRAM_DELETE_LIMIT = 100
+
+
+@dataclass(slots=True)
+class DeletionReport:
+    chat_id: int
+    message_id: int
+    user_id: int
+    reason: str
+    deleted: bool = False
+    error: str | None = None
+
+
+DeliveryCallback = Callable[[DeletionReport], Any]
+DeleteMessages = Callable[[int, Any, List[int]], Awaitable[Any]]
+BatchCallback = Callable[[int, List[DeletionReport]], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class PendingDeletion:
+    report: DeletionReport
+    callback: Optional[DeliveryCallback] = None
+
+
+class DeleteBatcher:
+    """Buffer deletions per chat for ``window`` seconds and delete them in one call.
+
+    ``delete_messages(chat_id, entity, ids)`` receives at most ``max_batch`` ids. After
+    each call ``on_batch`` gets one :class:`DeletionReport` per message, e.g.
+    to write the audit trail as a single insert, and every per-message
+    callback is invoked with its own report.
+    """
+
+    def __init__(
+        self,
+        delete_messages: DeleteMessages,
+        *,
+        on_batch: Optional[BatchCallback] = None,
+        window: float = 0.2,
+        max_batch: int = TELEGRAM_DELETE_LIMIT,
+    ) -> None:
+        self._delete_messages = delete_messages
+        self._on_batch = on_batch
+        self.window = window
+        self.max_batch = max(1, min(max_batch, TELEGRAM_DELETE_LIMIT))
+        self._pending: Dict[int, List[PendingDeletion]] = {}
+        self._entities: Dict[int, Any] = {}
+        self._timers: Dict[int, asyncio.Task[None]] = {}
+        self._inflight: set[asyncio.Task[None]] = set()
+        self.batches = 0
+
+    def add(
+        self,
+        chat_id: int,
+        message_id: int,
+        user_id: int,
+        reason: str,
+        *,
+        entity: Any = None,
+        callback: Optional[DeliveryCallback] = None,
+    ) -> None:
+        if entity is not None:
+            self._entities[chat_id] = entity
+        bucket = self._pending.setdefault(chat_id, [])
+        if any(item.report.message_id == message_id for item in bucket):
+            return
+        bucket.append(PendingDeletion(DeletionReport(chat_id, message_id, user_id, reason), callback))
+        loop = asyncio.get_running_loop()
+        if len(bucket) >= self.max_batch:
+            self._spawn(loop, self.flush(chat_id))
+        elif chat_id not in self._timers:
+            # tracked as in flight too: once it fires, ``close`` must wait for its send
+            self._timers[chat_id] = self._spawn(loop, self._flush_later(chat_id))
+
+    def pending(self, chat_id: int) -> int:
+        return len(self._pending.get(chat_id, ()))
+
+    async def flush(self, chat_id: int) -> None:
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None and timer is not asyncio.current_task():
+            timer.cancel()
+        items = self._pending.pop(chat_id, [])
+        entity = self._entities.pop(chat_id, chat_id)
+        for start in range(0, len(items), self.max_batch):
+            await self._send(chat_id, entity, items[start : start + self.max_batch])
+
+    async def close(self) -> None:
+        for chat_id in list(self._pending):
+            await self.flush(chat_id)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+
+    async def _flush_later(self, chat_id: int) -> None:
+        await asyncio.sleep(self.window)
+        await self.flush(chat_id)
+
+    def _spawn(self, loop: asyncio.AbstractEventLoop, coro: Awaitable[None]) -> asyncio.Task[None]:
+        task = loop.create_task(coro)
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+        return task
+
+    async def _send(self, chat_id: int, entity: Any, items: List[PendingDeletion]) -> None:
+        reports = [item.report for item in items]
+        try:
+            await self._delete_messages(chat_id, entity, [report.message_id for report in reports])
+        except Exception as error:  # noqa: BLE001 - reported per message below
+            logger.warning("failed to delete %d messages in chat %s: %s", len(reports), chat_id, error)
+            for report in reports:
+                report.error = str(error) or type(error).__name__
+        else:
+            for report in reports:
+                report.deleted = True
+        self.batches += 1
+        if self._on_batch is not None:
+            try:
+                await self._on_batch(chat_id, reports)
+            except Exception:  # noqa: BLE001 - deletions already happened
+                logger.exception("failed to record %d deletions for chat %s", len(reports), chat_id)
+        for item in items:
+            if item.callback is not None:
+                result = item.callback(item.report)
+                if asyncio.iscoroutine(result):
+                    await result
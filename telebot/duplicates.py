@@ -0,0 +1,257 @@
+"""Near-duplicate spam detection across senders with MinHash sketches."""
+
+from __future__ import annotations
+
+import heapq
+import zlib
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from typing import Deque, Dict, FrozenSet, List, Set, Tuple
+
+from .normalize import NormalizedText
+from .rules import Action, ActionType
+
+SKETCH_SIZE = 16
+SHINGLE_SIZE = 3
+MAX_TEXT_LENGTH = 1024
+MAX_BUCKET_SIZE = 32
+MAX_EARLIER_MESSAGES = 100
+MAX_CLUSTER_SENDERS = 256
+
+
+@dataclass(slots=True)
+class DuplicateConfig:
+    enabled: bool = False
+    min_senders: int = 3
+    window_seconds: int = 300
+    min_similarity: float = 0.5
+    min_length: int = 20
+    action: str = "delete"
+    mute_seconds: int = 600
+    notice: str | None = None
+    max_fingerprints: int = 1_000
+
+
+@dataclass(slots=True)
+class DuplicateHit:
+    """A message that belongs to a cluster posted by ``senders`` distinct users.
+
+    ``triggered`` is set on the message that pushed the cluster over the
+    threshold; only then ``earlier`` lists the ``(user_id, message_id)`` pairs
+    posted before it, so the caller can remove them as well.
+    """
+
+    action: Action
+    senders: int
+    triggered: bool = False
+    earlier: List[Tuple[int, int]] = field(default_factory=list)
+
+
+Sketch = FrozenSet[int]
+
+
+class Cluster:
+    """Senders and messages of one cluster, each in least-recently-seen order."""
+
+    __slots__ = ("sketch", "senders", "messages", "last_seen", "triggered")
+
+    def __init__(self, sketch: Sketch, now: float) -> None:
+        self.sketch = sketch
+        self.senders: "OrderedDict[int, float]" = OrderedDict()
+        self.messages: Deque[Tuple[int, int, float]] = deque()
+        self.last_seen = now
+        self.triggered = False
+
+    def touch(self, user_id: int, now: float) -> None:
+        self.last_seen = now
+        self.senders.pop(user_id, None)
+        self.senders[user_id] = now
+        if len(self.senders) > MAX_CLUSTER_SENDERS:
+            self.senders.popitem(last=False)
+
+    def expire(self, horizon: float) -> None:
+        """Forget senders and messages last seen before ``horizon``."""
+
+        senders = self.senders
+        while senders and next(iter(senders.values())) < horizon:
+            senders.popitem(last=False)
+        messages = self.messages
+        while messages and messages[0][2] < horizon:
+            messages.popleft()
+
+
+class ChatFingerprints:
+    """Clusters of one chat in least-recently-seen order plus an index by sketch value."""
+
+    __slots__ = ("clusters", "index", "next_id")
+
+    def __init__(self) -> None:
+        self.clusters: "OrderedDict[int, Cluster]" = OrderedDict()
+        self.index: Dict[int, List[int]] = {}
+        self.next_id = 0
+
+
+def sketch(text: str) -> Sketch:
+    """Bottom-k MinHash sketch: the ``SKETCH_SIZE`` smallest shingle hashes of ``text``."""
+
+    text = text[:MAX_TEXT_LENGTH]
+    shingles = {zlib.crc32(text[i : i + SHINGLE_SIZE].encode("utf-8")) for i in range(max(1, len(text) - SHINGLE_SIZE + 1))}
+    return frozenset(heapq.nsmallest(SKETCH_SIZE, shingles))
+
+
+def similarity(left: Sketch, right: Sketch) -> float:
+    """Estimate the Jaccard similarity of the shingle sets behind two sketches."""
+
+    union = heapq.nsmallest(SKETCH_SIZE, left | right)
+    if not union:
+        return 0.0
+    return sum(1 for value in union if value in left and value in right) / len(union)
+
+
+class DuplicateDetector:
+    """Flag the same (or slightly edited) text posted by many accounts in a chat.
+
+    Messages of at least ``min_length`` normalized characters are reduced to a
+    fixed-size bottom-k MinHash sketch of character shingles of the
+    ``compact`` view. A message joins the most similar cluster whose estimated
+    Jaccard similarity is at least ``min_similarity``; candidates are the
+    clusters sharing a sketch value, found through an inverted index. Once
+    ``min_senders`` distinct users posted into a cluster within
+    ``window_seconds``, that message and every later one in the cluster gets
+    the configured action, until fewer senders than that remain in the
+    window. Each chat keeps at most ``max_fingerprints``
+    clusters and at most ``max_chats`` chats are tracked.
+    """
+
+    def __init__(self, *, max_chats: int = 10_000) -> None:
+        self.max_chats = max_chats
+        self._chats: "OrderedDict[int, ChatFingerprints]" = OrderedDict()
+        self._configs: Dict[int, Tuple[dict, DuplicateConfig]] = {}
+
+    def check(
+        self,
+        chat_id: int,
+        user_id: int,
+        message_id: int,
+        text: str | NormalizedText,
+        config: dict | DuplicateConfig | None,
+        *,
+        now: float | None = None,
+    ) -> DuplicateHit | None:
+        cfg = self._parse(config)
+        if not cfg.enabled:
+            return None
+        normalized = text if isinstance(text, NormalizedText) else NormalizedText(text)
+        content = normalized.compact
+        if len(content) < cfg.min_length:
+            return None
+        current_ts = now if now is not None else self._now()
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = self._chats[chat_id] = ChatFingerprints()
+            if len(self._chats) > self.max_chats:
+                self._chats.popitem(last=False)
+        else:
+            self._chats.move_to_end(chat_id)
+        self._expire(state, current_ts - cfg.window_seconds)
+
+        signature = sketch(content)
+        cluster_id, cluster = self._nearest(state, signature, cfg.min_similarity)
+        if cluster is None:
+            cluster_id, cluster = self._add(state, signature, current_ts, cfg.max_fingerprints)
+        else:
+            state.clusters.move_to_end(cluster_id)
+        cluster.expire(current_ts - cfg.window_seconds)
+        cluster.touch(user_id, current_ts)
+
+        senders = len(cluster.senders)
+        if senders < cfg.min_senders:
+            # the window slid past the senders that tripped it: start over
+            cluster.triggered = False
+            if len(cluster.messages) < MAX_EARLIER_MESSAGES:
+                cluster.messages.append((user_id, message_id, current_ts))
+            return None
+        if cluster.triggered:
+            return DuplicateHit(action=self._action(cfg), senders=senders)
+        cluster.triggered = True
+        earlier = [(sender, earlier_id) for sender, earlier_id, _ in cluster.messages]
+        cluster.messages.clear()
+        return DuplicateHit(action=self._action(cfg), senders=senders, triggered=True, earlier=earlier)
+
+    @staticmethod
+    def _nearest(state: ChatFingerprints, signature: Sketch, min_similarity: float) -> Tuple[int, Cluster | None]:
+        best: Tuple[int, Cluster | None] = (-1, None)
+        best_score = min_similarity
+        seen: Set[int] = set()
+        for value in signature:
+            for cluster_id in state.index.get(value, ()):
+                if cluster_id in seen:
+                    continue
+                seen.add(cluster_id)
+                cluster = state.clusters[cluster_id]
+                score = similarity(signature, cluster.sketch)
+                if score >= best_score:
+                    best, best_score = (cluster_id, cluster), score
+        return best
+
+    def _add(self, state: ChatFingerprints, signature: Sketch, now: float, limit: int) -> Tuple[int, Cluster]:
+        cluster_id = state.next_id
+        state.next_id += 1
+        cluster = state.clusters[cluster_id] = Cluster(signature, now)
+        for value in signature:
+            bucket = state.index.setdefault(value, [])
+            bucket.append(cluster_id)
+            if len(bucket) > MAX_BUCKET_SIZE:
+                # make room by dropping the stalest cluster, never the one just added
+                stalest = min(bucket[:-1], key=lambda other: state.clusters[other].last_seen)
+                self._drop(state, stalest)
+        while len(state.clusters) > limit:
+            self._drop(state, next(iter(state.clusters)))
+        return cluster_id, cluster
+
+    def _expire(self, state: ChatFingerprints, horizon: float) -> None:
+        while state.clusters:
+            cluster_id, cluster = next(iter(state.clusters.items()))
+            if cluster.last_seen >= horizon:
+                return
+            self._drop(state, cluster_id)
+
+    @staticmethod
+    def _drop(state: ChatFingerprints, cluster_id: int) -> None:
+        cluster = state.clusters.pop(cluster_id)
+        for value in cluster.sketch:
+            bucket = state.index.get(value)
+            if bucket is None:
+                continue
+            bucket.remove(cluster_id)
+            if not bucket:
+                del state.index[value]
+
+    @staticmethod
+    def _action(cfg: DuplicateConfig) -> Action:
+        if cfg.action == "mute":
+            return Action(type=ActionType.MUTE, duration=cfg.mute_seconds, message=cfg.notice)
+        return Action(type=ActionType.DELETE, message=cfg.notice)
+
+    def _parse(self, config: dict | DuplicateConfig | None) -> DuplicateConfig:
+        if isinstance(config, DuplicateConfig):
+            return config
+        if not config:
+            return _DISABLED
+        cached = self._configs.get(id(config))
+        if cached is not None and cached[0] is config:
+            return cached[1]
+        parsed = DuplicateConfig(**config)
+        if len(self._configs) >= 1024:
+            self._configs.clear()
+        self._configs[id(config)] = (config, parsed)
+        return parsed
+
+    @staticmethod
+    def _now() -> float:
+        from time import monotonic
+
+        return monotonic()
+
+
+_DISABLED = DuplicateConfig()
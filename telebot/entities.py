@@ -0,0 +1,151 @@
+"""LRU + TTL cache of chats and users resolved from Telegram updates."""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, Hashable, Optional, TypeVar
+
+try:  # pragma: no cover - telethon is a runtime dependency
+    from telethon import utils as telethon_utils
+except ImportError:  # pragma: no cover - keep the cache importable without telethon
+    telethon_utils = None  # type: ignore
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+@dataclass(slots=True)
+class UserInfo:
+    user_id: int
+    username: str | None = None
+    first_name: str = ""
+    last_name: str = ""
+    input_entity: Any = None
+
+
+@dataclass(slots=True)
+class ChatInfo:
+    chat_id: int
+    title: str | None = None
+    input_entity: Any = None
+
+
+class TTLCache(Generic[K, V]):
+    """Bounded LRU map whose entries expire ``ttl`` seconds after being stored."""
+
+    def __init__(self, *, max_entries: int = 10_000, ttl: float = 3600.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: "OrderedDict[K, tuple[float, V]]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def get(self, key: K) -> Optional[V]:
+        entry = self._entries.get(key)
+        if entry is None or entry[0] <= self._clock():
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[1]
+
+    def put(self, key: K, value: V) -> None:
+        self._entries[key] = (self._clock() + self.ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+
+class EntityCache:
+    """Share resolved senders and chats between handlers.
+
+    Entities that arrive with an update (``event.sender``, ``event.chat``,
+    ``ChatAction.users``) are stored by :meth:`observe` without any network
+    call. The ``get_*`` helpers only fall back to the event's awaitable
+    getters on a cache miss.
+    """
+
+    def __init__(self, *, max_entries: int = 10_000, ttl: float = 3600.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.users: TTLCache[int, UserInfo] = TTLCache(max_entries=max_entries, ttl=ttl, clock=clock)
+        self.chats: TTLCache[int, ChatInfo] = TTLCache(max_entries=max_entries, ttl=ttl, clock=clock)
+
+    def observe(self, event: Any) -> None:
+        sender = getattr(event, "sender", None)
+        if sender is not None:
+            self.remember_user(sender, getattr(event, "sender_id", None))
+        for user in getattr(event, "users", None) or ():
+            self.remember_user(user)
+        chat = getattr(event, "chat", None)
+        if chat is not None:
+            self.remember_chat(chat, getattr(event, "chat_id", None))
+
+    def remember_user(self, user: Any, user_id: int | None = None) -> UserInfo:
+        info = UserInfo(
+            user_id=user_id if user_id is not None else getattr(user, "id", 0),
+            username=getattr(user, "username", None),
+            first_name=getattr(user, "first_name", "") or "",
+            last_name=getattr(user, "last_name", "") or "",
+            input_entity=_input_peer(user),
+        )
+        self.users.put(info.user_id, info)
+        return info
+
+    def remember_chat(self, chat: Any, chat_id: int | None = None) -> ChatInfo:
+        info = ChatInfo(
+            chat_id=chat_id if chat_id is not None else getattr(chat, "id", 0),
+            title=getattr(chat, "title", None),
+            input_entity=_input_peer(chat),
+        )
+        self.chats.put(info.chat_id, info)
+        return info
+
+    async def get_sender(self, event: Any) -> Optional[UserInfo]:
+        return await self._user(event, getattr(event, "sender_id", None), "get_sender")
+
+    async def get_user(self, event: Any) -> Optional[UserInfo]:
+        """The (first) user of a ``ChatAction`` event, e.g. who joined."""
+
+        return await self._user(event, getattr(event, "user_id", None), "get_user")
+
+    async def get_chat(self, event: Any) -> Optional[ChatInfo]:
+        chat_id = getattr(event, "chat_id", None)
+        if chat_id is not None:
+            cached = self.chats.get(chat_id)
+            if cached is not None:
+                return cached
+        chat = await event.get_chat()
+        if chat is None:
+            return None
+        return self.remember_chat(chat, chat_id)
+
+    async def _user(self, event: Any, user_id: int | None, getter: str) -> Optional[UserInfo]:
+        if user_id is not None:
+            cached = self.users.get(user_id)
+            if cached is not None:
+                return cached
+        user = await getattr(event, getter)()
+        if user is None:
+            return None
+        return self.remember_user(user, user_id)
+
+
+def _input_peer(entity: Any) -> Any:
+    if telethon_utils is None:
+        return entity
+    try:
+        return telethon_utils.get_input_peer(entity)
+    except (TypeError, ValueError):
+        return entity
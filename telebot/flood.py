@@ -2,9 +2,11 @@
 
 from __future__ import annotations
 
-from collections import deque, defaultdict
+import heapq
+from collections import OrderedDict
 from dataclasses import dataclass
-from typing import Deque, Dict, Tuple
+from itertools import count
+from typing import Dict, Iterable, List, Tuple
 
 from .rules import Action, ActionType
 
@@ -18,33 +20,146 @@ class FloodConfig:
     notice: str | None = None
 
 
+class FloodWindow:
+    """Sliding-window counter: message counts of the current and previous window."""
+
+    __slots__ = ("start", "current", "previous", "expires_at")
+
+    def __init__(self, start: float) -> None:
+        self.start = start
+        self.current = 0
+        self.previous = 0
+        self.expires_at = start
+
+
+# (chat_id, user_id, start, current, previous, expires_at)
+FloodWindowState = Tuple[int, int, float, int, int, float]
+
+
 class FloodProtector:
-    """Track user activity per chat and return punishment actions when needed."""
+    """Track user activity per chat and return punishment actions when needed.
 
-    def __init__(self) -> None:
-        self._messages: Dict[Tuple[int, int], Deque[float]] = defaultdict(deque)
+    Each (chat, user) pair costs one fixed-size :class:`FloodWindow` regardless
+    of how many messages it sends. Keys idle for two of their own intervals
+    carry no state; a heap ordered by expiry finds them regardless of how
+    long other chats' intervals are. Windows are also kept in
+    least-recently-seen order so that at most ``max_keys`` are tracked at any
+    time.
+    """
 
-    def check(self, chat_id: int, user_id: int, config: dict | None, *, now: float | None = None) -> Action | None:
-        cfg = FloodConfig(**config) if config else FloodConfig()
+    def __init__(self, *, max_keys: int = 200_000, max_cached_configs: int = 1024) -> None:
+        self.max_keys = max_keys
+        self.max_cached_configs = max_cached_configs
+        self._windows: "OrderedDict[Tuple[int, int], FloodWindow]" = OrderedDict()
+        self._configs: Dict[int, Tuple[dict, FloodConfig]] = {}
+        # (expires_at, seq, key, window); an entry is stale once its window
+        # was replaced or evicted, and is re-pushed if the window was extended
+        self._expiry: List[Tuple[float, int, Tuple[int, int], FloodWindow]] = []
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return len(self._windows)
+
+    def check(
+        self, chat_id: int, user_id: int, config: dict | FloodConfig | None, *, now: float | None = None
+    ) -> Action | None:
+        cfg = self._parse(config)
         if not cfg.enabled:
             return None
-        key = (chat_id, user_id)
-        bucket = self._messages[key]
         current_ts = now if now is not None else self._now()
-        self._trim(bucket, cfg.interval_seconds, current_ts)
-        bucket.append(current_ts)
-        if len(bucket) > cfg.max_messages:
-            bucket.clear()
+        if self._expiry and self._expiry[0][0] <= current_ts:
+            self._evict_idle(current_ts)
+        key = (chat_id, user_id)
+        window = self._windows.get(key)
+        created = window is None
+        if created:
+            window = self._windows[key] = FloodWindow(current_ts)
+            if len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        else:
+            self._windows.move_to_end(key)
+
+        interval = cfg.interval_seconds or 1
+        elapsed = current_ts - window.start
+        if elapsed >= interval:
+            skipped = int(elapsed // interval)
+            window.previous = window.current if skipped == 1 else 0
+            window.current = 0
+            window.start += skipped * interval
+            elapsed = current_ts - window.start
+        window.current += 1
+        expires_at = window.expires_at
+        window.expires_at = current_ts + 2 * interval
+        if created or window.expires_at < expires_at:
+            # new window, or a shorter interval than the queued entry assumed
+            self._schedule(key, window)
+
+        estimate = window.previous * (1 - elapsed / interval) + window.current
+        if estimate > cfg.max_messages:
+            window.current = window.previous = 0
             return Action(type=ActionType.MUTE, duration=cfg.mute_seconds, message=cfg.notice)
         return None
 
-    @staticmethod
-    def _trim(bucket: Deque[float], interval: int, current_ts: float) -> None:
-        while bucket and current_ts - bucket[0] > interval:
-            bucket.popleft()
+    def export_windows(self) -> List[FloodWindowState]:
+        """Windows in least-recently-seen order, for :mod:`telebot.warmstart`."""
+
+        return [
+            (chat_id, user_id, window.start, window.current, window.previous, window.expires_at)
+            for (chat_id, user_id), window in self._windows.items()
+        ]
+
+    def restore_windows(self, states: Iterable[FloodWindowState]) -> int:
+        """Load windows exported by :meth:`export_windows`; timestamps must be on this clock."""
+
+        restored = 0
+        for chat_id, user_id, start, current, previous, expires_at in states:
+            window = FloodWindow(start)
+            window.current, window.previous, window.expires_at = current, previous, expires_at
+            self._windows[(chat_id, user_id)] = window
+            self._windows.move_to_end((chat_id, user_id))
+            self._schedule((chat_id, user_id), window)
+            restored += 1
+        while len(self._windows) > self.max_keys:
+            self._windows.popitem(last=False)
+        return restored
+
+    def _parse(self, config: dict | FloodConfig | None) -> FloodConfig:
+        if isinstance(config, FloodConfig):
+            return config
+        if not config:
+            return _DISABLED
+        cached = self._configs.get(id(config))
+        if cached is not None and cached[0] is config:
+            return cached[1]
+        parsed = FloodConfig(**config)
+        if len(self._configs) >= self.max_cached_configs:
+            self._configs.clear()
+        self._configs[id(config)] = (config, parsed)
+        return parsed
+
+    def _schedule(self, key: Tuple[int, int], window: FloodWindow) -> None:
+        heapq.heappush(self._expiry, (window.expires_at, next(self._seq), key, window))
+        if len(self._expiry) > 2 * max(len(self._windows), 1024):
+            # windows dropped by the ``max_keys`` cap leave stale entries behind
+            self._expiry = [entry for entry in self._expiry if self._windows.get(entry[2]) is entry[3]]
+            heapq.heapify(self._expiry)
+
+    def _evict_idle(self, now: float) -> None:
+        windows, expiry = self._windows, self._expiry
+        while expiry and expiry[0][0] <= now:
+            _, _, key, window = heapq.heappop(expiry)
+            if windows.get(key) is not window:
+                continue
+            if window.expires_at > now:
+                heapq.heappush(expiry, (window.expires_at, next(self._seq), key, window))
+                continue
+            del windows[key]
 
     @staticmethod
     def _now() -> float:
         from time import monotonic
 
         return monotonic()
+
+
+_DISABLED = FloodConfig()
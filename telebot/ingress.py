@@ -0,0 +1,150 @@
+"""Bounded ingress stage: per-chat ordered queues drained by a worker pool."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Set, Tuple
+
+logger = logging.getLogger(__name__)
+
+# handler(item, degraded): ``degraded`` asks the handler to skip optional work
+IngressHandler = Callable[[Any, bool], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class IngressStats:
+    submitted: int = 0
+    processed: int = 0
+    dropped: int = 0
+    degraded: int = 0
+    failed: int = 0
+    max_lag: float = 0.0
+
+
+class IngressQueue:
+    """Queue updates per chat and process them with ``workers`` concurrent tasks.
+
+    Items of one chat are handled strictly in arrival order and never by two
+    workers at once; chats with pending items take turns, so one busy chat
+    cannot starve the others. At most ``max_pending`` items wait in total and
+    :meth:`submit` drops new ones beyond that. Once ``shed_pending`` items are
+    waiting, or an item waited ``shed_lag`` seconds or longer, items are
+    handed to the handler with ``degraded=True`` so it can skip optional side
+    effects until the backlog is gone.
+    """
+
+    def __init__(
+        self,
+        handler: IngressHandler,
+        *,
+        workers: int = 16,
+        max_pending: int = 10_000,
+        shed_pending: int = 2_000,
+        shed_lag: float = 2.0,
+        on_lag: Optional[Callable[[float], None]] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._handler = handler
+        self.workers = max(1, workers)
+        self.max_pending = max_pending
+        self.shed_pending = shed_pending
+        self.shed_lag = shed_lag
+        self._on_lag = on_lag
+        self._clock = clock
+        self.stats = IngressStats()
+        self._queues: Dict[int, Deque[Tuple[float, Any]]] = {}
+        self._ready: Deque[int] = deque()
+        self._busy: Set[int] = set()
+        self._pending = 0
+        self._wakeup = asyncio.Event()
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._tasks: List[asyncio.Task[None]] = []
+        self._closed = False
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def lag(self) -> float:
+        """Seconds the oldest waiting item has been queued."""
+
+        heads = [queue[0][0] for queue in self._queues.values() if queue]
+        return self._clock() - min(heads) if heads else 0.0
+
+    def submit(self, chat_id: int, item: Any) -> bool:
+        """Queue ``item`` behind earlier items of ``chat_id``; ``False`` if it was dropped."""
+
+        self.stats.submitted += 1
+        if self._closed or self._pending >= self.max_pending:
+            self.stats.dropped += 1
+            return False
+        queue = self._queues.get(chat_id)
+        if queue is None:
+            queue = self._queues[chat_id] = deque()
+        queue.append((self._clock(), item))
+        self._pending += 1
+        if chat_id not in self._busy and len(queue) == 1:
+            self._ready.append(chat_id)
+        self._idle.clear()
+        self._wakeup.set()
+        self._start()
+        return True
+
+    async def drain(self) -> None:
+        """Wait until every queued item has been handled."""
+
+        await self._idle.wait()
+
+    async def close(self, timeout: float = 5.0) -> None:
+        self._closed = True
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("dropping %d queued updates on shutdown", self._pending)
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    def _start(self) -> None:
+        if not self._tasks:
+            loop = asyncio.get_running_loop()
+            self._tasks = [loop.create_task(self._worker()) for _ in range(self.workers)]
+
+    async def _worker(self) -> None:
+        while True:
+            while not self._ready:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+            chat_id = self._ready.popleft()
+            queue = self._queues[chat_id]
+            enqueued_at, item = queue.popleft()
+            self._busy.add(chat_id)
+            lag = self._clock() - enqueued_at
+            self.stats.max_lag = max(self.stats.max_lag, lag)
+            if self._on_lag is not None:
+                self._on_lag(lag)
+            degraded = self._pending >= self.shed_pending or lag >= self.shed_lag
+            if degraded:
+                self.stats.degraded += 1
+            try:
+                await self._handler(item, degraded)
+            except Exception:  # noqa: BLE001 - one bad update must not kill the worker
+                self.stats.failed += 1
+                logger.exception("failed to handle update for chat %s", chat_id)
+            finally:
+                self.stats.processed += 1
+                self._pending -= 1
+                self._busy.discard(chat_id)
+                if queue:
+                    self._ready.append(chat_id)
+                    self._wakeup.set()
+                else:
+                    del self._queues[chat_id]
+                if not self._pending:
+                    self._idle.set()
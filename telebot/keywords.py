@@ -0,0 +1,117 @@
+"""Aho-Corasick automaton for case-insensitive literal keyword matching."""
+
+from __future__ import annotations
+
+from typing import Dict, Generic, Iterable, List, Set, Tuple, TypeVar
+
+T = TypeVar("T")
+
+# Characters that ``re.IGNORECASE`` treats as equal although their simple
+# lowercase forms differ (dotless i, long s, Greek symbol variants, ...).
+# Every member of a class is mapped to the lowest code point of the class.
+_CASE_CLASSES: Tuple[Tuple[int, ...], ...] = (
+    (0x69, 0x131),
+    (0x73, 0x17F),
+    (0xB5, 0x3BC),
+    (0x345, 0x3B9, 0x1FBE),
+    (0x390, 0x1FD3),
+    (0x3B0, 0x1FE3),
+    (0x3B2, 0x3D0),
+    (0x3B5, 0x3F5),
+    (0x3B8, 0x3D1),
+    (0x3BA, 0x3F0),
+    (0x3C0, 0x3D6),
+    (0x3C1, 0x3F1),
+    (0x3C2, 0x3C3),
+    (0x3C6, 0x3D5),
+    (0x432, 0x1C80),
+    (0x434, 0x1C81),
+    (0x43E, 0x1C82),
+    (0x441, 0x1C83),
+    (0x442, 0x1C84, 0x1C85),
+    (0x44A, 0x1C86),
+    (0x463, 0x1C87),
+    (0x1C88, 0xA64B),
+    (0x1E61, 0x1E9B),
+    (0xFB05, 0xFB06),
+)
+_CASE_FIXES: Dict[int, int] = {
+    member: min(group) for group in _CASE_CLASSES for member in group if member != min(group)
+}
+
+
+def fold_text(text: str) -> str:
+    """Fold ``text`` so that equal results mean an ``re.IGNORECASE`` literal match."""
+
+    if text.isascii():
+        return text.lower()
+    # ``str.lower`` expands U+0130 to two code points, the regex engine maps it to "i".
+    return text.replace("İ", "i").lower().translate(_CASE_FIXES)
+
+
+class KeywordAutomaton(Generic[T]):
+    """Report every keyword contained in a text in a single pass.
+
+    Keywords are folded with :func:`fold_text`, so a hit is equivalent to
+    ``re.search(re.escape(keyword), text, re.IGNORECASE)``. Each keyword carries
+    an arbitrary value; :meth:`search` returns the values of all keywords found.
+    """
+
+    def __init__(self, keywords: Iterable[Tuple[str, T]]) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._out: List[Tuple[T, ...]] = [()]
+        self._always: Set[T] = set()
+        self.size = 0
+        for keyword, value in keywords:
+            self._add(fold_text(keyword), value)
+        self._build()
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _add(self, keyword: str, value: T) -> None:
+        self.size += 1
+        if not keyword:
+            self._always.add(value)
+            return
+        state = 0
+        for char in keyword:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append(())
+                self._goto[state][char] = nxt
+            state = nxt
+        self._out[state] += (value,)
+
+    def _build(self) -> None:
+        goto, fail, out = self._goto, self._fail, self._out
+        queue = list(goto[0].values())
+        for state in queue:
+            for char, nxt in goto[state].items():
+                queue.append(nxt)
+                fallback = fail[state]
+                while fallback and char not in goto[fallback]:
+                    fallback = fail[fallback]
+                target = goto[fallback].get(char, 0)
+                fail[nxt] = target if target != nxt else 0
+                out[nxt] += out[fail[nxt]]
+
+    def search(self, text: str) -> Set[T]:
+        found: Set[T] = set(self._always)
+        if len(self._goto) == 1:
+            return found
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for char in fold_text(text):
+            transitions = goto[state]
+            while char not in transitions and state:
+                state = fail[state]
+                transitions = goto[state]
+            state = transitions.get(char, 0)
+            if out[state]:
+                found.update(out[state])
+        return found
@@ -0,0 +1,210 @@
+"""Lightweight latency histograms, counters and a Prometheus text endpoint."""
+
+from __future__ import annotations
+
+import asyncio
+import bisect
+import logging
+import time
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS: Tuple[float, ...] = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+# label sets per counter before new ones are folded into one "other" series
+MAX_SERIES = 1_000
+OVERFLOW_LABEL = "other"
+
+Sample = Tuple[Dict[str, str], float]
+Collector = Callable[[], Iterable[Sample]]
+
+
+class Histogram:
+    """Cumulative-bucket latency histogram in the Prometheus layout."""
+
+    __slots__ = ("buckets", "counts", "total", "count")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class _Timer:
+    __slots__ = ("_histogram", "_started")
+
+    def __init__(self, histogram: Histogram) -> None:
+        self._histogram = histogram
+        self._started = 0.0
+
+    def __enter__(self) -> "_Timer":
+        self._started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        self._histogram.observe(time.perf_counter() - self._started)
+
+
+class _NullTimer:
+    __slots__ = ()
+
+    def __enter__(self) -> "_NullTimer":
+        return self
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class MetricsRegistry:
+    """Collect per-stage latencies and labelled counters.
+
+    When ``enabled`` is false every recording call returns immediately and
+    ``time`` hands back a shared no-op context manager, so instrumented code
+    pays one attribute lookup and a call per stage. Each counter keeps at most
+    ``max_series`` label sets; increments for further ones are counted under a
+    single series whose label values are all ``"other"``.
+    """
+
+    def __init__(self, *, enabled: bool = True, buckets: Tuple[float, ...] = DEFAULT_BUCKETS, max_series: int = MAX_SERIES) -> None:
+        self.enabled = enabled
+        self.buckets = buckets
+        self.max_series = max_series
+        self.stages: Dict[str, Histogram] = {}
+        self.counters: Dict[str, Dict[Tuple[Tuple[str, str], ...], float]] = {}
+        self._help: Dict[str, str] = {}
+        self._collectors: List[Tuple[str, str, str, Collector]] = []
+
+    def time(self, stage: str) -> "_Timer | _NullTimer":
+        """Context manager recording the duration of ``stage``."""
+
+        if not self.enabled:
+            return _NULL_TIMER
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram(self.buckets)
+        return _Timer(histogram)
+
+    def observe(self, stage: str, seconds: float) -> None:
+        if not self.enabled:
+            return
+        histogram = self.stages.get(stage)
+        if histogram is None:
+            histogram = self.stages[stage] = Histogram(self.buckets)
+        histogram.observe(seconds)
+
+    def inc(self, name: str, amount: float = 1, **labels: str) -> None:
+        if not self.enabled:
+            return
+        series = self.counters.setdefault(name, {})
+        key = tuple(sorted(labels.items()))
+        if key not in series and len(series) >= self.max_series:
+            key = tuple((label, OVERFLOW_LABEL) for label, _ in key)
+        series[key] = series.get(key, 0) + amount
+
+    def describe(self, name: str, help_text: str) -> None:
+        self._help[name] = help_text
+
+    def register_collector(self, name: str, kind: str, help_text: str, collector: Collector) -> None:
+        """Sample ``collector`` at scrape time, e.g. for cache hit counters kept elsewhere."""
+
+        self._collectors.append((name, kind, help_text, collector))
+
+    def render(self) -> str:
+        """Return all metrics in the Prometheus text exposition format."""
+
+        lines: List[str] = []
+        if self.stages:
+            lines.append("# HELP telebot_stage_seconds Latency of each pipeline stage.")
+            lines.append("# TYPE telebot_stage_seconds histogram")
+            for stage, histogram in sorted(self.stages.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f'telebot_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'telebot_stage_seconds_bucket{{stage="{stage}",le="+Inf"}} {histogram.count}')
+                lines.append(f'telebot_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'telebot_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+        for name, series in sorted(self.counters.items()):
+            if name in self._help:
+                lines.append(f"# HELP {name} {self._help[name]}")
+            lines.append(f"# TYPE {name} counter")
+            for labels, value in series.items():
+                lines.append(f"{name}{_format_labels(dict(labels))} {_format_value(value)}")
+        for name, kind, help_text, collector in self._collectors:
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for labels, value in collector():
+                lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class MetricsServer:
+    """Minimal asyncio HTTP server answering ``GET /metrics``."""
+
+    def __init__(self, registry: MetricsRegistry, *, host: str = "127.0.0.1", port: int = 9464) -> None:
+        self.registry = registry
+        self.host = host
+        self.port = port
+        self._server: Optional[asyncio.base_events.Server] = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self.host, self.port)
+        sockets = self._server.sockets or []
+        if sockets:
+            self.port = sockets[0].getsockname()[1]
+        logger.info("metrics endpoint listening on %s:%s", self.host, self.port)
+
+    async def close(self) -> None:
+        if self._server is None:
+            return
+        self._server.close()
+        await self._server.wait_closed()
+        self._server = None
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            request_line = await asyncio.wait_for(reader.readline(), timeout=5)
+            while (await asyncio.wait_for(reader.readline(), timeout=5)) not in (b"\r\n", b"\n", b""):
+                pass
+            parts = request_line.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?", 1)[0] == "/metrics":
+                status, body = "200 OK", self.registry.render().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(
+                f"HTTP/1.1 {status}\r\n"
+                "Content-Type: text/plain; version=0.0.4; charset=utf-8\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                "Connection: close\r\n\r\n".encode()
+                + body
+            )
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+
+def _format_labels(labels: Dict[str, str]) -> str:
+    if not labels:
+        return ""
+    body = ",".join(f'{key}="{_escape(str(value))}"' for key, value in labels.items())
+    return "{" + body + "}"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
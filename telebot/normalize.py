@@ -0,0 +1,96 @@
+"""Per-message text normalization shared by all rules of a group.
+
+Spam often dodges keywords with full-width letters, zero-width joiners,
+Cyrillic look-alikes or spaces between letters. :class:`NormalizedText`
+computes each normalized view of a message at most once, and every rule picks
+the view it matches against via its ``match_on`` option:
+
+* ``raw`` – the text as received (default, previous behaviour);
+* ``folded`` – NFKC, casefolded, zero-width characters removed;
+* ``skeleton`` – ``folded`` with common homoglyphs mapped to Latin letters;
+* ``compact`` – ``skeleton`` with all whitespace removed.
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from typing import Callable, Dict, Tuple
+
+VIEWS: Tuple[str, ...] = ("raw", "folded", "skeleton", "compact")
+
+_ZERO_WIDTH = dict.fromkeys(
+    [0x00AD, 0x034F, 0x061C, 0x115F, 0x1160, 0x180E, *range(0x200B, 0x2010), *range(0x2060, 0x2065), 0xFEFF],
+    None,
+)
+
+# Lowercase Cyrillic and Greek letters that render like Latin ones; the text is
+# casefolded first, so only lowercase forms are needed.
+_HOMOGLYPHS = str.maketrans(
+    {
+        "а": "a", "в": "b", "е": "e", "ё": "e", "к": "k", "м": "m", "н": "h", "о": "o", "р": "p",
+        "с": "c", "т": "t", "у": "y", "х": "x", "і": "i", "ї": "i", "ј": "j", "ѕ": "s", "ԁ": "d",
+        "һ": "h", "ԛ": "q", "ԝ": "w", "ɡ": "g", "α": "a", "β": "b", "ε": "e", "ι": "i", "κ": "k",
+        "ν": "v", "ο": "o", "ρ": "p", "τ": "t", "υ": "u", "χ": "x", "ω": "w",
+    }
+)
+
+
+def fold(text: str) -> str:
+    return unicodedata.normalize("NFKC", text).casefold().translate(_ZERO_WIDTH)
+
+
+def skeleton(text: str) -> str:
+    return fold(text).translate(_HOMOGLYPHS)
+
+
+def compact(text: str) -> str:
+    return "".join(skeleton(text).split())
+
+
+NORMALIZERS: Dict[str, Callable[[str], str]] = {
+    "raw": lambda text: text,
+    "folded": fold,
+    "skeleton": skeleton,
+    "compact": compact,
+}
+
+
+def validate_view(view: str) -> str:
+    if view not in NORMALIZERS:
+        raise ValueError(f"unknown match_on view {view!r}; expected one of {', '.join(VIEWS)}")
+    return view
+
+
+class NormalizedText:
+    """Lazily computed, cached normalized views of one message."""
+
+    __slots__ = ("raw", "_folded", "_skeleton", "_compact")
+
+    def __init__(self, raw: str) -> None:
+        self.raw = raw
+        self._folded: str | None = None
+        self._skeleton: str | None = None
+        self._compact: str | None = None
+
+    @property
+    def folded(self) -> str:
+        if self._folded is None:
+            self._folded = fold(self.raw)
+        return self._folded
+
+    @property
+    def skeleton(self) -> str:
+        if self._skeleton is None:
+            self._skeleton = self.folded.translate(_HOMOGLYPHS)
+        return self._skeleton
+
+    @property
+    def compact(self) -> str:
+        if self._compact is None:
+            self._compact = "".join(self.skeleton.split())
+        return self._compact
+
+    def view(self, name: str) -> str:
+        if name == "raw":
+            return self.raw
+        return getattr(self, validate_view(name))
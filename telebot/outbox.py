@@ -0,0 +1,380 @@
+"""Disk-backed outbox that decouples Supabase writes from the message path."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import random
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Hashable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+OutboxDeliver = Callable[[str, List[Any]], Awaitable[None]]
+OutboxTally = Callable[[str, Any], Optional[Tuple[Hashable, int]]]
+
+SEGMENT_SUFFIX = ".log"
+CURSOR_FILE = "cursor"
+DEAD_LETTER_FILE = "dead-letter.jsonl"
+
+
+@dataclass(slots=True)
+class OutboxStats:
+    appended: int = 0
+    delivered: int = 0
+    batches: int = 0
+    failures: int = 0
+    dead_lettered: int = 0
+    corrupt: int = 0
+
+
+class CircuitBreaker:
+    """Open after ``failure_threshold`` consecutive failures, retry after ``reset_timeout``."""
+
+    def __init__(self, *, failure_threshold: int = 5, reset_timeout: float = 30.0, clock: Callable[[], float] = time.monotonic) -> None:
+        self.failure_threshold = max(1, failure_threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._clock = clock
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half_open" if self.retry_in() == 0 else "open"
+
+    def retry_in(self) -> float:
+        """Seconds until a trial call is allowed; ``0`` when calls may go through."""
+
+        if self.opened_at is None:
+            return 0.0
+        return max(0.0, self.opened_at + self.reset_timeout - self._clock())
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.opened_at = None
+
+    def record_failure(self) -> None:
+        self.failures += 1
+        if self.failures >= self.failure_threshold:
+            self.opened_at = self._clock()
+
+
+class Outbox:
+    """Append-only segmented log on disk plus a replay worker.
+
+    :meth:`append` writes one JSON line to the current segment and returns;
+    the worker reads records back in log order, groups consecutive records of
+    the same kind into one ``deliver(kind, items)`` call and advances a
+    persisted cursor only after it succeeds. Because delivery follows the log,
+    records of a chat are delivered in the order they were written. Failures
+    are retried with exponential backoff behind a :class:`CircuitBreaker`;
+    errors for which ``retryable`` returns false are moved to a dead-letter
+    file so one bad record cannot block the log; so are lines that no longer
+    parse, e.g. after a disk error. Delivery is at-least-once:
+    a crash between a successful call and the cursor write replays the batch.
+
+    ``tally(kind, item)`` may map records to a ``(key, amount)`` pair;
+    :meth:`tally` then sums the amounts per key over records not yet
+    delivered or dead-lettered, e.g. point deltas a balance read must add.
+
+    The worker does its file I/O in a thread. It starts on the first
+    :meth:`append`, or as soon as the outbox is opened inside a running loop
+    when records from a previous run are still waiting.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike[str],
+        deliver: OutboxDeliver,
+        *,
+        segment_bytes: int = 4 * 1024 * 1024,
+        batch_size: int = 500,
+        base_backoff: float = 0.5,
+        max_backoff: float = 30.0,
+        breaker: CircuitBreaker | None = None,
+        retryable: Callable[[BaseException], bool] = lambda exc: True,
+        fsync: bool = False,
+        tally: Optional[OutboxTally] = None,
+    ) -> None:
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._deliver = deliver
+        self.segment_bytes = segment_bytes
+        self.batch_size = max(1, batch_size)
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self.breaker = breaker or CircuitBreaker()
+        self._retryable = retryable
+        self._fsync = fsync
+        self._tally = tally
+        self._tallies: Dict[Hashable, int] = {}
+        self.stats = OutboxStats()
+        self._cursor = self._load_cursor()
+        segments = self._segments()
+        self._segment = segments[-1] if segments else self._cursor[0]
+        self._repair_tail(self._segment_path(self._segment))
+        if tally is not None:
+            self._tally_backlog()
+        self._writer = self._segment_path(self._segment).open("ab")
+        self._wakeup = asyncio.Event()
+        self._stopping = asyncio.Event()
+        self._empty = asyncio.Event()
+        self._appends = 0
+        self._task: Optional[asyncio.Task[None]] = None
+        if not self.backlog_bytes:
+            self._empty.set()
+        else:
+            try:
+                asyncio.get_running_loop()
+            except RuntimeError:
+                pass  # no loop yet: start() or the first append() replays the backlog
+            else:
+                self.start()
+
+    @property
+    def backlog_bytes(self) -> int:
+        segment, offset = self._cursor
+        total = -offset
+        for index in self._segments():
+            if index >= segment:
+                total += self._segment_path(index).stat().st_size
+        return max(0, total)
+
+    def tally(self, key: Hashable) -> int:
+        """Sum of the ``tally`` amounts for ``key`` over records still waiting for delivery."""
+
+        return self._tallies.get(key, 0)
+
+    def start(self) -> None:
+        if self._task is None and not self._stopping.is_set():
+            self._task = asyncio.get_running_loop().create_task(self._run())
+            self._task.add_done_callback(self._worker_done)
+
+    def _worker_done(self, task: asyncio.Task[None]) -> None:
+        if self._task is task:
+            self._task = None  # the next append() starts a fresh worker
+        if task.cancelled() or task.exception() is None:
+            return
+        logger.error(
+            "outbox worker stopped, %d bytes wait for delivery", self.backlog_bytes, exc_info=task.exception()
+        )
+
+    def append(self, kind: str, items: List[Any]) -> None:
+        """Persist ``items`` for later delivery under ``kind``."""
+
+        if self._writer.closed:
+            raise RuntimeError("outbox is closed")
+        line = json.dumps({"kind": kind, "items": items}, ensure_ascii=False, separators=(",", ":")).encode() + b"\n"
+        if self._writer.tell() and self._writer.tell() + len(line) > self.segment_bytes:
+            self._writer.close()
+            self._segment += 1
+            self._writer = self._segment_path(self._segment).open("ab")
+        self._writer.write(line)
+        self._writer.flush()
+        if self._fsync:
+            os.fsync(self._writer.fileno())
+        self.stats.appended += len(items)
+        self._count(kind, items, 1)
+        self._appends += 1
+        self._empty.clear()
+        self._wakeup.set()
+        self.start()
+
+    async def close(self, timeout: float = 5.0) -> None:
+        """Give the worker ``timeout`` seconds to drain, then stop it.
+
+        Anything not delivered stays on disk and is replayed on the next start.
+        """
+
+        self._wakeup.set()
+        if self._task is not None:
+            try:
+                await asyncio.wait_for(self._drained(), timeout)
+            except asyncio.TimeoutError:
+                logger.warning("outbox still holds %d bytes on shutdown", self.backlog_bytes)
+            self._stopping.set()
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        self._stopping.set()
+        self._writer.close()
+
+    async def _drained(self) -> None:
+        await self._empty.wait()
+
+    async def _run(self) -> None:
+        attempt = 0
+        while not self._stopping.is_set():
+            appends = self._appends
+            kind, items, position = await asyncio.to_thread(self._read_batch)
+            if kind is None:
+                if appends == self._appends:
+                    # nothing was appended while the log was being read
+                    self._wakeup.clear()
+                    self._empty.set()
+                    self._tallies.clear()  # also forgets records lost to corrupt lines
+                    await self._wakeup.wait()
+                continue
+            wait = self.breaker.retry_in()
+            if wait:
+                await self._pause(wait)
+                continue
+            try:
+                await self._deliver(kind, items)
+            except Exception as exc:  # noqa: BLE001 - the outbox must outlive backend errors
+                self.stats.failures += 1
+                if not self._retryable(exc):
+                    logger.error("dropping %d %s records to the dead-letter file: %s", len(items), kind, exc)
+                    await asyncio.to_thread(self._dead_letter, kind, items, exc)
+                    await asyncio.to_thread(self._advance, position)
+                    self._count(kind, items, -1)
+                    continue
+                self.breaker.record_failure()
+                attempt += 1
+                delay = min(self.max_backoff, self.base_backoff * 2 ** (attempt - 1))
+                logger.warning("outbox delivery failed (attempt %d), retrying in %.1fs: %s", attempt, delay, exc)
+                await self._pause(delay * random.uniform(0.5, 1.0))
+                continue
+            attempt = 0
+            self.breaker.record_success()
+            self.stats.batches += 1
+            self.stats.delivered += len(items)
+            await asyncio.to_thread(self._advance, position)
+            self._count(kind, items, -1)
+
+    async def _pause(self, seconds: float) -> None:
+        try:
+            await asyncio.wait_for(self._stopping.wait(), seconds)
+        except asyncio.TimeoutError:
+            pass
+
+    def _read_batch(self) -> Tuple[Optional[str], List[Any], Tuple[int, int]]:
+        """Return the next run of same-kind records and the cursor after it."""
+
+        segment, offset = self._cursor
+        while True:
+            path = self._segment_path(segment)
+            if not path.exists() or offset >= path.stat().st_size:
+                if segment >= self._segment:
+                    return None, [], (segment, offset)
+                segment, offset = segment + 1, 0
+                continue
+            break
+        kind: Optional[str] = None
+        items: List[Any] = []
+        with path.open("rb") as handle:
+            handle.seek(offset)
+            for line in handle:
+                if not line.endswith(b"\n"):
+                    break
+                try:
+                    record = json.loads(line)
+                    record_kind, record_items = record["kind"], record["items"]
+                    if not isinstance(record_items, list):
+                        raise TypeError(f"items is {type(record_items).__name__}, not a list")
+                except (ValueError, KeyError, TypeError) as exc:
+                    if kind is not None:
+                        break  # deliver the records before it first
+                    logger.error("moving a corrupt outbox record in segment %d to the dead-letter file: %s", segment, exc)
+                    offset += len(line)
+                    self.stats.corrupt += 1
+                    self._write_dead_letter({"raw": line.decode("utf-8", "replace").rstrip("\n"), "error": str(exc)})
+                    self._advance((segment, offset))
+                    continue
+                if kind is not None and (record_kind != kind or len(items) + len(record_items) > self.batch_size):
+                    break
+                kind = record_kind
+                items.extend(record_items)
+                offset += len(line)
+        return kind, items, (segment, offset)
+
+    def _count(self, kind: str, items: List[Any], sign: int) -> None:
+        if self._tally is None:
+            return
+        tallies = self._tallies
+        for item in items:
+            try:
+                entry = self._tally(kind, item)
+            except (KeyError, TypeError, ValueError):
+                continue
+            if entry is None:
+                continue
+            key, amount = entry
+            total = tallies.get(key, 0) + sign * amount
+            if total:
+                tallies[key] = total
+            else:
+                tallies.pop(key, None)
+
+    def _tally_backlog(self) -> None:
+        """Count records left by a previous run; unreadable lines are the worker's concern."""
+
+        segment, offset = self._cursor
+        for index in self._segments():
+            if index < segment:
+                continue
+            with self._segment_path(index).open("rb") as handle:
+                handle.seek(offset if index == segment else 0)
+                for line in handle:
+                    try:
+                        record = json.loads(line)
+                        kind, items = record["kind"], record["items"]
+                    except (ValueError, KeyError, TypeError):
+                        continue
+                    if isinstance(items, list):
+                        self._count(kind, items, 1)
+
+    def _advance(self, position: Tuple[int, int]) -> None:
+        segment, offset = position
+        if segment != self._cursor[0]:
+            for index in self._segments():
+                if index < segment:
+                    self._segment_path(index).unlink(missing_ok=True)
+        self._cursor = position
+        tmp = self.directory / (CURSOR_FILE + ".tmp")
+        tmp.write_text(f"{segment} {offset}")
+        os.replace(tmp, self.directory / CURSOR_FILE)
+
+    def _dead_letter(self, kind: str, items: List[Any], error: BaseException) -> None:
+        self.stats.dead_lettered += len(items)
+        self._write_dead_letter({"kind": kind, "items": items, "error": str(error)})
+
+    def _write_dead_letter(self, entry: dict) -> None:
+        entry["at"] = time.time()
+        with (self.directory / DEAD_LETTER_FILE).open("a", encoding="utf-8") as handle:
+            handle.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    def _load_cursor(self) -> Tuple[int, int]:
+        try:
+            segment, offset = (self.directory / CURSOR_FILE).read_text().split()
+        except (FileNotFoundError, ValueError):
+            segments = self._segments()
+            return (segments[0] if segments else 0), 0
+        return int(segment), int(offset)
+
+    def _segments(self) -> List[int]:
+        return sorted(int(path.stem) for path in self.directory.glob(f"*{SEGMENT_SUFFIX}") if path.stem.isdigit())
+
+    def _segment_path(self, index: int) -> Path:
+        return self.directory / f"{index:010d}{SEGMENT_SUFFIX}"
+
+    @staticmethod
+    def _repair_tail(path: Path) -> None:
+        """Drop a partially written last line left behind by a crash."""
+
+        if not path.exists():
+            return
+        data = path.read_bytes()
+        end = data.rfind(b"\n") + 1
+        if end != len(data):
+            with path.open("r+b") as handle:
+                handle.truncate(end)
@@ -0,0 +1,144 @@
+"""Write-behind ledger that coalesces point awards before they hit Supabase."""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+PointsKey = Tuple[int, int]
+
+
+@dataclass(slots=True)
+class PointsDelta:
+    chat_id: int
+    user_id: int
+    delta: int
+
+    def as_dict(self) -> Dict[str, int]:
+        return {"chat_id": self.chat_id, "user_id": self.user_id, "delta": self.delta}
+
+
+PointsSink = Callable[[List[PointsDelta]], Awaitable[None]]
+
+
+@dataclass(slots=True)
+class PointsLedgerStats:
+    awards: int = 0
+    flushed_deltas: int = 0
+    batches: int = 0
+    failed_batches: int = 0
+    last_flush_seconds: float = 0.0
+
+
+class PointsLedger:
+    """Sum point deltas per (chat_id, user_id) in memory and flush them in batches.
+
+    Awards are merged into ``pending`` synchronously; a background task hands
+    the accumulated deltas to ``sink`` every ``flush_interval`` seconds in
+    chunks of at most ``batch_size``. A failed chunk is merged back and retried
+    on the next flush, so every award is delivered at least once.
+    """
+
+    def __init__(
+        self,
+        sink: PointsSink,
+        *,
+        flush_interval: float = 1.0,
+        batch_size: int = 500,
+        close_retries: int = 3,
+    ) -> None:
+        self._sink = sink
+        self.flush_interval = flush_interval
+        self.batch_size = max(1, batch_size)
+        self.close_retries = close_retries
+        self.stats = PointsLedgerStats()
+        self._pending: Dict[PointsKey, int] = {}
+        self._inflight: Dict[PointsKey, int] = {}
+        self._lock = asyncio.Lock()
+        self._task: Optional[asyncio.Task[None]] = None
+        self._stop = asyncio.Event()
+        self._closed = False
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def add(self, chat_id: int, user_id: int, amount: int) -> None:
+        if self._closed:
+            raise RuntimeError("points ledger is closed")
+        key = (chat_id, user_id)
+        self._pending[key] = self._pending.get(key, 0) + amount
+        self.stats.awards += 1
+
+    def pending_delta(self, chat_id: int, user_id: int) -> int:
+        """Points awarded locally that the backend may not have applied yet."""
+
+        key = (chat_id, user_id)
+        return self._pending.get(key, 0) + self._inflight.get(key, 0)
+
+    def pending(self) -> List[PointsDelta]:
+        """Deltas that have not been handed to the sink yet."""
+
+        return [PointsDelta(chat_id, user_id, delta) for (chat_id, user_id), delta in self._pending.items() if delta]
+
+    def start(self) -> None:
+        if self._task is None and not self._closed:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def flush(self) -> bool:
+        """Deliver all pending deltas; return ``False`` if any chunk failed."""
+
+        async with self._lock:
+            batch, self._pending = self._pending, {}
+            self._inflight = batch
+            items = [PointsDelta(chat_id, user_id, delta) for (chat_id, user_id), delta in batch.items() if delta]
+            ok = True
+            for start in range(0, len(items), self.batch_size):
+                chunk = items[start : start + self.batch_size]
+                started = time.perf_counter()
+                try:
+                    await self._sink(chunk)
+                except Exception:  # noqa: BLE001 - deltas are retried on the next flush
+                    ok = False
+                    self.stats.failed_batches += 1
+                    logger.exception("failed to flush %d point deltas", len(chunk))
+                    for item in chunk:
+                        key = (item.chat_id, item.user_id)
+                        self._pending[key] = self._pending.get(key, 0) + item.delta
+                else:
+                    self.stats.batches += 1
+                    self.stats.flushed_deltas += len(chunk)
+                finally:
+                    self.stats.last_flush_seconds = time.perf_counter() - started
+                for item in chunk:
+                    self._inflight.pop((item.chat_id, item.user_id), None)
+            self._inflight = {}
+            return ok
+
+    async def close(self) -> None:
+        """Stop the flush loop and deliver what is left, retrying with backoff."""
+
+        self._closed = True
+        self._stop.set()
+        if self._task is not None:
+            await self._task
+            self._task = None
+        for attempt in range(self.close_retries + 1):
+            if await self.flush():
+                return
+            if attempt < self.close_retries:
+                await asyncio.sleep(min(0.5 * 2**attempt, 5.0))
+        logger.error("dropping %d undelivered point deltas on shutdown", len(self._pending))
+
+    async def _run(self) -> None:
+        while not self._stop.is_set():
+            try:
+                await asyncio.wait_for(self._stop.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            if self._pending and not self._stop.is_set():
+                await self.flush()
@@ -0,0 +1,408 @@
+"""Static analysis of rule regexes: literal prefilters and backtracking risk."""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, FrozenSet, Iterable, List, Optional, Pattern, Sequence, Tuple
+
+try:  # Python 3.11+
+    from re import _constants as sre_constants
+    from re import _parser as sre_parse
+except ImportError:  # pragma: no cover - Python 3.10
+    import sre_constants  # type: ignore[no-redef]
+    import sre_parse  # type: ignore[no-redef]
+
+from .keywords import fold_text
+
+MIN_LITERAL_LENGTH = 2
+COMBINE_CHUNK_SIZE = 32
+
+_LITERAL = sre_constants.LITERAL
+_AT = sre_constants.AT
+_BRANCH = sre_constants.BRANCH
+_SUBPATTERN = sre_constants.SUBPATTERN
+_ASSERTIONS = (sre_constants.ASSERT, sre_constants.ASSERT_NOT)
+_REPEATS = tuple(
+    getattr(sre_constants, name)
+    for name in ("MAX_REPEAT", "MIN_REPEAT", "POSSESSIVE_REPEAT")
+    if hasattr(sre_constants, name)
+)
+_ATOMIC = getattr(sre_constants, "ATOMIC_GROUP", None)
+_GROUPREFS = tuple(
+    getattr(sre_constants, name)
+    for name in ("GROUPREF", "GROUPREF_IGNORE", "GROUPREF_LOC_IGNORE", "GROUPREF_UNI_IGNORE", "GROUPREF_EXISTS")
+    if hasattr(sre_constants, name)
+)
+_POSSESSIVE = getattr(sre_constants, "POSSESSIVE_REPEAT", None)
+_IN = sre_constants.IN
+_RANGE = sre_constants.RANGE
+_CATEGORY = sre_constants.CATEGORY
+_DEFAULT_FLAGS = re.compile("", re.IGNORECASE).flags
+
+# repeats at least this large count as unbounded when looking for backtracking
+LARGE_REPEAT = 100
+MAX_EXPANDED_RANGE = 256
+
+RISK_SAFE = "safe"
+RISK_FLAGGED = "flagged"
+RISK_REJECTED = "rejected"
+
+Literals = FrozenSet[str]
+
+
+def required_literals(pattern: Pattern[str]) -> Optional[Literals]:
+    """Return folded strings of which every match must contain at least one.
+
+    ``None`` means no useful literal could be proven, e.g. for ``\\d+`` or when
+    the shortest candidate is shorter than :data:`MIN_LITERAL_LENGTH`.
+    """
+
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except re.error:  # pragma: no cover - pattern already compiled once
+        return None
+    _, required = _analyze(list(parsed))
+    if not required or min(len(literal) for literal in required) < MIN_LITERAL_LENGTH:
+        return None
+    return required
+
+
+def can_combine(pattern: Pattern[str]) -> bool:
+    """Whether ``pattern`` can be embedded in a larger alternation unchanged."""
+
+    if pattern.flags != _DEFAULT_FLAGS or pattern.groupindex:
+        return False
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except re.error:  # pragma: no cover - pattern already compiled once
+        return False
+    return not _has_group_reference(list(parsed))
+
+
+def combine_patterns(patterns: Sequence[Pattern[str]]) -> Optional[Pattern[str]]:
+    """Compile ``patterns`` into one alternation that matches if any of them does."""
+
+    source = "|".join(f"(?:{pattern.pattern})" for pattern in patterns)
+    try:
+        return re.compile(source, re.IGNORECASE)
+    except re.error:
+        return None
+
+
+def chunk_combinable(indexed: Iterable[Tuple[int, Pattern[str]]]) -> Tuple[List[Tuple[Pattern[str], List[int]]], List[int]]:
+    """Split patterns into combined alternation groups and leftovers.
+
+    Returns ``(groups, plain)`` where each group is the combined pattern and the
+    indices it covers, and ``plain`` lists indices that must run on their own.
+    """
+
+    groups: List[Tuple[Pattern[str], List[int]]] = []
+    plain: List[int] = []
+    pending: List[Tuple[int, Pattern[str]]] = []
+
+    def flush() -> None:
+        if len(pending) > 1:
+            combined = combine_patterns([pattern for _, pattern in pending])
+            if combined is not None:
+                groups.append((combined, [index for index, _ in pending]))
+                pending.clear()
+                return
+        plain.extend(index for index, _ in pending)
+        pending.clear()
+
+    for index, pattern in indexed:
+        if not can_combine(pattern):
+            plain.append(index)
+            continue
+        pending.append((index, pattern))
+        if len(pending) >= COMBINE_CHUNK_SIZE:
+            flush()
+    flush()
+    plain.sort()
+    return groups, plain
+
+
+@dataclass(frozen=True, slots=True)
+class PatternRisk:
+    level: str = RISK_SAFE
+    reason: Optional[str] = None
+
+
+def backtracking_risk(pattern: Pattern[str]) -> PatternRisk:
+    """Estimate whether ``pattern`` can backtrack catastrophically.
+
+    ``rejected`` marks exponential cases: an unbounded repeat whose body can be
+    matched by an inner unbounded repeat alone, like ``(a+)+`` or
+    ``(\\w+\\s?)*``. ``flagged`` marks patterns that are probably fine but can
+    go polynomial or worse on hostile input: other nested quantifiers,
+    overlapping alternatives or a variable-width body under a repeat, adjacent
+    repeats over overlapping characters (``\\d+\\d+``) and backreferences. Possessive repeats never
+    backtrack and are not counted.
+    """
+
+    try:
+        parsed = sre_parse.parse(pattern.pattern, pattern.flags)
+    except re.error:  # pragma: no cover - pattern already compiled once
+        return PatternRisk()
+    findings: List[PatternRisk] = []
+    _assess(list(parsed), findings)
+    for finding in findings:
+        if finding.level == RISK_REJECTED:
+            return finding
+    return findings[0] if findings else PatternRisk()
+
+
+def _assess(items: list, findings: List[PatternRisk]) -> None:
+    previous: Optional[_CharSet] = None
+    previous_open = False
+    for op, av in items:
+        if op in _GROUPREFS:
+            findings.append(PatternRisk(RISK_FLAGGED, "backreference"))
+        if _is_unbounded(op, av):
+            body = list(av[2])
+            if _repeats_only(body):
+                findings.append(PatternRisk(RISK_REJECTED, "nested quantifier over the same text"))
+            elif _has_variable_repeat(body):
+                findings.append(PatternRisk(RISK_FLAGGED, "nested quantifier"))
+            elif _has_overlapping_branch(body):
+                findings.append(PatternRisk(RISK_FLAGGED, "overlapping alternatives under a quantifier"))
+            elif _width_varies(av[2]):
+                findings.append(PatternRisk(RISK_FLAGGED, "variable-width body under a quantifier"))
+            current = _charset(body)
+            if previous_open and _overlaps(previous, current):
+                findings.append(PatternRisk(RISK_FLAGGED, "adjacent quantifiers over overlapping characters"))
+            previous, previous_open = current, True
+        else:
+            # zero-width items keep the neighbouring repeats adjacent
+            previous_open = previous_open and (op is _AT or op in _ASSERTIONS)
+        for child in _children(op, av):
+            _assess(list(child), findings)
+
+
+def _is_unbounded(op, av) -> bool:
+    return op in _REPEATS and av[1] >= LARGE_REPEAT and op is not _POSSESSIVE
+
+
+def _is_variable(op, av) -> bool:
+    """A repeat that can split the same text in several ways, e.g. ``a+`` or ``a{1,5}``."""
+
+    return op in _REPEATS and av[1] > av[0] and av[1] >= 2 and op is not _POSSESSIVE
+
+
+def _width_varies(body) -> bool:
+    low, high = body.getwidth()
+    return low != high
+
+
+def _has_variable_repeat(items: list) -> bool:
+    for op, av in items:
+        if _ATOMIC is not None and op is _ATOMIC:
+            # an atomic group never gives back what it matched
+            continue
+        if _is_variable(op, av) or any(_has_variable_repeat(list(child)) for child in _children(op, av)):
+            return True
+    return False
+
+
+def _repeats_only(items: list) -> bool:
+    """Whether one variable repeat in ``items`` can match all of it on its own."""
+
+    found = False
+    for op, av in items:
+        if _is_variable(op, av):
+            found = True
+        elif op is _BRANCH and any(_repeats_only(list(alternative)) for alternative in av[1]):
+            found = True
+        elif op is _SUBPATTERN and _repeats_only(list(av[-1])):
+            found = True
+        elif _min_width(op, av) > 0:
+            return False
+    return found
+
+
+def _has_overlapping_branch(items: list) -> bool:
+    for op, av in items:
+        if op is _BRANCH:
+            firsts = [_first_charset(list(alternative)) for alternative in av[1] if alternative]
+            for i, left in enumerate(firsts):
+                if any(_overlaps(left, right) for right in firsts[i + 1 :]):
+                    return True
+        if op is _SUBPATTERN or (_ATOMIC is not None and op is _ATOMIC):
+            if _has_overlapping_branch(list(_children(op, av)[0])):
+                return True
+    return False
+
+
+def _min_width(op, av) -> int:
+    if op is _AT or op in _ASSERTIONS or op in _GROUPREFS:
+        return 0
+    if op is _SUBPATTERN or (_ATOMIC is not None and op is _ATOMIC):
+        return sum(_min_width(*item) for item in _children(op, av)[0])
+    if op is _BRANCH:
+        return min(sum(_min_width(*item) for item in alternative) for alternative in av[1])
+    if op in _REPEATS:
+        return av[0] * sum(_min_width(*item) for item in av[2])
+    return 1
+
+
+# Character classes are modelled as (characters, categories); ``None`` stands
+# for anything that is too broad to reason about, e.g. ``.`` or ``[^a]``.
+_CharSet = Optional[Tuple[FrozenSet[str], FrozenSet[str]]]
+
+_CATEGORY_TESTS: Dict[str, Callable[[str], bool]] = {
+    "CATEGORY_DIGIT": str.isdecimal,
+    "CATEGORY_NOT_DIGIT": lambda char: not char.isdecimal(),
+    "CATEGORY_SPACE": str.isspace,
+    "CATEGORY_NOT_SPACE": lambda char: not char.isspace(),
+    "CATEGORY_WORD": lambda char: char.isalnum() or char == "_",
+    "CATEGORY_NOT_WORD": lambda char: not (char.isalnum() or char == "_"),
+}
+_DISJOINT_CATEGORIES = {
+    frozenset(pair)
+    for pair in (
+        ("CATEGORY_DIGIT", "CATEGORY_NOT_DIGIT"),
+        ("CATEGORY_SPACE", "CATEGORY_NOT_SPACE"),
+        ("CATEGORY_WORD", "CATEGORY_NOT_WORD"),
+        ("CATEGORY_DIGIT", "CATEGORY_SPACE"),
+        ("CATEGORY_WORD", "CATEGORY_SPACE"),
+        ("CATEGORY_DIGIT", "CATEGORY_NOT_WORD"),
+    )
+}
+
+
+def _charset(items: list) -> _CharSet:
+    """Characters a single-character body can match, ``None`` if unknown or broad."""
+
+    if len(items) != 1:
+        return None
+    op, av = items[0]
+    if op is _LITERAL:
+        return frozenset({chr(av).casefold()}), frozenset()
+    if op is not _IN:
+        return None
+    chars: set[str] = set()
+    categories: set[str] = set()
+    for member, value in av:
+        if member is _LITERAL:
+            chars.add(chr(value).casefold())
+        elif member is _RANGE and value[1] - value[0] <= MAX_EXPANDED_RANGE:
+            chars.update(chr(code).casefold() for code in range(value[0], value[1] + 1))
+        elif member is _CATEGORY and str(value) in _CATEGORY_TESTS:
+            categories.add(str(value))
+        else:
+            return None
+    return frozenset(chars), frozenset(categories)
+
+
+def _first_charset(items: list) -> _CharSet:
+    op, av = items[0]
+    if op is _SUBPATTERN or (_ATOMIC is not None and op is _ATOMIC):
+        inner = list(_children(op, av)[0])
+        return _first_charset(inner) if inner else None
+    if op in _REPEATS and av[0] >= 1:
+        return _first_charset(list(av[2])) if av[2] else None
+    return _charset([(op, av)])
+
+
+def _overlaps(left: _CharSet, right: _CharSet) -> bool:
+    if left is None or right is None:
+        return True
+    left_chars, left_categories = left
+    right_chars, right_categories = right
+    if left_chars & right_chars:
+        return True
+    if any(frozenset({a, b}) not in _DISJOINT_CATEGORIES for a in left_categories for b in right_categories):
+        return True
+    return any(_CATEGORY_TESTS[category](char) for category in left_categories for char in right_chars) or any(
+        _CATEGORY_TESTS[category](char) for category in right_categories for char in left_chars
+    )
+
+
+def _analyze(items: list) -> Tuple[Optional[str], Optional[Literals]]:
+    """Return ``(exact, required)`` for a parsed sequence.
+
+    ``exact`` is set when the sequence only ever matches that folded string,
+    ``required`` is the best set of alternatives one of which must appear.
+    """
+
+    run: List[str] = []
+    exact_so_far = True
+    best: Optional[Literals] = None
+
+    def consider(candidate: Optional[Literals]) -> None:
+        nonlocal best
+        if candidate and (best is None or _score(candidate) > _score(best)):
+            best = candidate
+
+    for op, av in items:
+        if op is _LITERAL:
+            run.append(chr(av))
+            continue
+        if op is _AT or op in _ASSERTIONS:
+            # zero-width: literals on both sides stay adjacent in the text
+            continue
+        if op is _SUBPATTERN or (_ATOMIC is not None and op is _ATOMIC):
+            inner = av[-1] if op is _SUBPATTERN else av
+            exact, required = _analyze(list(inner))
+            if exact is not None:
+                run.append(exact)
+                continue
+            consider(required)
+        elif op is _BRANCH:
+            consider(_branch_literals(av[1]))
+        elif op in _REPEATS and av[0] >= 1:
+            exact, required = _analyze(list(av[2]))
+            consider(_as_literals(exact) if exact else required)
+        exact_so_far = False
+        consider(_as_literals("".join(run)))
+        run.clear()
+
+    consider(_as_literals("".join(run)))
+    exact = fold_text("".join(run)) if exact_so_far else None
+    return exact, best
+
+
+def _branch_literals(alternatives: list) -> Optional[Literals]:
+    collected: set[str] = set()
+    for alternative in alternatives:
+        exact, required = _analyze(list(alternative))
+        candidate = _as_literals(exact) if exact else required
+        if not candidate:
+            return None
+        collected.update(candidate)
+    return frozenset(collected)
+
+
+def _as_literals(text: Optional[str]) -> Optional[Literals]:
+    if not text:
+        return None
+    return frozenset({fold_text(text)})
+
+
+def _score(literals: Literals) -> Tuple[int, int]:
+    return min(len(literal) for literal in literals), -len(literals)
+
+
+def _has_group_reference(items: list) -> bool:
+    for op, av in items:
+        if op in _GROUPREFS:
+            return True
+        for child in _children(op, av):
+            if _has_group_reference(list(child)):
+                return True
+    return False
+
+
+def _children(op, av) -> List[list]:
+    if op is _SUBPATTERN:
+        return [av[-1]]
+    if op is _BRANCH:
+        return list(av[1])
+    if op in _REPEATS:
+        return [av[2]]
+    if op in _ASSERTIONS:
+        return [av[1]]
+    if _ATOMIC is not None and op is _ATOMIC:
+        return [av]
+    return []
@@ -0,0 +1,196 @@
+"""Chat-wide raid detection for join floods and multi-account bursts."""
+
+from __future__ import annotations
+
+import heapq
+from collections import OrderedDict, deque
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Deque, Dict, List, Tuple
+
+
+@dataclass(slots=True)
+class RaidConfig:
+    enabled: bool = False
+    max_joins: int = 10
+    max_new_senders: int = 5
+    interval_seconds: int = 30
+    new_member_seconds: int = 600
+    lockdown_seconds: int = 300
+    restrict_seconds: int = 3600
+    notice: str | None = None
+
+
+@dataclass(slots=True)
+class RaidAlert:
+    chat_id: int
+    reason: str
+    until: float
+    suspects: List[int]
+    restrict_seconds: int
+    notice: str | None = None
+
+
+@dataclass
+class ChatRaidState:
+    joins: Deque[float] = field(default_factory=deque)
+    new_senders: "OrderedDict[int, float]" = field(default_factory=OrderedDict)
+    recent_members: "OrderedDict[int, float]" = field(default_factory=OrderedDict)
+    lockdown_until: float = 0.0
+    restrict_seconds: int = 0
+    # once passed, every window above is empty and the lockdown is over
+    expires_at: float = 0.0
+
+
+class RaidDetector:
+    """Track join and new-member message rates per chat.
+
+    A chat enters lockdown when more than ``max_joins`` users join within
+    ``interval_seconds``, or when more than ``max_new_senders`` distinct
+    members who joined in the last ``new_member_seconds`` post within
+    ``interval_seconds``. Entering lockdown returns a :class:`RaidAlert` with the
+    recent joiners so the caller can restrict them in bulk. A chat's state is
+    dropped once its windows are empty and any lockdown is over.
+    """
+
+    def __init__(self, *, max_members_per_chat: int = 5_000) -> None:
+        self.max_members_per_chat = max_members_per_chat
+        self._chats: Dict[int, ChatRaidState] = {}
+        self._configs: Dict[int, Tuple[dict, RaidConfig]] = {}
+        # (expires_at, seq, chat_id, state); re-pushed when the state was extended
+        self._expiry: List[Tuple[float, int, int, ChatRaidState]] = []
+        self._seq = count()
+
+    def __len__(self) -> int:
+        return len(self._chats)
+
+    def record_join(self, chat_id: int, user_id: int, config: dict | RaidConfig | None, *, now: float | None = None) -> RaidAlert | None:
+        cfg = self._parse(config)
+        if not cfg.enabled:
+            return None
+        current_ts = now if now is not None else self._now()
+        self._evict_idle(current_ts)
+        state = self._chats.get(chat_id)
+        if state is None:
+            state = self._chats[chat_id] = ChatRaidState()
+            self._extend(chat_id, state, current_ts + max(cfg.interval_seconds, cfg.new_member_seconds))
+        else:
+            self._trim(state, cfg, current_ts)
+            state.expires_at = max(state.expires_at, current_ts + max(cfg.interval_seconds, cfg.new_member_seconds))
+        state.recent_members[user_id] = current_ts
+        state.recent_members.move_to_end(user_id)
+        if len(state.recent_members) > self.max_members_per_chat:
+            state.recent_members.popitem(last=False)
+        state.joins.append(current_ts)
+        if len(state.joins) > cfg.max_joins:
+            return self._lockdown(chat_id, state, cfg, current_ts, reason="joins")
+        return None
+
+    def record_message(self, chat_id: int, user_id: int, config: dict | RaidConfig | None, *, now: float | None = None) -> RaidAlert | None:
+        cfg = self._parse(config)
+        if not cfg.enabled:
+            return None
+        current_ts = now if now is not None else self._now()
+        self._evict_idle(current_ts)
+        state = self._chats.get(chat_id)
+        if state is None or user_id not in state.recent_members:
+            return None
+        self._trim(state, cfg, current_ts)
+        if user_id not in state.recent_members:
+            return None
+        state.expires_at = max(state.expires_at, current_ts + cfg.interval_seconds)
+        state.new_senders[user_id] = current_ts
+        state.new_senders.move_to_end(user_id)
+        if len(state.new_senders) > cfg.max_new_senders:
+            return self._lockdown(chat_id, state, cfg, current_ts, reason="messages")
+        return None
+
+    def in_lockdown(self, chat_id: int, *, now: float | None = None) -> bool:
+        state = self._chats.get(chat_id)
+        if state is None:
+            return False
+        current_ts = now if now is not None else self._now()
+        return state.lockdown_until > current_ts
+
+    def lockdown_restriction(self, chat_id: int, *, now: float | None = None) -> int | None:
+        """Seconds to restrict new joiners for, or ``None`` outside a lockdown."""
+
+        if not self.in_lockdown(chat_id, now=now):
+            return None
+        return self._chats[chat_id].restrict_seconds
+
+    def is_recent_member(self, chat_id: int, user_id: int) -> bool:
+        state = self._chats.get(chat_id)
+        return state is not None and user_id in state.recent_members
+
+    def _lockdown(self, chat_id: int, state: ChatRaidState, cfg: RaidConfig, now: float, *, reason: str) -> RaidAlert | None:
+        already_locked = state.lockdown_until > now
+        state.lockdown_until = now + cfg.lockdown_seconds
+        state.restrict_seconds = cfg.restrict_seconds
+        state.expires_at = max(state.expires_at, state.lockdown_until)
+        suspects = [user_id for user_id, joined in state.recent_members.items() if now - joined <= cfg.interval_seconds]
+        suspects = list(dict.fromkeys([*state.new_senders, *suspects]))
+        state.joins.clear()
+        state.new_senders.clear()
+        if already_locked:
+            return None
+        return RaidAlert(
+            chat_id=chat_id,
+            reason=reason,
+            until=state.lockdown_until,
+            suspects=suspects,
+            restrict_seconds=cfg.restrict_seconds,
+            notice=cfg.notice,
+        )
+
+    def _extend(self, chat_id: int, state: ChatRaidState, expires_at: float) -> None:
+        state.expires_at = expires_at
+        heapq.heappush(self._expiry, (expires_at, next(self._seq), chat_id, state))
+
+    def _evict_idle(self, now: float) -> None:
+        chats, expiry = self._chats, self._expiry
+        while expiry and expiry[0][0] < now:
+            _, _, chat_id, state = heapq.heappop(expiry)
+            if chats.get(chat_id) is not state:
+                continue
+            if state.expires_at >= now:
+                heapq.heappush(expiry, (state.expires_at, next(self._seq), chat_id, state))
+                continue
+            del chats[chat_id]
+
+    @staticmethod
+    def _trim(state: ChatRaidState, cfg: RaidConfig, now: float) -> None:
+        while state.joins and now - state.joins[0] > cfg.interval_seconds:
+            state.joins.popleft()
+        for bucket, horizon in (
+            (state.new_senders, cfg.interval_seconds),
+            (state.recent_members, cfg.new_member_seconds),
+        ):
+            while bucket:
+                user_id, seen = next(iter(bucket.items()))
+                if now - seen <= horizon:
+                    break
+                del bucket[user_id]
+
+    def _parse(self, config: dict | RaidConfig | None) -> RaidConfig:
+        if isinstance(config, RaidConfig):
+            return config
+        if not config:
+            return _DISABLED
+        cached = self._configs.get(id(config))
+        if cached is not None and cached[0] is config:
+            return cached[1]
+        parsed = RaidConfig(**config)
+        if len(self._configs) >= 1024:
+            self._configs.clear()
+        self._configs[id(config)] = (config, parsed)
+        return parsed
+
+    @staticmethod
+    def _now() -> float:
+        from time import monotonic
+
+        return monotonic()
+
+
+_DISABLED = RaidConfig()
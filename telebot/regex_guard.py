@@ -0,0 +1,243 @@
+"""Run risky rule regexes in worker processes under a time budget.
+
+Python's ``re`` holds the GIL while it backtracks, so a pathological pattern
+from one group's config would freeze the event loop for every group. Rules
+flagged by :func:`telebot.prefilter.backtracking_risk` (or marked
+``"guarded": true`` in the config) are instead searched in a small pool of
+worker processes; a search that exceeds its budget kills the worker, counts as
+no match and is charged to the rule. Patterns that keep timing out are
+suspended for a while so they stop occupying workers.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import multiprocessing
+import re
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from multiprocessing.connection import Connection
+from typing import Any, Dict, List, Pattern, Set, Tuple
+
+from .deadline import remaining, within
+from .metrics import MAX_SERIES, OVERFLOW_LABEL
+
+logger = logging.getLogger(__name__)
+
+MAX_CACHED_PATTERNS = 256
+MAX_TRACKED_PATTERNS = 4096
+
+
+@dataclass(slots=True)
+class RuleCost:
+    calls: int = 0
+    seconds: float = 0.0
+    timeouts: int = 0
+    skipped: int = 0
+
+
+@dataclass(slots=True)
+class _Strikes:
+    count: int = 0
+    suspended_until: float = 0.0
+
+
+def _serve(conn: Connection) -> None:
+    """Worker loop: answer ``(pattern, flags, text)`` requests with a match flag."""
+
+    patterns: Dict[Tuple[str, int], Pattern[str]] = {}
+    conn.send(True)
+    while True:
+        try:
+            source, flags, text = conn.recv()
+        except (EOFError, OSError):
+            return
+        pattern = patterns.get((source, flags))
+        if pattern is None:
+            if len(patterns) >= MAX_CACHED_PATTERNS:
+                patterns.clear()
+            pattern = patterns[(source, flags)] = re.compile(source, flags)
+        conn.send(pattern.search(text) is not None)
+
+
+class _Worker:
+    __slots__ = ("process", "conn", "ready")
+
+    def __init__(self, context: Any) -> None:
+        self.conn, child = context.Pipe()
+        self.process = context.Process(target=_serve, args=(child,), name="telebot-regex", daemon=True)
+        self.process.start()
+        child.close()
+        self.ready = False
+
+    def kill(self) -> None:
+        self.process.kill()
+        self.process.join(1.0)
+        self.conn.close()
+
+
+class RegexGuard:
+    """Pool of ``workers`` processes searching patterns with a ``timeout`` per search.
+
+    Workers are started on first use. One that timed out is killed and
+    replaced from a thread while its slot stays unavailable, so a timeout
+    never makes the event loop wait for a process to exit or start. Waiting
+    for a free worker is bounded by the current message deadline (see
+    :mod:`telebot.deadline`), the search itself by ``timeout`` or the
+    remaining deadline, whichever is shorter.
+    After ``max_strikes`` timeouts in a row a pattern is skipped for
+    ``suspend_seconds``. :attr:`costs` holds the accounting per rule name
+    (its config position, e.g. ``punishments[3]``); past ``max_rules`` names
+    further ones are charged to ``"other"``.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int = 2,
+        timeout: float = 0.05,
+        max_strikes: int = 3,
+        suspend_seconds: float = 300.0,
+        start_method: str = "spawn",
+        max_rules: int = MAX_SERIES,
+    ) -> None:
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.max_strikes = max(1, max_strikes)
+        self.suspend_seconds = suspend_seconds
+        self.max_rules = max_rules
+        self.costs: Dict[str, RuleCost] = {}
+        # keyed by pattern, not by name: the same position holds different patterns in each chat
+        self._strikes: "OrderedDict[Tuple[str, int], _Strikes]" = OrderedDict()
+        self._context = multiprocessing.get_context(start_method)
+        self._idle: asyncio.Queue[_Worker] = asyncio.Queue()
+        self._all: List[_Worker] = []
+        self._replacing: Set[asyncio.Task[None]] = set()
+        self._closed = False
+
+    async def search(self, name: str, pattern: Pattern[str], text: str) -> bool:
+        """Whether ``pattern`` matches ``text``; ``False`` when the search was cut off."""
+
+        cost = self._cost(name)
+        strikes = self._strikes_of(pattern)
+        if strikes.suspended_until > self._now():
+            cost.skipped += 1
+            return False
+        worker = await within(self._acquire())
+        budget = self.timeout
+        left = remaining()
+        if left is not None:
+            budget = min(budget, left)
+        started = time.perf_counter()
+        try:
+            worker.conn.send((pattern.pattern, pattern.flags, text))
+            answered = await self._readable(worker.conn, budget)
+        except BaseException:
+            self._discard(worker)
+            raise
+        cost.calls += 1
+        cost.seconds += time.perf_counter() - started
+        if not answered:
+            self._discard(worker)
+            cost.timeouts += 1
+            strikes.count += 1
+            if strikes.count >= self.max_strikes:
+                strikes.suspended_until = self._now() + self.suspend_seconds
+                logger.warning("regex rule %s timed out %d times in a row, suspended for %ss", name, strikes.count, self.suspend_seconds)
+            return False
+        strikes.count = 0
+        matched = worker.conn.recv()
+        self._idle.put_nowait(worker)
+        return matched
+
+    def _cost(self, name: str) -> RuleCost:
+        cost = self.costs.get(name)
+        if cost is None:
+            if len(self.costs) >= self.max_rules:
+                name = OVERFLOW_LABEL
+            cost = self.costs.setdefault(name, RuleCost())
+        return cost
+
+    def _strikes_of(self, pattern: Pattern[str]) -> _Strikes:
+        key = (pattern.pattern, pattern.flags)
+        strikes = self._strikes.get(key)
+        if strikes is None:
+            strikes = self._strikes[key] = _Strikes()
+            if len(self._strikes) > MAX_TRACKED_PATTERNS:
+                self._strikes.popitem(last=False)
+        else:
+            self._strikes.move_to_end(key)
+        return strikes
+
+    async def close(self) -> None:
+        self._closed = True
+        if self._replacing:
+            await asyncio.gather(*self._replacing, return_exceptions=True)
+        for worker in self._all:
+            worker.kill()
+        self._all.clear()
+        self._idle = asyncio.Queue()
+        self._closed = False
+
+    async def _acquire(self) -> _Worker:
+        if self._idle.empty() and len(self._all) + len(self._replacing) < self.workers:
+            worker = _Worker(self._context)
+            self._all.append(worker)
+        else:
+            worker = await self._idle.get()
+        if not worker.ready:
+            # the startup handshake is not part of any search budget
+            try:
+                await self._readable(worker.conn, None)
+                worker.conn.recv()
+            except BaseException:
+                self._discard(worker)
+                raise
+            worker.ready = True
+        return worker
+
+    def _discard(self, worker: _Worker) -> None:
+        """Kill ``worker`` and put a fresh one in its place, waking anyone waiting for a worker."""
+
+        if worker not in self._all:
+            worker.kill()
+            return
+        self._all.remove(worker)
+        task = asyncio.get_running_loop().create_task(self._replace(worker))
+        self._replacing.add(task)
+        task.add_done_callback(self._replacing.discard)
+
+    async def _replace(self, worker: _Worker) -> None:
+        try:
+            await asyncio.to_thread(worker.kill)
+            if self._closed:
+                return
+            replacement = await asyncio.to_thread(_Worker, self._context)
+        except Exception:  # noqa: BLE001 - the slot is started again on the next acquire
+            logger.exception("failed to replace a regex worker")
+            return
+        if self._closed:
+            await asyncio.to_thread(replacement.kill)
+            return
+        self._all.append(replacement)
+        self._idle.put_nowait(replacement)
+
+    @staticmethod
+    async def _readable(conn: Connection, timeout: float | None) -> bool:
+        loop = asyncio.get_running_loop()
+        ready = loop.create_future()
+        fd = conn.fileno()
+        loop.add_reader(fd, lambda: ready.done() or ready.set_result(None))
+        try:
+            await asyncio.wait_for(ready, timeout)
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            loop.remove_reader(fd)
+        return True
+
+    @staticmethod
+    def _now() -> float:
+        return time.monotonic()
@@ -0,0 +1,244 @@
+"""Replay a message archive against a candidate group config.
+
+    telebot-replay config.json messages.jsonl
+    telebot-replay config.json export.csv --workers 8 --samples 3 --json report.json
+
+Messages are streamed one by one, so memory stays flat for arbitrarily large
+exports. Each record needs ``text`` and may carry ``chat_id``, ``user_id`` and
+``date`` (epoch seconds or ISO 8601); CSV files use the same column names.
+Flood control runs in the main process in archive order; rule matching can be
+spread across a process pool with ``--workers``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import sys
+import time
+from collections import Counter, deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Deque, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
+
+from .flood import FloodProtector
+from .rules import ActionType, RuleEngine
+from .supabase import GroupConfigSnapshot, compile_group_config
+
+DEFAULT_CHUNK_SIZE = 2_000
+
+
+@dataclass(slots=True)
+class ReplayMessage:
+    chat_id: int
+    user_id: int
+    text: str
+    timestamp: Optional[float] = None
+
+
+@dataclass
+class ReplayReport:
+    messages: int = 0
+    matched: int = 0
+    deleted: int = 0
+    muted: int = 0
+    replied: int = 0
+    points_awarded: int = 0
+    flood_mutes: int = 0
+    rule_hits: Counter = field(default_factory=Counter)
+    samples: Dict[str, List[str]] = field(default_factory=dict)
+    elapsed_seconds: float = 0.0
+    match_seconds: float = 0.0
+
+    @property
+    def messages_per_second(self) -> float:
+        return self.messages / self.elapsed_seconds if self.elapsed_seconds else 0.0
+
+    def as_dict(self) -> Dict[str, Any]:
+        data = asdict(self)
+        data["rule_hits"] = dict(self.rule_hits.most_common())
+        data["messages_per_second"] = self.messages_per_second
+        return data
+
+
+def read_messages(path: Path, fmt: str | None = None) -> Iterator[ReplayMessage]:
+    """Yield messages from a JSONL or CSV export without loading it into memory."""
+
+    fmt = fmt or ("csv" if path.suffix.lower() == ".csv" else "jsonl")
+    with path.open(encoding="utf-8", newline="") as handle:
+        records: Iterable[Mapping[str, Any]]
+        if fmt == "csv":
+            csv.field_size_limit(sys.maxsize)
+            records = csv.DictReader(handle)
+        else:
+            records = (json.loads(line) for line in handle if line.strip())
+        for record in records:
+            text = record.get("text") or record.get("raw_text") or ""
+            if not text:
+                continue
+            yield ReplayMessage(
+                chat_id=int(record.get("chat_id") or 0),
+                user_id=int(record.get("user_id") or record.get("sender_id") or 0),
+                text=text,
+                timestamp=_parse_timestamp(record.get("date")),
+            )
+
+
+def _parse_timestamp(value: Any) -> Optional[float]:
+    if value in (None, ""):
+        return None
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+
+
+def _chunks(messages: Iterable[ReplayMessage], size: int) -> Iterator[List[ReplayMessage]]:
+    chunk: List[ReplayMessage] = []
+    for message in messages:
+        chunk.append(message)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+_worker_engine: Optional[RuleEngine] = None
+
+
+def _init_worker(config: Dict[str, Any]) -> None:
+    global _worker_engine
+    _worker_engine = compile_group_config(config).engine
+
+
+def _match_texts(texts: List[str]) -> Tuple[List[List[int]], float]:
+    """Worker entry point: rule indices matched by each text, plus time spent."""
+
+    assert _worker_engine is not None
+    return _match_with(_worker_engine, texts)
+
+
+def _match_with(engine: RuleEngine, texts: List[str]) -> Tuple[List[List[int]], float]:
+    positions = {id(rule): index for index, rule in enumerate(engine.rules)}
+    started = time.perf_counter()
+    results = [[positions[id(match.rule)] for match in engine.match(text)] for text in texts]
+    return results, time.perf_counter() - started
+
+
+class Replayer:
+    """Evaluate messages the way ``TelebotApplication.handle_message`` would, without side effects."""
+
+    def __init__(self, config: Mapping[str, Any], *, samples: int = 3) -> None:
+        self.config = dict(config)
+        self.snapshot: GroupConfigSnapshot = compile_group_config(self.config)
+        self.samples = samples
+        self.flood = FloodProtector()
+        self.report = ReplayReport()
+
+    def run(self, messages: Iterable[ReplayMessage], *, workers: int = 1, chunk_size: int = DEFAULT_CHUNK_SIZE) -> ReplayReport:
+        started = time.perf_counter()
+        chunks = (self._after_flood(chunk) for chunk in _chunks(messages, chunk_size))
+        if workers <= 1:
+            for chunk in chunks:
+                self._collect(chunk, *_match_with(self.snapshot.engine, [message.text for message in chunk]))
+        else:
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(self.config,)) as pool:
+                pending: Deque[Tuple[List[ReplayMessage], Future]] = deque()
+                for chunk in chunks:
+                    pending.append((chunk, pool.submit(_match_texts, [message.text for message in chunk])))
+                    # keep a bounded number of chunks in flight so memory stays flat
+                    while len(pending) >= workers * 2:
+                        done, future = pending.popleft()
+                        self._collect(done, *future.result())
+                while pending:
+                    done, future = pending.popleft()
+                    self._collect(done, *future.result())
+        self.report.elapsed_seconds = time.perf_counter() - started
+        return self.report
+
+    def _after_flood(self, chunk: List[ReplayMessage]) -> List[ReplayMessage]:
+        """Count messages and drop the ones flood control would mute before rules run."""
+
+        self.report.messages += len(chunk)
+        flood = self.snapshot.flood
+        if not flood.enabled:
+            return chunk
+        kept = []
+        for message in chunk:
+            if message.timestamp is not None and self.flood.check(message.chat_id, message.user_id, flood, now=message.timestamp):
+                self.report.flood_mutes += 1
+                continue
+            kept.append(message)
+        return kept
+
+    def _collect(self, chunk: List[ReplayMessage], results: List[List[int]], match_seconds: float) -> None:
+        report = self.report
+        report.match_seconds += match_seconds
+        rules = self.snapshot.engine.rules
+        for message, indices in zip(chunk, results):
+            if not indices:
+                continue
+            report.matched += 1
+            deleted = False
+            for index in indices:
+                rule = rules[index]
+                report.rule_hits[rule.name] += 1
+                bucket = report.samples.setdefault(rule.name, [])
+                if len(bucket) < self.samples:
+                    bucket.append(message.text)
+                deleted = deleted or rule.delete_original or rule.action.type is ActionType.DELETE
+                if rule.action.type is ActionType.MUTE:
+                    report.muted += 1
+                elif rule.action.type is ActionType.REPLY:
+                    report.replied += 1
+                elif rule.action.type is ActionType.ADD_POINTS:
+                    report.points_awarded += rule.action.points or 1
+            report.deleted += deleted
+
+
+def format_report(report: ReplayReport) -> str:
+    lines = [
+        f"messages        {report.messages}",
+        f"matched         {report.matched}",
+        f"deleted         {report.deleted}",
+        f"muted           {report.muted} (+{report.flood_mutes} by flood control)",
+        f"replied         {report.replied}",
+        f"points awarded  {report.points_awarded}",
+        f"throughput      {report.messages_per_second:,.0f} msgs/s "
+        f"({report.elapsed_seconds:.2f}s total, {report.match_seconds:.2f}s matching)",
+        "",
+        "hits  rule",
+    ]
+    for name, hits in report.rule_hits.most_common():
+        lines.append(f"{hits:>5}  {name}")
+        for sample in report.samples.get(name, []):
+            lines.append(f"       · {sample[:80]!r}")
+    return "\n".join(lines)
+
+
+def main(argv: List[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(prog="telebot-replay", description="Replay a message archive against a group config.")
+    parser.add_argument("config", type=Path, help="group_configs payload as a JSON file")
+    parser.add_argument("messages", type=Path, help="message export (.jsonl or .csv)")
+    parser.add_argument("--format", choices=("jsonl", "csv"), help="override format detection by file suffix")
+    parser.add_argument("--workers", type=int, default=1, help="processes used for rule matching")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--samples", type=int, default=3, help="sample messages kept per rule")
+    parser.add_argument("--json", type=Path, help="also write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    config = json.loads(args.config.read_text(encoding="utf-8"))
+    replayer = Replayer(config, samples=args.samples)
+    report = replayer.run(read_messages(args.messages, args.format), workers=args.workers, chunk_size=args.chunk_size)
+    print(format_report(report))
+    if args.json:
+        args.json.write_text(json.dumps(report.as_dict(), ensure_ascii=False, indent=2), encoding="utf-8")
+    return 0
+
+
+if __name__ == "__main__":  # pragma: no cover - CLI helper
+    raise SystemExit(main())
@@ -2,10 +2,25 @@
 
 from __future__ import annotations
 
+import asyncio
+import logging
 import re
 from dataclasses import dataclass
 from enum import Enum
-from typing import Any, Iterable, List, Pattern
+from typing import TYPE_CHECKING, Any, Callable, Iterable, List, Mapping, Optional, Pattern, Set, Tuple
+
+from .keywords import KeywordAutomaton, fold_text
+from .normalize import NORMALIZERS, NormalizedText, validate_view
+from .prefilter import RISK_FLAGGED, RISK_REJECTED, Literals, backtracking_risk, chunk_combinable, required_literals
+
+if TYPE_CHECKING:
+    from .regex_guard import RegexGuard
+
+logger = logging.getLogger(__name__)
+
+
+class RiskyPatternError(ValueError):
+    """A rule regex likely to backtrack catastrophically; rejected like any malformed rule."""
 
 
 class ActionType(str, Enum):
@@ -29,6 +44,11 @@ class Rule:
     trigger: Pattern[str]
     action: Action
     delete_original: bool = False
+    keyword: str | None = None
+    match_on: str = "raw"
+    guarded: bool = False
+    # position in the group config, e.g. ``point_rules[0]``; a bounded metrics label
+    source: str = ""
 
     def matches(self, text: str) -> bool:
         return bool(self.trigger.search(text))
@@ -40,69 +60,236 @@ class RuleMatch:
     action: Action
 
 
+class _ViewMatcher:
+    """Match the rules of one ``match_on`` view against that view of a message.
+
+    Rules are split by how cheaply they can be ruled out:
+
+    * literal keyword rules and the required literals of regex rules are looked
+      up in one :class:`KeywordAutomaton` pass (or plain substring checks for
+      small configs), and a regex only runs when one of its literals occurs;
+    * regex rules without usable literals are merged into combined alternation
+      patterns, so one search can skip a whole chunk of rules.
+    """
+
+    def __init__(self, rules: List[Rule], indices: List[int], automaton_threshold: int) -> None:
+        self.rules = rules
+        literal_entries: List[Tuple[str, int]] = []
+        self._literals: List[Tuple[int, Literals]] = []
+        self._keyword_indices: List[int] = []
+        unfiltered: List[Tuple[int, Pattern[str]]] = []
+        for index in indices:
+            rule = rules[index]
+            if rule.keyword is not None:
+                self._keyword_indices.append(index)
+                literal_entries.append((rule.keyword, index))
+                continue
+            literals = required_literals(rule.trigger)
+            if literals is None:
+                unfiltered.append((index, rule.trigger))
+                continue
+            self._literals.append((index, literals))
+            literal_entries.extend((literal, index) for literal in literals)
+
+        self._keywords: KeywordAutomaton[int] | None = None
+        if len(literal_entries) >= automaton_threshold:
+            self._keywords = KeywordAutomaton(literal_entries)
+        self._combined, self._regex_indices = chunk_combinable(unfiltered)
+
+    def match(self, text: str, matched: Set[int]) -> None:
+        rules = self.rules
+        if self._keywords is not None:
+            for index in self._keywords.search(text):
+                if rules[index].keyword is not None or rules[index].matches(text):
+                    matched.add(index)
+        else:
+            for index in self._keyword_indices:
+                if rules[index].matches(text):
+                    matched.add(index)
+            if self._literals:
+                folded = fold_text(text)
+                for index, literals in self._literals:
+                    if any(literal in folded for literal in literals) and rules[index].matches(text):
+                        matched.add(index)
+        for index in self._regex_indices:
+            if rules[index].matches(text):
+                matched.add(index)
+        for combined, indices in self._combined:
+            if combined.search(text):
+                matched.update(index for index in indices if rules[index].matches(text))
+
+
 class RuleEngine:
-    """Evaluate incoming text against configured rules."""
+    """Evaluate incoming text against configured rules.
+
+    Each rule matches one view of the message (``Rule.match_on``, see
+    :mod:`telebot.normalize`); rules sharing a view are evaluated together by a
+    :class:`_ViewMatcher`, and every view is computed at most once per message.
+    Matches are always identical to running every rule on its view and keep
+    rule order.
+
+    Guarded rules (``Rule.guarded``) are kept out of the matchers and combined
+    groups. :meth:`match` still runs them inline, which is fine offline;
+    :meth:`amatch` hands them to a :class:`~telebot.regex_guard.RegexGuard`.
+    ``rejected`` lists ``(rule name, reason)`` for config rules that were
+    dropped because they are malformed or likely to backtrack catastrophically.
+    """
+
+    automaton_threshold = 32
 
-    def __init__(self, rules: Iterable[Rule]) -> None:
+    def __init__(self, rules: Iterable[Rule], *, rejected: Iterable[Tuple[str, str]] = ()) -> None:
         self.rules: List[Rule] = list(rules)
+        self.rejected: List[Tuple[str, str]] = list(rejected)
+        by_view: dict[str, List[int]] = {}
+        self.guarded: List[Tuple[int, Optional[Literals]]] = []
+        for index, rule in enumerate(self.rules):
+            if rule.guarded:
+                self.guarded.append((index, required_literals(rule.trigger)))
+            else:
+                by_view.setdefault(rule.match_on, []).append(index)
+        self._matchers = [
+            (view, _ViewMatcher(self.rules, indices, self.automaton_threshold)) for view, indices in by_view.items()
+        ]
+        views = {rule.match_on for rule in self.rules}
+        self._raw_only = views <= {"raw"}
 
-    def match(self, text: str) -> List[RuleMatch]:
-        matches: List[RuleMatch] = []
-        for rule in self.rules:
-            if rule.matches(text):
-                matches.append(RuleMatch(rule=rule, action=rule.action))
-        return matches
+    def match(self, text: str | NormalizedText) -> List[RuleMatch]:
+        matched, normalized = self._match_unguarded(text)
+        for index, literals in self.guarded:
+            rule = self.rules[index]
+            view = normalized.view(rule.match_on)
+            if self._may_match(view, literals) and rule.matches(view):
+                matched.add(index)
+        return self._results(matched)
+
+    async def amatch(self, text: str | NormalizedText, guard: "RegexGuard") -> List[RuleMatch]:
+        """Like :meth:`match`, but guarded rules are searched through ``guard``."""
+
+        matched, normalized = self._match_unguarded(text)
+        pending = []
+        for index, literals in self.guarded:
+            rule = self.rules[index]
+            view = normalized.view(rule.match_on)
+            if self._may_match(view, literals):
+                pending.append((index, guard.search(rule.source or rule.name, rule.trigger, view)))
+        if pending:
+            results = await asyncio.gather(*(search for _, search in pending))
+            matched.update(index for (index, _), hit in zip(pending, results) if hit)
+        return self._results(matched)
+
+    def _match_unguarded(self, text: str | NormalizedText) -> Tuple[Set[int], NormalizedText]:
+        matched: Set[int] = set()
+        if self._raw_only:
+            raw = text.raw if isinstance(text, NormalizedText) else text
+            for _, matcher in self._matchers:
+                matcher.match(raw, matched)
+            return matched, text if isinstance(text, NormalizedText) else NormalizedText(raw)
+        normalized = text if isinstance(text, NormalizedText) else NormalizedText(text)
+        for view, matcher in self._matchers:
+            matcher.match(normalized.view(view), matched)
+        return matched, normalized
+
+    @staticmethod
+    def _may_match(text: str, literals: Optional[Literals]) -> bool:
+        if literals is None:
+            return True
+        folded = fold_text(text)
+        return any(literal in folded for literal in literals)
+
+    def _results(self, matched: Set[int]) -> List[RuleMatch]:
+        rules = self.rules
+        return [RuleMatch(rule=rules[index], action=rules[index].action) for index in sorted(matched)]
 
     @classmethod
     def from_config(cls, config: dict[str, Any]) -> "RuleEngine":
+        """Compile every rule of ``config``; a malformed rule is rejected on its own."""
+
         rules: List[Rule] = []
+        rejected: List[Tuple[str, str]] = []
+
+        def add(section: str, index: int, build: Callable[[], Rule]) -> None:
+            try:
+                rule = build()
+            except Exception as exc:  # noqa: BLE001 - one bad rule must not disable the others
+                logger.warning("rejecting invalid rule %s[%d]: %s", section, index, exc)
+                rejected.append((f"{section}[{index}]", str(exc)))
+                return
+            rule.source = f"{section}[{index}]"
+            rules.append(rule)
 
-        for keyword in config.get("banned_keywords", []):
-            pattern = re.compile(re.escape(keyword), re.IGNORECASE)
-            rules.append(
-                Rule(
-                    name=f"ban:{keyword}",
-                    trigger=pattern,
-                    action=Action(type=ActionType.DELETE),
-                    delete_original=True,
-                )
+        def banned(entry: Any) -> Rule:
+            keyword, match_on = (entry, "raw") if isinstance(entry, str) else (entry["keyword"], entry.get("match_on", "raw"))
+            return _keyword_rule(
+                keyword,
+                match_on,
+                name=f"ban:{keyword}",
+                action=Action(type=ActionType.DELETE),
+                delete_original=True,
             )
 
-        for reply in config.get("auto_replies", []):
-            trigger = re.compile(re.escape(reply["keyword"]), re.IGNORECASE)
-            rules.append(
-                Rule(
-                    name=f"reply:{reply['keyword']}",
-                    trigger=trigger,
-                    action=Action(type=ActionType.REPLY, message=reply["reply"]),
-                    delete_original=reply.get("delete_original", False),
-                )
+        def reply(entry: Mapping[str, Any]) -> Rule:
+            return _keyword_rule(
+                entry["keyword"],
+                entry.get("match_on", "raw"),
+                name=f"reply:{entry['keyword']}",
+                action=Action(type=ActionType.REPLY, message=entry["reply"]),
+                delete_original=entry.get("delete_original", False),
             )
 
-        for punish in config.get("punishments", []):
-            trigger = re.compile(punish["regex"], re.IGNORECASE)
-            rules.append(
-                Rule(
-                    name=f"punish:{punish['regex']}",
-                    trigger=trigger,
-                    action=Action(
-                        type=ActionType.MUTE,
-                        duration=punish.get("mute_seconds", 60),
-                        message=punish.get("notice"),
-                    ),
-                    delete_original=punish.get("delete_original", True),
-                )
+        def punish(entry: Mapping[str, Any]) -> Rule:
+            return _regex_rule(
+                entry,
+                name=f"punish:{entry['regex']}",
+                action=Action(
+                    type=ActionType.MUTE,
+                    duration=entry.get("mute_seconds", 60),
+                    message=entry.get("notice"),
+                ),
+                delete_original=entry.get("delete_original", True),
             )
 
-        for point_rule in config.get("point_rules", []):
-            trigger = re.compile(point_rule["regex"], re.IGNORECASE)
-            rules.append(
-                Rule(
-                    name=f"points:{point_rule['regex']}",
-                    trigger=trigger,
-                    action=Action(type=ActionType.ADD_POINTS, points=point_rule.get("points", 1)),
-                    delete_original=False,
-                )
+        def points(entry: Mapping[str, Any]) -> Rule:
+            return _regex_rule(
+                entry,
+                name=f"points:{entry['regex']}",
+                action=Action(type=ActionType.ADD_POINTS, points=entry.get("points", 1)),
+                delete_original=False,
             )
 
-        return cls(rules)
+        builders = (("banned_keywords", banned), ("auto_replies", reply), ("punishments", punish), ("point_rules", points))
+        for section, build in builders:
+            for index, entry in enumerate(config.get(section) or []):
+                add(section, index, lambda: build(entry))
+
+        return cls(rules, rejected=rejected)
+
+
+def _regex_rule(entry: Mapping[str, Any], *, name: str, action: Action, delete_original: bool) -> Rule:
+    """Regex rule from config; patterns likely to backtrack catastrophically are rejected or guarded."""
+
+    trigger = re.compile(entry["regex"], re.IGNORECASE)
+    risk = backtracking_risk(trigger)
+    if risk.level == RISK_REJECTED:
+        raise RiskyPatternError(risk.reason or "catastrophic backtracking")
+    return Rule(
+        name=name,
+        trigger=trigger,
+        action=action,
+        delete_original=delete_original,
+        match_on=validate_view(entry.get("match_on", "raw")),
+        guarded=bool(entry.get("guarded", False)) or risk.level == RISK_FLAGGED,
+    )
+
+
+def _keyword_rule(keyword: str, match_on: str, *, name: str, action: Action, delete_original: bool) -> Rule:
+    """Literal rule; the keyword gets the same normalization as its view of the text."""
+
+    literal = NORMALIZERS[validate_view(match_on)](keyword)
+    return Rule(
+        name=name,
+        trigger=re.compile(re.escape(literal), re.IGNORECASE),
+        action=action,
+        delete_original=delete_original,
+        keyword=literal,
+        match_on=match_on,
+    )
@@ -0,0 +1,371 @@
+"""Rate-limited, priority-ordered execution of outbound Telegram calls."""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from enum import IntEnum
+from typing import Any, Awaitable, Callable, Deque, Dict, List, Optional, Tuple
+
+from telethon.errors.rpcerrorlist import FloodWaitError
+
+logger = logging.getLogger(__name__)
+
+ActionFactory = Callable[[], Awaitable[Any]]
+
+# bucket delays below this are float noise from the refill arithmetic
+_EPSILON = 1e-6
+
+
+class OutboundShed(RuntimeError):
+    """A job that was shed, or dropped on shutdown, before it ran."""
+
+
+class Priority(IntEnum):
+    MODERATION = 0
+    COSMETIC = 1
+
+
+class TokenBucket:
+    """Classic token bucket; :meth:`delay` tells how long until a token is free."""
+
+    __slots__ = ("rate", "capacity", "tokens", "updated")
+
+    def __init__(self, rate: float, capacity: float, now: float) -> None:
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.tokens = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self, now: float) -> float:
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate if self.rate > 0 else float("inf")
+
+    def take(self, now: float) -> None:
+        self._refill(now)
+        self.tokens -= 1
+
+
+@dataclass(order=True)
+class OutboundJob:
+    priority: int
+    seq: int
+    chat_id: int = field(compare=False)
+    factory: ActionFactory = field(compare=False)
+    future: "asyncio.Future[Any]" = field(compare=False)
+    attempts: int = field(default=0, compare=False)
+    queued: bool = field(default=True, compare=False)
+
+
+LaneKey = Tuple[int, int]
+
+
+class _Lane:
+    """FIFO of one chat's jobs at one priority, metered by that chat's bucket."""
+
+    __slots__ = ("key", "bucket", "jobs", "scheduled")
+
+    def __init__(self, key: LaneKey, bucket: TokenBucket) -> None:
+        self.key = key
+        self.bucket = bucket
+        self.jobs: Deque[OutboundJob] = deque()
+        self.scheduled = False
+
+
+@dataclass(slots=True)
+class SchedulerStats:
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    shed: int = 0
+    flood_waits: int = 0
+    flood_wait_seconds: float = 0.0
+
+
+class OutboundScheduler:
+    """Run Telegram API calls under global and per-chat token buckets.
+
+    Jobs are ordered by :class:`Priority` (moderation before cosmetic
+    replies) and then by submission order. A ``FloodWaitError`` pauses the
+    whole scheduler for the requested seconds and re-queues the job.
+
+    Each (chat, priority) pair is a FIFO lane with its own bucket. Lanes whose
+    head may run now sit in a heap ordered by (priority, submission order),
+    the others in a heap keyed by the time their bucket frees a token, so a
+    dispatch costs O(log lanes). Idle lanes are dropped once their bucket has
+    refilled, which is indistinguishable from a fresh one.
+
+    Load shedding: once ``max_pending`` jobs are queued, new cosmetic jobs are
+    dropped, and a new moderation job evicts the newest queued cosmetic job
+    (moderation itself is never shed). Shed jobs resolve to ``None``.
+    """
+
+    def __init__(
+        self,
+        *,
+        global_rate: float = 25.0,
+        global_burst: float = 30.0,
+        chat_rates: Optional[Dict[Priority, Tuple[float, float]]] = None,
+        max_pending: int = 2_000,
+        concurrency: int = 4,
+        max_attempts: int = 3,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._clock = clock
+        self._global = TokenBucket(global_rate, global_burst, clock())
+        self._chat_rates = chat_rates or {
+            Priority.MODERATION: (10.0, 20.0),
+            Priority.COSMETIC: (20 / 60, 5.0),
+        }
+        self.max_pending = max_pending
+        self.max_attempts = max_attempts
+        self.stats = SchedulerStats()
+        self._lanes: Dict[LaneKey, _Lane] = {}
+        # (priority, seq, lane) of lanes whose head job may run now
+        self._ready: List[Tuple[int, int, LaneKey]] = []
+        # (ready_at, seq, lane) of lanes waiting for their chat bucket
+        self._waiting: List[Tuple[float, int, LaneKey]] = []
+        # (refilled_at, lane) of empty lanes, dropped once their bucket is full again
+        self._idle_lanes: List[Tuple[float, LaneKey]] = []
+        # queued cosmetic jobs in submission order, newest last, for shedding
+        self._cosmetic: List[OutboundJob] = []
+        self._pending = 0
+        self._unfinished = 0
+        self._idle = asyncio.Event()
+        self._idle.set()
+        self._seq = itertools.count()
+        self._paused_until = 0.0
+        self._wakeup = asyncio.Event()
+        self._slots = asyncio.Semaphore(concurrency)
+        self._running: set[asyncio.Task[None]] = set()
+        self._task: Optional[asyncio.Task[None]] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    @property
+    def lanes(self) -> int:
+        return len(self._lanes)
+
+    def submit(self, chat_id: int, priority: Priority, factory: ActionFactory) -> "asyncio.Future[Any]":
+        loop = asyncio.get_running_loop()
+        future: asyncio.Future[Any] = loop.create_future()
+        future.add_done_callback(_consume_exception)
+        self.stats.submitted += 1
+        if self._pending >= self.max_pending and not self._shed_for(priority):
+            self.stats.shed += 1
+            future.set_result(None)
+            return future
+        job = OutboundJob(int(priority), next(self._seq), chat_id, factory, future)
+        self._unfinished += 1
+        self._idle.clear()
+        future.add_done_callback(self._job_finished)
+        if priority is not Priority.MODERATION:
+            self._cosmetic.append(job)
+            if len(self._cosmetic) > 2 * self._pending + 64:
+                self._cosmetic = [queued for queued in self._cosmetic if queued.queued]
+        self._enqueue(job, self._clock())
+        if self._task is None:
+            self._task = loop.create_task(self._run())
+        self._wakeup.set()
+        return future
+
+    async def drain(self) -> None:
+        """Wait until every queued and running job has finished."""
+
+        await self._idle.wait()
+
+    async def close(self, timeout: float = 5.0) -> None:
+        try:
+            await asyncio.wait_for(self.drain(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning("dropping %d outbound jobs on shutdown", self._pending)
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        for lane in self._lanes.values():
+            for job in lane.jobs:
+                _resolve(job.future, None)
+        self._lanes.clear()
+        self._ready.clear()
+        self._waiting.clear()
+        self._idle_lanes.clear()
+        self._cosmetic.clear()
+        self._pending = 0
+
+    def _job_finished(self, future: "asyncio.Future[Any]") -> None:
+        self._unfinished -= 1
+        if not self._unfinished:
+            self._idle.set()
+
+    def _enqueue(self, job: OutboundJob, now: float, *, first: bool = False) -> None:
+        key = (job.chat_id, job.priority)
+        lane = self._lanes.get(key)
+        if lane is None:
+            rate, burst = self._chat_rates[Priority(job.priority)]
+            lane = self._lanes[key] = _Lane(key, TokenBucket(rate, burst, now))
+        job.queued = True
+        if first:
+            lane.jobs.appendleft(job)
+        else:
+            lane.jobs.append(job)
+        self._pending += 1
+        self._schedule(lane, now)
+
+    def _schedule(self, lane: _Lane, now: float) -> None:
+        """Put ``lane`` in the heap matching its bucket, or retire it when empty."""
+
+        if lane.scheduled:
+            return
+        if not lane.jobs:
+            bucket = lane.bucket
+            bucket.delay(now)
+            missing = bucket.capacity - bucket.tokens
+            refilled_at = now + missing / bucket.rate if bucket.rate > 0 else float("inf")
+            heapq.heappush(self._idle_lanes, (refilled_at, lane.key))
+            return
+        head = lane.jobs[0]
+        delay = lane.bucket.delay(now)
+        if delay <= _EPSILON:
+            heapq.heappush(self._ready, (head.priority, head.seq, lane.key))
+        else:
+            heapq.heappush(self._waiting, (now + delay, head.seq, lane.key))
+        lane.scheduled = True
+
+    def _shed_for(self, priority: Priority) -> bool:
+        """Make room for a job of ``priority``; ``False`` means drop it instead."""
+
+        if priority is not Priority.MODERATION:
+            return False
+        while self._cosmetic:
+            victim = self._cosmetic.pop()
+            if not victim.queued:
+                continue
+            lane = self._lanes[(victim.chat_id, victim.priority)]
+            if lane.jobs[-1] is victim:
+                lane.jobs.pop()
+            else:
+                lane.jobs.remove(victim)
+            victim.queued = False
+            self._pending -= 1
+            _resolve(victim.future, None)
+            self.stats.shed += 1
+            break
+        return True
+
+    async def _run(self) -> None:
+        while True:
+            if not self._pending:
+                self._wakeup.clear()
+                await self._wakeup.wait()
+                continue
+            now = self._clock()
+            self._prune(now)
+            wait = max(self._paused_until - now, self._global.delay(now))
+            if wait > 0:
+                await self._sleep(wait)
+                continue
+            job, wait = self._next_ready(now)
+            if job is None:
+                await self._sleep(wait)
+                continue
+            await self._slots.acquire()
+            task = asyncio.get_running_loop().create_task(self._execute(job))
+            self._running.add(task)
+            task.add_done_callback(self._running.discard)
+
+    def _next_ready(self, now: float) -> Tuple[Optional[OutboundJob], float]:
+        """Pop the best runnable job and charge both buckets, or say how long to wait."""
+
+        waiting, ready = self._waiting, self._ready
+        while waiting and waiting[0][0] <= now:
+            lane = self._lanes.get(heapq.heappop(waiting)[2])
+            if lane is not None:
+                lane.scheduled = False
+                self._schedule(lane, now)
+        while ready:
+            _, seq, key = heapq.heappop(ready)
+            lane = self._lanes.get(key)
+            if lane is None:
+                continue
+            lane.scheduled = False
+            if not lane.jobs or lane.jobs[0].seq != seq:
+                # the head was shed or a retry jumped the queue since this entry was pushed
+                self._schedule(lane, now)
+                continue
+            job = lane.jobs.popleft()
+            job.queued = False
+            self._pending -= 1
+            self._global.take(now)
+            lane.bucket.take(now)
+            self._schedule(lane, now)
+            return job, 0.0
+        return None, (waiting[0][0] - now if waiting else float("inf"))
+
+    def _prune(self, now: float) -> None:
+        idle = self._idle_lanes
+        while idle and idle[0][0] <= now:
+            _, key = heapq.heappop(idle)
+            lane = self._lanes.get(key)
+            if lane is not None and not lane.jobs and not lane.scheduled:
+                del self._lanes[key]
+
+    async def _sleep(self, seconds: float) -> None:
+        self._wakeup.clear()
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), min(seconds, 60.0))
+        except asyncio.TimeoutError:
+            pass
+
+    async def _execute(self, job: OutboundJob) -> None:
+        try:
+            result = await job.factory()
+        except FloodWaitError as error:
+            self.stats.flood_waits += 1
+            self.stats.flood_wait_seconds += error.seconds
+            self._paused_until = max(self._paused_until, self._clock() + error.seconds)
+            job.attempts += 1
+            if job.attempts < self.max_attempts:
+                self._enqueue(job, self._clock(), first=True)
+                self._wakeup.set()
+            else:
+                self.stats.failed += 1
+                _resolve(job.future, error=error)
+        except Exception as error:  # noqa: BLE001 - surfaced through the job future
+            self.stats.failed += 1
+            logger.warning("outbound action for chat %s failed: %s", job.chat_id, error)
+            _resolve(job.future, error=error)
+        else:
+            self.stats.completed += 1
+            _resolve(job.future, result)
+        finally:
+            self._slots.release()
+
+
+def _resolve(future: "asyncio.Future[Any]", result: Any = None, *, error: BaseException | None = None) -> None:
+    # a caller may have cancelled the future while the job was queued or running
+    if future.done():
+        return
+    if error is not None:
+        future.set_exception(error)
+    else:
+        future.set_result(result)
+
+
+def _consume_exception(future: "asyncio.Future[Any]") -> None:
+    # callers may fire and forget; mark failures as retrieved to avoid noisy warnings
+    if not future.cancelled():
+        future.exception()
@@ -0,0 +1,202 @@
+"""Local storage backends used when Supabase is not configured."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Deque, Dict, List, Optional, Protocol, Tuple, TypeVar
+
+from .config import Settings
+from .points import PointsDelta
+
+T = TypeVar("T")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS group_configs (
+    chat_id INTEGER PRIMARY KEY,
+    payload TEXT NOT NULL,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS action_logs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    action TEXT NOT NULL,
+    payload TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS action_logs_chat_idx ON action_logs (chat_id, id);
+CREATE TRIGGER IF NOT EXISTS action_logs_no_update BEFORE UPDATE ON action_logs
+BEGIN SELECT RAISE(ABORT, 'action_logs is append-only'); END;
+CREATE TRIGGER IF NOT EXISTS action_logs_no_delete BEFORE DELETE ON action_logs
+BEGIN SELECT RAISE(ABORT, 'action_logs is append-only'); END;
+CREATE TABLE IF NOT EXISTS points_balances (
+    chat_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    balance INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (chat_id, user_id)
+) WITHOUT ROWID;
+"""
+
+
+class StorageBackend(Protocol):
+    """Persistence primitives behind :class:`~telebot.supabase.SupabaseConfigStore`.
+
+    Batching lives in the store (``AuditLogWriter`` and ``PointsLedger``), so
+    each call here receives a whole batch and should write it atomically.
+    """
+
+    async def load_group_config(self, chat_id: int) -> Optional[Dict[str, Any]]: ...
+
+    async def save_group_config(self, chat_id: int, payload: Dict[str, Any]) -> None: ...
+
+    async def insert_action_logs(self, documents: List[Dict[str, Any]]) -> None: ...
+
+    async def apply_point_deltas(self, deltas: List[PointsDelta]) -> None: ...
+
+    async def get_points(self, chat_id: int, user_id: int) -> int: ...
+
+    async def close(self) -> None: ...
+
+
+class MemoryBackend:
+    """Process-local backend; the audit trail keeps only the newest ``audit_limit`` entries."""
+
+    def __init__(self, *, audit_limit: int = 10_000) -> None:
+        self.configs: Dict[int, Dict[str, Any]] = {}
+        self.audit_log: Deque[Dict[str, Any]] = deque(maxlen=audit_limit)
+        self.points: Dict[Tuple[int, int], int] = {}
+
+    async def load_group_config(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        return self.configs.get(chat_id)
+
+    async def save_group_config(self, chat_id: int, payload: Dict[str, Any]) -> None:
+        self.configs[chat_id] = payload
+
+    async def insert_action_logs(self, documents: List[Dict[str, Any]]) -> None:
+        self.audit_log.extend(documents)
+
+    async def apply_point_deltas(self, deltas: List[PointsDelta]) -> None:
+        for delta in deltas:
+            key = (delta.chat_id, delta.user_id)
+            self.points[key] = self.points.get(key, 0) + delta.delta
+
+    async def get_points(self, chat_id: int, user_id: int) -> int:
+        return self.points.get((chat_id, user_id), 0)
+
+    async def close(self) -> None:
+        return None
+
+
+class SQLiteBackend:
+    """Single-file SQLite backend in WAL mode.
+
+    All statements run on one dedicated worker thread so the event loop never
+    blocks on disk I/O; every batch is written in a single transaction.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="telebot-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            conn = sqlite3.connect(self.path, isolation_level=None, check_same_thread=False)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    async def _run(self, func: Callable[[sqlite3.Connection], T]) -> T:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, lambda: func(self._connection()))
+
+    async def load_group_config(self, chat_id: int) -> Optional[Dict[str, Any]]:
+        def load(conn: sqlite3.Connection) -> Optional[Dict[str, Any]]:
+            row = conn.execute("SELECT payload FROM group_configs WHERE chat_id = ?", (chat_id,)).fetchone()
+            return json.loads(row[0]) if row else None
+
+        return await self._run(load)
+
+    async def save_group_config(self, chat_id: int, payload: Dict[str, Any]) -> None:
+        document = json.dumps(payload, ensure_ascii=False)
+
+        def save(conn: sqlite3.Connection) -> None:
+            conn.execute(
+                "INSERT INTO group_configs (chat_id, payload, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT (chat_id) DO UPDATE SET payload = excluded.payload, updated_at = excluded.updated_at",
+                (chat_id, document, time.time()),
+            )
+
+        await self._run(save)
+
+    async def insert_action_logs(self, documents: List[Dict[str, Any]]) -> None:
+        now = time.time()
+        rows = [
+            (doc["chat_id"], doc["user_id"], doc["action"], json.dumps(doc.get("payload") or {}, ensure_ascii=False), now)
+            for doc in documents
+        ]
+
+        def insert(conn: sqlite3.Connection) -> None:
+            with _transaction(conn):
+                conn.executemany(
+                    "INSERT INTO action_logs (chat_id, user_id, action, payload, created_at) VALUES (?, ?, ?, ?, ?)",
+                    rows,
+                )
+
+        await self._run(insert)
+
+    async def apply_point_deltas(self, deltas: List[PointsDelta]) -> None:
+        rows = [(delta.chat_id, delta.user_id, delta.delta) for delta in deltas]
+
+        def apply(conn: sqlite3.Connection) -> None:
+            with _transaction(conn):
+                conn.executemany(
+                    "INSERT INTO points_balances (chat_id, user_id, balance) VALUES (?, ?, ?) "
+                    "ON CONFLICT (chat_id, user_id) DO UPDATE SET balance = balance + excluded.balance",
+                    rows,
+                )
+
+        await self._run(apply)
+
+    async def get_points(self, chat_id: int, user_id: int) -> int:
+        def load(conn: sqlite3.Connection) -> int:
+            row = conn.execute(
+                "SELECT balance FROM points_balances WHERE chat_id = ? AND user_id = ?", (chat_id, user_id)
+            ).fetchone()
+            return int(row[0]) if row else 0
+
+        return await self._run(load)
+
+    async def close(self) -> None:
+        if self._conn is not None:
+            await self._run(lambda conn: conn.close())
+            self._conn = None
+        self._executor.shutdown(wait=True)
+
+
+class _transaction:
+    __slots__ = ("_conn",)
+
+    def __init__(self, conn: sqlite3.Connection) -> None:
+        self._conn = conn
+
+    def __enter__(self) -> None:
+        self._conn.execute("BEGIN IMMEDIATE")
+
+    def __exit__(self, exc_type: object, *exc_info: object) -> None:
+        self._conn.execute("ROLLBACK" if exc_type else "COMMIT")
+
+
+def open_local_backend(settings: Settings) -> StorageBackend:
+    """SQLite when ``LOCAL_STORE_PATH`` is set, otherwise a bounded in-memory backend."""
+
+    if settings.local_store_path:
+        return SQLiteBackend(settings.local_store_path)
+    return MemoryBackend(audit_limit=settings.local_audit_limit)
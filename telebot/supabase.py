@@ -3,18 +3,36 @@
 from __future__ import annotations
 
 import asyncio
+import contextvars
+import copy
+import hashlib
 import json
+import logging
 import time
-from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from collections import OrderedDict
+from dataclasses import dataclass, field, replace
+from types import MappingProxyType
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Tuple
 
 try:  # pragma: no cover - optional dependency guard for tests
     import httpx
 except ImportError:  # pragma: no cover - defer requirement until runtime
     httpx = None  # type: ignore
 
+from .audit import AuditLogWriter
 from .config import Settings
+from .deadline import DeadlineExceeded, remaining, within
+from .duplicates import DuplicateConfig
+from .flood import FloodConfig
+from .metrics import MetricsRegistry
+from .outbox import CircuitBreaker, Outbox
+from .points import PointsDelta, PointsLedger
+from .raid import RaidConfig
+from .rules import RuleEngine
+from .storage import StorageBackend, open_local_backend
+from .welcome import WelcomePolicy, load_welcome_policy
 
+logger = logging.getLogger(__name__)
 
 DEFAULT_GROUP_CONFIG: Dict[str, Any] = {
     "banned_keywords": ["广告", "spam"],
@@ -38,6 +56,26 @@ DEFAULT_GROUP_CONFIG: Dict[str, Any] = {
         "mute_seconds": 120,
         "notice": "消息过于频繁，已为你禁言 2 分钟。",
     },
+    "raid_control": {
+        "enabled": False,
+        "max_joins": 15,
+        "max_new_senders": 8,
+        "interval_seconds": 30,
+        "new_member_seconds": 600,
+        "lockdown_seconds": 300,
+        "restrict_seconds": 3600,
+        "notice": "检测到大量新成员涌入，群组已临时进入防护模式。",
+    },
+    "duplicate_control": {
+        "enabled": False,
+        "min_senders": 3,
+        "window_seconds": 300,
+        "min_similarity": 0.5,
+        "min_length": 20,
+        "action": "delete",
+        "mute_seconds": 600,
+        "notice": None,
+    },
     "welcome": {
         "enabled": True,
         "text": "欢迎 {mention} 加入 {chat_title}，请阅读置顶规则。",
@@ -47,10 +85,92 @@ DEFAULT_GROUP_CONFIG: Dict[str, Any] = {
 }
 
 
+@dataclass(frozen=True, slots=True)
+class GroupConfigSnapshot:
+    """A group config validated and compiled once, shared read-only by all handlers.
+
+    ``payload`` is a private copy of the fetched config, so neither the cache
+    nor ``DEFAULT_GROUP_CONFIG`` can be changed through a snapshot. Equal
+    payloads (same ``content_hash``) share one snapshot across chats.
+    """
+
+    content_hash: str
+    payload: Mapping[str, Any]
+    engine: RuleEngine
+    flood: FloodConfig
+    raid: RaidConfig
+    duplicates: DuplicateConfig
+    welcome: WelcomePolicy
+
+
+@dataclass(slots=True)
+class SnapshotStats:
+    compiled: int = 0
+    reused: int = 0
+    invalid_sections: int = 0
+
+
+def content_hash(payload: Mapping[str, Any]) -> str:
+    blob = json.dumps(payload, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.blake2b(blob.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def compile_group_config(payload: Mapping[str, Any], *, digest: str | None = None, stats: SnapshotStats | None = None) -> GroupConfigSnapshot:
+    """Validate ``payload`` and build its snapshot.
+
+    A section that fails validation is logged and replaced by its disabled
+    default instead of taking the whole group offline. Rules are compiled one
+    by one, so a malformed rule only lands in ``engine.rejected``.
+    """
+
+    private = copy.deepcopy(dict(payload))
+
+    def section(name: str, build: Any, fallback: Any) -> Any:
+        try:
+            return build()
+        except Exception as exc:  # noqa: BLE001 - any malformed section degrades to its default
+            if stats is not None:
+                stats.invalid_sections += 1
+            logger.warning("invalid %s section in group config: %s", name, exc)
+            return fallback
+
+    return GroupConfigSnapshot(
+        content_hash=digest or content_hash(private),
+        payload=MappingProxyType(private),
+        engine=section("rules", lambda: RuleEngine.from_config(private), RuleEngine([])),
+        flood=section("flood_control", lambda: FloodConfig(**(private.get("flood_control") or {})), FloodConfig()),
+        raid=section("raid_control", lambda: RaidConfig(**(private.get("raid_control") or {})), RaidConfig()),
+        duplicates=section(
+            "duplicate_control", lambda: DuplicateConfig(**(private.get("duplicate_control") or {})), DuplicateConfig()
+        ),
+        welcome=section("welcome", lambda: load_welcome_policy(private.get("welcome")), WelcomePolicy()),
+    )
+
+
 @dataclass
 class CachedConfig:
     payload: Dict[str, Any]
     expires_at: float
+    negative: bool = False
+    snapshot: Optional[GroupConfigSnapshot] = None
+
+
+@dataclass(slots=True)
+class ConfigCacheStats:
+    hits: int = 0
+    stale_hits: int = 0
+    misses: int = 0
+    refreshes: int = 0
+    refresh_failures: int = 0
+
+
+@dataclass(slots=True)
+class PoolStats:
+    requests: int = 0
+    in_flight: int = 0
+    peak_in_flight: int = 0
+    pool_timeouts: int = 0
+    deadline_exceeded: int = 0
 
 
 @dataclass
@@ -61,6 +181,29 @@ class SupabaseConfigStore:
     _cache: Dict[int, CachedConfig] = field(default_factory=dict)
     _runtime_groups: Dict[int, Dict[str, Any]] = field(default_factory=dict)
     _client: Optional[httpx.AsyncClient] = None
+    _audit_writer: Optional[AuditLogWriter] = None
+    _points_ledger: Optional[PointsLedger] = None
+    _inflight: Dict[int, "asyncio.Task[Dict[str, Any]]"] = field(default_factory=dict)
+    # per chat for the most recently seen ``max_cache_stats`` chats; the totals cover every chat
+    _cache_stats: "OrderedDict[int, ConfigCacheStats]" = field(default_factory=OrderedDict)
+    _cache_totals: ConfigCacheStats = field(default_factory=ConfigCacheStats)
+    _config_watermark: Optional[str] = None
+    _config_watermark_chat: Optional[int] = None
+    _config_synced_at: Optional[float] = None
+    _config_sync_task: Optional["asyncio.Task[None]"] = None
+    metrics: MetricsRegistry = field(default_factory=lambda: MetricsRegistry(enabled=False))
+    _local: Optional[StorageBackend] = None
+    _outbox: Optional[Outbox] = None
+    pool_stats: PoolStats = field(default_factory=PoolStats)
+    snapshot_stats: SnapshotStats = field(default_factory=SnapshotStats)
+    _snapshots: "OrderedDict[str, GroupConfigSnapshot]" = field(default_factory=OrderedDict)
+    max_snapshots: int = 1024
+    max_cache_stats: int = 1024
+
+    def __post_init__(self) -> None:
+        self.metrics.register_collector(
+            "telebot_supabase_pool", "gauge", "Supabase HTTP pool usage.", self._pool_samples
+        )
 
     @property
     def client(self) -> Optional[httpx.AsyncClient]:
@@ -75,102 +218,563 @@ class SupabaseConfigStore:
                 "Authorization": f"Bearer {service_key}",
                 "Content-Type": "application/json",
             }
-            self._client = httpx.AsyncClient(base_url=str(self.settings.supabase_url), headers=headers, timeout=15)
+            settings = self.settings
+            self._client = httpx.AsyncClient(
+                base_url=str(settings.supabase_url),
+                headers=headers,
+                http2=settings.supabase_http2 and _http2_available(),
+                limits=httpx.Limits(
+                    max_connections=settings.supabase_max_connections,
+                    max_keepalive_connections=settings.supabase_max_keepalive,
+                    keepalive_expiry=settings.supabase_keepalive_seconds,
+                ),
+                timeout=httpx.Timeout(
+                    connect=settings.supabase_connect_timeout,
+                    read=settings.supabase_read_timeout,
+                    write=settings.supabase_read_timeout,
+                    pool=settings.supabase_pool_timeout,
+                ),
+            )
         return self._client
 
+    async def _request(self, method: str, url: str, *, stage: str, budgeted: bool = False, **kwargs: Any) -> httpx.Response:
+        """Send one request, tracking pool usage.
+
+        ``budgeted`` requests sit on the message path: their timeouts are
+        capped by the current message deadline (see :mod:`telebot.deadline`)
+        and running out of budget raises :class:`DeadlineExceeded`.
+        """
+
+        assert self.client is not None
+        left = remaining() if budgeted else None
+        if left is not None:
+            if left <= 0:
+                self.pool_stats.deadline_exceeded += 1
+                raise DeadlineExceeded(f"no budget left for {stage}")
+            kwargs["timeout"] = _capped_timeout(self.client.timeout, left)
+        stats = self.pool_stats
+        stats.requests += 1
+        stats.in_flight += 1
+        stats.peak_in_flight = max(stats.peak_in_flight, stats.in_flight)
+        try:
+            with self.metrics.time(stage):
+                return await self.client.request(method, url, **kwargs)
+        except httpx.PoolTimeout:
+            stats.pool_timeouts += 1
+            raise
+        except httpx.TimeoutException as exc:
+            if left is not None and (remaining() or 0) <= 0:
+                stats.deadline_exceeded += 1
+                raise DeadlineExceeded(f"{stage} exceeded the message deadline") from exc
+            raise
+        finally:
+            stats.in_flight -= 1
+
+    def _pool_samples(self) -> List[tuple[Dict[str, str], float]]:
+        stats = self.pool_stats
+        samples: List[tuple[Dict[str, str], float]] = [
+            ({"value": "max_connections"}, self.settings.supabase_max_connections),
+            ({"value": "in_flight"}, stats.in_flight),
+            ({"value": "peak_in_flight"}, stats.peak_in_flight),
+            ({"value": "pool_timeouts"}, stats.pool_timeouts),
+            ({"value": "deadline_exceeded"}, stats.deadline_exceeded),
+        ]
+        connections = _pool_connections(self._client)
+        if connections is not None:
+            samples.append(({"value": "open_connections"}, len(connections)))
+            samples.append(({"value": "idle_connections"}, sum(1 for conn in connections if conn.is_idle())))
+        return samples
+
+    @property
+    def local(self) -> StorageBackend:
+        """Backend used instead of Supabase when it is not configured."""
+
+        if self._local is None:
+            self._local = open_local_backend(self.settings)
+        return self._local
+
     async def fetch_group_config(self, chat_id: int) -> Dict[str, Any]:
+        """Return the group's config, serving stale entries while refreshing.
+
+        Concurrent misses for a chat share a single request. Once an entry is
+        past ``config_cache_seconds`` it keeps being served for up to
+        ``config_stale_seconds`` while one background refresh runs.
+        """
+
         now = time.monotonic()
         cached = self._cache.get(chat_id)
-        if cached and cached.expires_at > now:
+        if cached and (cached.expires_at > now or self._feed_is_fresh(now)):
+            self._count_cache(chat_id, "hits")
             return cached.payload
+        if cached and cached.expires_at + self.settings.config_stale_seconds > now:
+            self._count_cache(chat_id, "stale_hits")
+            self._refresh(chat_id)
+            return cached.payload
+
+        self._count_cache(chat_id, "misses")
+        return await within(asyncio.shield(self._refresh(chat_id)))
+
+    async def fetch_snapshot(self, chat_id: int) -> GroupConfigSnapshot:
+        """Like :meth:`fetch_group_config` but returns the compiled snapshot."""
+
+        payload = await self.fetch_group_config(chat_id)
+        cached = self._cache.get(chat_id)
+        if cached is not None and cached.payload is payload and cached.snapshot is not None:
+            return cached.snapshot
+        return self._snapshot_for(payload)
+
+    def _snapshot_for(self, payload: Mapping[str, Any], previous: Optional[CachedConfig] = None) -> GroupConfigSnapshot:
+        if previous is not None and previous.payload is payload and previous.snapshot is not None:
+            return previous.snapshot
+        digest = content_hash(payload)
+        snapshot = self._snapshots.get(digest)
+        if snapshot is not None:
+            self._snapshots.move_to_end(digest)
+            self.snapshot_stats.reused += 1
+            return snapshot
+        snapshot = compile_group_config(payload, digest=digest, stats=self.snapshot_stats)
+        self.snapshot_stats.compiled += 1
+        self._snapshots[digest] = snapshot
+        while len(self._snapshots) > self.max_snapshots:
+            self._snapshots.popitem(last=False)
+        return snapshot
+
+    def cache_stats(self, chat_id: int) -> ConfigCacheStats:
+        return self._cache_stats.get(chat_id) or ConfigCacheStats()
+
+    def total_cache_stats(self) -> ConfigCacheStats:
+        return replace(self._cache_totals)
 
+    def _count_cache(self, chat_id: int, outcome: str) -> None:
+        stats = self._cache_stats.get(chat_id)
+        if stats is None:
+            stats = self._cache_stats[chat_id] = ConfigCacheStats()
+            if len(self._cache_stats) > self.max_cache_stats:
+                self._cache_stats.popitem(last=False)
+        else:
+            self._cache_stats.move_to_end(chat_id)
+        setattr(stats, outcome, getattr(stats, outcome) + 1)
+        setattr(self._cache_totals, outcome, getattr(self._cache_totals, outcome) + 1)
+
+    def _refresh(self, chat_id: int) -> "asyncio.Task[Dict[str, Any]]":
+        task = self._inflight.get(chat_id)
+        if task is None:
+            # The task is shared by every waiter, so it must not inherit the
+            # deadline of whichever message happened to start it; each waiter
+            # applies its own budget through ``within``.
+            task = asyncio.get_running_loop().create_task(
+                self._load_group_config(chat_id), context=contextvars.Context()
+            )
+            self._inflight[chat_id] = task
+            task.add_done_callback(lambda done: self._finish_refresh(chat_id, done))
+        return task
+
+    def _finish_refresh(self, chat_id: int, task: "asyncio.Task[Dict[str, Any]]") -> None:
+        self._inflight.pop(chat_id, None)
+        if task.cancelled():
+            return
+        error = task.exception()
+        if error is not None:
+            self._count_cache(chat_id, "refresh_failures")
+            logger.warning("failed to refresh config for chat %s: %s", chat_id, error)
+
+    async def _load_group_config(self, chat_id: int) -> Dict[str, Any]:
+        negative = False
         if chat_id in self._runtime_groups:
             payload = self._runtime_groups[chat_id]
-        elif self.client:
-            payload = await self._fetch_from_supabase(chat_id)
         else:
-            payload = DEFAULT_GROUP_CONFIG
+            if self.client:
+                record = await self._fetch_from_supabase(chat_id)
+            else:
+                record = await self.local.load_group_config(chat_id)
+            negative = record is None
+            payload = DEFAULT_GROUP_CONFIG if record is None else record
 
-        self._cache[chat_id] = CachedConfig(payload=payload, expires_at=now + self.settings.config_cache_seconds)
+        self._store_config(chat_id, payload, negative=negative)
+        self._count_cache(chat_id, "refreshes")
         return payload
 
-    async def _fetch_from_supabase(self, chat_id: int) -> Dict[str, Any]:
+    async def _fetch_from_supabase(self, chat_id: int) -> Optional[Dict[str, Any]]:
         assert self.client is not None
         path = f"/rest/v1/group_configs?select=*&chat_id=eq.{chat_id}&limit=1"
-        response = await self.client.get(path)
+        response = await self._request("GET", path, stage="supabase.fetch_config")
         response.raise_for_status()
         data = response.json()
         if not data:
-            return DEFAULT_GROUP_CONFIG
-        record = data[0]
-        if isinstance(record.get("payload"), str):
-            return json.loads(record["payload"])
-        return record.get("payload", DEFAULT_GROUP_CONFIG)
+            return None
+        return _record_payload(data[0])
+
+    async def prefetch_group_configs(self, chat_ids: Iterable[int] | None = None) -> int:
+        """Warm the cache with bulk ``group_configs`` queries.
+
+        With ``chat_ids`` the rows are requested in ``chat_id=in.(...)`` pages
+        and ids without a row are cached negatively; without it the whole table
+        is paged through by ``chat_id``. Returns the number of rows loaded.
+        """
 
-    async def record_action(self, chat_id: int, user_id: int, action: str, payload: Dict[str, Any]) -> None:
         if not self.client:
-            # fallback: keep it in-memory for debugging & tests
-            key = (chat_id, user_id)
-            bucket = self._runtime_groups.setdefault(chat_id, DEFAULT_GROUP_CONFIG | {"audit_log": []})
-            bucket.setdefault("audit_log", []).append({"user_id": user_id, "action": action, "payload": payload})
-            return
+            return 0
+        page_size = self.settings.config_prefetch_page_size
+        loaded = 0
+        if chat_ids is not None:
+            ids = sorted(set(chat_ids))
+            for start in range(0, len(ids), page_size):
+                page = ids[start : start + page_size]
+                rows = await self._select_group_configs({"chat_id": f"in.({','.join(map(str, page))})"})
+                self._store_rows(rows)
+                found = {int(row["chat_id"]) for row in rows}
+                for chat_id in page:
+                    if chat_id not in found:
+                        self._store_config(chat_id, DEFAULT_GROUP_CONFIG, negative=True)
+                loaded += len(rows)
+            return loaded
 
+        last_chat_id: Optional[int] = None
+        while True:
+            params = {"order": "chat_id.asc", "limit": str(page_size)}
+            if last_chat_id is not None:
+                params["chat_id"] = f"gt.{last_chat_id}"
+            rows = await self._select_group_configs(params)
+            self._store_rows(rows)
+            loaded += len(rows)
+            if len(rows) < page_size:
+                break
+            last_chat_id = int(rows[-1]["chat_id"])
+        self._config_synced_at = time.monotonic()
+        return loaded
+
+    async def poll_config_changes(self) -> int:
+        """Apply ``group_configs`` rows updated since the last seen ``updated_at``.
+
+        Pages are keyed by ``(updated_at, chat_id)``, so rows sharing a
+        timestamp across a page boundary are not skipped. Without a known
+        ``chat_id`` for the watermark (after a prefetch or a warm start) the
+        rows at the watermark itself are read again.
+        """
+
+        if not self.client:
+            return 0
+        page_size = self.settings.config_prefetch_page_size
+        changed = 0
+        while True:
+            params = {"order": "updated_at.asc,chat_id.asc", "limit": str(page_size)}
+            watermark, last_chat_id = self._config_watermark, self._config_watermark_chat
+            if watermark is not None and last_chat_id is None:
+                params["updated_at"] = f"gte.{watermark}"
+            elif watermark is not None:
+                params["or"] = f"(updated_at.gt.{watermark},and(updated_at.eq.{watermark},chat_id.gt.{last_chat_id}))"
+            rows = await self._select_group_configs(params)
+            changed += self._store_rows(rows, only_cached=watermark is not None)
+            if rows and rows[-1].get("updated_at"):
+                self._config_watermark, self._config_watermark_chat = rows[-1]["updated_at"], int(rows[-1]["chat_id"])
+            if len(rows) < page_size:
+                break
+        self._config_synced_at = time.monotonic()
+        return changed
+
+    def start_config_sync(self) -> None:
+        """Poll the change feed every ``config_poll_seconds`` in the background."""
+
+        if self._config_sync_task is None and self.client and self.settings.config_poll_seconds > 0:
+            self._config_sync_task = asyncio.get_running_loop().create_task(self._config_sync_loop())
+
+    async def _config_sync_loop(self) -> None:
+        while True:
+            try:
+                await self.poll_config_changes()
+            except Exception as error:  # noqa: BLE001 - fall back to TTL expiry until the next poll works
+                logger.warning("config change poll failed: %s", error)
+            await asyncio.sleep(self.settings.config_poll_seconds)
+
+    def _feed_is_fresh(self, now: float) -> bool:
+        # While the change feed is polled successfully, cached rows are kept
+        # up to date by it and must not expire on their TTL.
+        if self._config_sync_task is None or self._config_synced_at is None:
+            return False
+        return now - self._config_synced_at < self.settings.config_poll_seconds * 3
+
+    async def _select_group_configs(self, params: Dict[str, str]) -> List[Dict[str, Any]]:
         assert self.client is not None
+        query = {"select": "chat_id,payload,updated_at", **params}
+        response = await self._request("GET", "/rest/v1/group_configs", stage="supabase.select_configs", params=query)
+        response.raise_for_status()
+        return response.json()
+
+    def _store_rows(self, rows: List[Dict[str, Any]], *, only_cached: bool = False) -> int:
+        stored = 0
+        for row in rows:
+            updated_at = row.get("updated_at")
+            if updated_at and (self._config_watermark is None or updated_at > self._config_watermark):
+                self._config_watermark, self._config_watermark_chat = updated_at, None
+            chat_id = int(row["chat_id"])
+            if only_cached and chat_id not in self._cache:
+                continue
+            self._store_config(chat_id, _record_payload(row))
+            stored += 1
+        return stored
+
+    def _store_config(self, chat_id: int, payload: Dict[str, Any], *, negative: bool = False) -> None:
+        ttl = self.settings.config_negative_cache_seconds if negative else self.settings.config_cache_seconds
+        snapshot = self._snapshot_for(payload, self._cache.get(chat_id))
+        self._cache[chat_id] = CachedConfig(
+            payload=payload, expires_at=time.monotonic() + ttl, negative=negative, snapshot=snapshot
+        )
+
+    async def record_action(self, chat_id: int, user_id: int, action: str, payload: Dict[str, Any]) -> None:
         document = {
             "chat_id": chat_id,
             "user_id": user_id,
             "action": action,
             "payload": payload,
         }
-        response = await self.client.post("/rest/v1/action_logs", content=json.dumps(document))
+        if self.outbox is not None:
+            await self._insert_action_logs([document])
+            return
+        await self.audit_writer.submit(document)
+
+    async def record_actions(self, chat_id: int, entries: List[tuple[int, str, Dict[str, Any]]]) -> None:
+        """Write several ``(user_id, action, payload)`` audit entries as one insert."""
+
+        if not entries:
+            return
+        documents = [
+            {"chat_id": chat_id, "user_id": user_id, "action": action, "payload": payload}
+            for user_id, action, payload in entries
+        ]
+        await self._insert_action_logs(documents)
+
+    @property
+    def audit_writer(self) -> AuditLogWriter:
+        if self._audit_writer is None:
+            self._audit_writer = AuditLogWriter(
+                self._insert_action_logs,
+                batch_size=self.settings.audit_batch_size,
+                flush_interval=self.settings.audit_flush_seconds,
+                max_queue=self.settings.audit_queue_size,
+            )
+        return self._audit_writer
+
+    @property
+    def outbox(self) -> Optional[Outbox]:
+        """Durable outbox for Supabase writes, when ``OUTBOX_PATH`` is set."""
+
+        if self._outbox is None and self.settings.outbox_path and self.client:
+            self._outbox = Outbox(
+                self.settings.outbox_path,
+                self._deliver_outbox,
+                segment_bytes=self.settings.outbox_segment_bytes,
+                batch_size=self.settings.outbox_batch_size,
+                max_backoff=self.settings.outbox_max_backoff_seconds,
+                breaker=CircuitBreaker(
+                    failure_threshold=self.settings.outbox_breaker_failures,
+                    reset_timeout=self.settings.outbox_breaker_reset_seconds,
+                ),
+                retryable=_is_retryable,
+                tally=_point_delta_tally,
+            )
+        return self._outbox
+
+    def open_outbox(self) -> None:
+        """Open the outbox so records left by a previous run are replayed right away."""
+
+        if self.outbox is not None:
+            self.outbox.start()
+
+    async def _deliver_outbox(self, kind: str, items: List[Any]) -> None:
+        if kind == "action_logs":
+            await self._post_action_logs(items)
+        elif kind == "point_deltas":
+            await self._post_point_deltas([PointsDelta(**item) for item in items])
+        else:
+            raise ValueError(f"unknown outbox record kind: {kind}")
+
+    async def _insert_action_logs(self, documents: List[Dict[str, Any]]) -> None:
+        if not self.client:
+            await self.local.insert_action_logs(documents)
+            return
+        if self.outbox is not None:
+            self.outbox.append("action_logs", documents)
+            return
+        await self._post_action_logs(documents)
+
+    async def _post_action_logs(self, documents: List[Dict[str, Any]]) -> None:
+        assert self.client is not None
+        response = await self._request(
+            "POST", "/rest/v1/action_logs", stage="supabase.insert_action_logs", content=json.dumps(documents)
+        )
         response.raise_for_status()
 
     async def increment_points(self, chat_id: int, user_id: int, amount: int) -> None:
+        ledger = self.points_ledger
+        ledger.add(chat_id, user_id, amount)
+        ledger.start()
+
+    @property
+    def points_ledger(self) -> PointsLedger:
+        if self._points_ledger is None:
+            self._points_ledger = PointsLedger(
+                self._apply_point_deltas,
+                flush_interval=self.settings.points_flush_seconds,
+                batch_size=self.settings.points_batch_size,
+            )
+        return self._points_ledger
+
+    async def _apply_point_deltas(self, deltas: List[PointsDelta]) -> None:
         if not self.client:
-            bucket = self._runtime_groups.setdefault(chat_id, DEFAULT_GROUP_CONFIG | {"points": {}})
-            bucket.setdefault("points", {})
-            bucket["points"][user_id] = bucket["points"].get(user_id, 0) + amount
+            await self.local.apply_point_deltas(deltas)
             return
+        if self.outbox is not None:
+            self.outbox.append("point_deltas", [delta.as_dict() for delta in deltas])
+            return
+        await self._post_point_deltas(deltas)
 
+    async def _post_point_deltas(self, deltas: List[PointsDelta]) -> None:
         assert self.client is not None
-        payload = {
-            "chat_id": chat_id,
-            "user_id": user_id,
-            "delta": amount,
-        }
-        response = await self.client.post("/rest/v1/rpc/increment_points", content=json.dumps(payload))
+        payload = {"deltas": [delta.as_dict() for delta in deltas]}
+        response = await self._request(
+            "POST", "/rest/v1/rpc/increment_points_batch", stage="supabase.increment_points", content=json.dumps(payload)
+        )
         response.raise_for_status()
 
     async def get_points(self, chat_id: int, user_id: int) -> int:
+        pending = self._points_ledger.pending_delta(chat_id, user_id) if self._points_ledger else 0
+        outbox = self.outbox
+        if outbox is not None:
+            # flushed by the ledger but not yet applied by Supabase
+            pending += outbox.tally((chat_id, user_id))
         if not self.client:
-            bucket = self._runtime_groups.get(chat_id, {})
-            points = bucket.get("points", {})
-            return int(points.get(user_id, 0))
+            return await self.local.get_points(chat_id, user_id) + pending
 
-        assert self.client is not None
         path = (
             f"/rest/v1/points_balances?select=balance&chat_id=eq.{chat_id}&user_id=eq.{user_id}&limit=1"
         )
-        response = await self.client.get(path)
+        response = await self._request("GET", path, stage="supabase.get_points", budgeted=True)
         response.raise_for_status()
         data = response.json()
         if not data:
-            return 0
+            return pending
         record = data[0]
         balance = record.get("balance", 0)
-        return int(balance or 0)
+        return int(balance or 0) + pending
 
     def seed_group_config(self, chat_id: int, payload: Dict[str, Any]) -> None:
         """Utility for tests: seed an in-memory group configuration."""
 
-        self._runtime_groups[chat_id] = payload
+        self._runtime_groups[chat_id] = copy.deepcopy(payload)
+
+    def export_configs(self) -> List[Tuple[int, Dict[str, Any], float, bool]]:
+        """Cached ``(chat_id, payload, expires_at, negative)`` entries, for :mod:`telebot.warmstart`."""
+
+        return [(chat_id, entry.payload, entry.expires_at, entry.negative) for chat_id, entry in self._cache.items()]
+
+    def restore_configs(self, entries: Iterable[Tuple[int, Dict[str, Any], float, bool]], watermark: Optional[str] = None) -> int:
+        """Fill the cache from a warm-start snapshot; ``expires_at`` must be on the monotonic clock.
+
+        Entries already cached (e.g. fetched since startup) win over restored ones.
+        """
+
+        restored = 0
+        for chat_id, payload, expires_at, negative in entries:
+            if chat_id in self._cache:
+                continue
+            snapshot = self._snapshot_for(payload)
+            self._cache[chat_id] = CachedConfig(payload=payload, expires_at=expires_at, negative=negative, snapshot=snapshot)
+            restored += 1
+        if watermark and (self._config_watermark is None or watermark > self._config_watermark):
+            self._config_watermark, self._config_watermark_chat = watermark, None
+        return restored
+
+    @property
+    def config_watermark(self) -> Optional[str]:
+        return self._config_watermark
+
+    def pending_point_deltas(self) -> List[PointsDelta]:
+        """Point awards not yet handed to a sink, e.g. left over after a failed final flush."""
+
+        return self._points_ledger.pending() if self._points_ledger else []
+
+    def restore_point_deltas(self, deltas: Iterable[PointsDelta]) -> int:
+        restored = 0
+        for delta in deltas:
+            self.points_ledger.add(delta.chat_id, delta.user_id, delta.delta)
+            restored += 1
+        if restored:
+            self.points_ledger.start()
+        return restored
 
     async def close(self) -> None:
+        if self._config_sync_task:
+            self._config_sync_task.cancel()
+            self._config_sync_task = None
+        for task in list(self._inflight.values()):
+            task.cancel()
+        if self._points_ledger:
+            await self._points_ledger.close()
+        if self._audit_writer:
+            await self._audit_writer.close()
+        if self._outbox:
+            await self._outbox.close()
+        if self._local:
+            await self._local.close()
         if self._client:
             await self._client.aclose()
 
 
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        logger.warning("SUPABASE_HTTP2 is set but the h2 package is missing; install telebot[http2]. Using HTTP/1.1.")
+        return False
+    return True
+
+
+def _capped_timeout(timeout: "httpx.Timeout", budget: float) -> "httpx.Timeout":
+    def cap(value: Optional[float]) -> float:
+        return budget if value is None else min(value, budget)
+
+    return httpx.Timeout(connect=cap(timeout.connect), read=cap(timeout.read), write=cap(timeout.write), pool=cap(timeout.pool))
+
+
+def _pool_connections(client: Optional["httpx.AsyncClient"]) -> Optional[List[Any]]:
+    """Connections of the default httpcore pool; ``None`` for custom transports."""
+
+    pool = getattr(getattr(client, "_transport", None), "_pool", None)
+    return getattr(pool, "connections", None)
+
+
+def _is_retryable(error: BaseException) -> bool:
+    """Only network trouble, timeouts, rate limits and server errors may succeed on retry.
+
+    Anything else (a rejected or unencodable payload, an unknown record kind)
+    would fail forever and hold up the records behind it.
+    """
+
+    if httpx is not None:
+        if isinstance(error, httpx.HTTPStatusError):
+            status = error.response.status_code
+            return status >= 500 or status in (408, 429)
+        if isinstance(error, httpx.TransportError):
+            return True
+    return isinstance(error, (OSError, TimeoutError))
+
+
+def _point_delta_tally(kind: str, item: Any) -> Optional[Tuple[Tuple[int, int], int]]:
+    """Outbox tally: undelivered point deltas per ``(chat_id, user_id)``."""
+
+    if kind != "point_deltas":
+        return None
+    return (item["chat_id"], item["user_id"]), item["delta"]
+
+
+def _record_payload(record: Dict[str, Any]) -> Dict[str, Any]:
+    if isinstance(record.get("payload"), str):
+        return json.loads(record["payload"])
+    return record.get("payload", DEFAULT_GROUP_CONFIG)
+
+
 async def shutdown(store: SupabaseConfigStore) -> None:
     await store.close()
     # HTTPX fails to close if called twice; ensure graceful shutdown.
     await asyncio.sleep(0)
+
@@ -0,0 +1,229 @@
+"""Warm-restart snapshots of flood windows, cached configs and pending points.
+
+Without them a restart hands every flooder a fresh window and sends one
+``group_configs`` request per active chat to Supabase. :class:`WarmStart`
+writes the state to a small binary file every ``interval`` seconds and on
+shutdown, and loads it on startup.
+
+File layout: ``<4s magic><B version><d saved_at>`` followed by a zlib stream
+of four sections, each prefixed with a ``<I`` count:
+
+* config payloads as length-prefixed JSON, each distinct payload stored once;
+* cached configs ``<q chat_id><d expires_at><? negative><I payload index>``;
+* flood windows ``<q chat_id><q user_id><d start><I current><I previous><d expires_at>``;
+* pending point deltas ``<q chat_id><q user_id><q delta>``.
+
+The config watermark follows as a length-prefixed UTF-8 string. All times in
+the file are wall-clock seconds: monotonic timestamps are rebased on save and
+rebased onto the new process's monotonic clock on load.
+
+Pending point deltas are only written by the final snapshot, after the
+ledger's last flush failed, and the file is rewritten without them right
+after loading, so an award is never restored twice.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from .flood import FloodProtector, FloodWindowState
+from .points import PointsDelta
+from .supabase import SupabaseConfigStore
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"TBWS"
+VERSION = 1
+
+_HEADER = struct.Struct("<4sBd")
+_COUNT = struct.Struct("<I")
+_CONFIG = struct.Struct("<qd?I")
+_WINDOW = struct.Struct("<qqdIId")
+_DELTA = struct.Struct("<qqq")
+
+ConfigState = Tuple[int, Dict[str, Any], float, bool]
+
+
+@dataclass
+class WarmState:
+    """Snapshot contents; every timestamp is wall-clock seconds."""
+
+    saved_at: float
+    configs: List[ConfigState] = field(default_factory=list)
+    flood_windows: List[FloodWindowState] = field(default_factory=list)
+    point_deltas: List[PointsDelta] = field(default_factory=list)
+    config_watermark: Optional[str] = None
+
+
+def encode(state: WarmState) -> bytes:
+    payload_index: Dict[int, int] = {}
+    payloads: List[bytes] = []
+    config_rows: List[bytes] = []
+    for chat_id, payload, expires_at, negative in state.configs:
+        index = payload_index.get(id(payload))
+        if index is None:
+            index = payload_index[id(payload)] = len(payloads)
+            payloads.append(json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8"))
+        config_rows.append(_CONFIG.pack(chat_id, expires_at, negative, index))
+
+    parts: List[bytes] = [_COUNT.pack(len(payloads))]
+    for blob in payloads:
+        parts.append(_COUNT.pack(len(blob)))
+        parts.append(blob)
+    parts.append(_COUNT.pack(len(config_rows)))
+    parts.extend(config_rows)
+    parts.append(_COUNT.pack(len(state.flood_windows)))
+    parts.extend(_WINDOW.pack(*window) for window in state.flood_windows)
+    parts.append(_COUNT.pack(len(state.point_deltas)))
+    parts.extend(_DELTA.pack(delta.chat_id, delta.user_id, delta.delta) for delta in state.point_deltas)
+    watermark = (state.config_watermark or "").encode("utf-8")
+    parts.append(_COUNT.pack(len(watermark)))
+    parts.append(watermark)
+    return _HEADER.pack(MAGIC, VERSION, state.saved_at) + zlib.compress(b"".join(parts))
+
+
+def decode(data: bytes) -> WarmState:
+    magic, version, saved_at = _HEADER.unpack_from(data)
+    if magic != MAGIC or version != VERSION:
+        raise ValueError(f"not a version {VERSION} warm-start snapshot")
+    body = memoryview(zlib.decompress(data[_HEADER.size :]))
+    offset = 0
+
+    def count() -> int:
+        nonlocal offset
+        (value,) = _COUNT.unpack_from(body, offset)
+        offset += _COUNT.size
+        return value
+
+    def rows(layout: struct.Struct) -> List[tuple]:
+        nonlocal offset
+        total = count()
+        items = list(layout.iter_unpack(body[offset : offset + total * layout.size]))
+        offset += total * layout.size
+        return items
+
+    payloads: List[Dict[str, Any]] = []
+    for _ in range(count()):
+        size = count()
+        payloads.append(json.loads(bytes(body[offset : offset + size])))
+        offset += size
+    state = WarmState(saved_at=saved_at)
+    state.configs = [(chat_id, payloads[index], expires_at, negative) for chat_id, expires_at, negative, index in rows(_CONFIG)]
+    state.flood_windows = rows(_WINDOW)
+    state.point_deltas = [PointsDelta(*row) for row in rows(_DELTA)]
+    size = count()
+    state.config_watermark = bytes(body[offset : offset + size]).decode("utf-8") or None
+    return state
+
+
+class WarmStart:
+    """Periodically snapshot ``flood`` and ``store`` to ``path`` and restore them on startup."""
+
+    def __init__(self, path: str | os.PathLike[str], *, flood: FloodProtector, store: SupabaseConfigStore, interval: float = 60.0) -> None:
+        self.path = Path(path)
+        self.flood = flood
+        self.store = store
+        self.interval = interval
+        self._task: Optional[asyncio.Task[None]] = None
+
+    def load(self) -> Optional[WarmState]:
+        """Restore the last snapshot, if any; a missing or unreadable file is not an error."""
+
+        try:
+            state = decode(self.path.read_bytes())
+        except FileNotFoundError:
+            return None
+        except (ValueError, struct.error, zlib.error) as error:
+            logger.warning("ignoring unreadable warm-start snapshot %s: %s", self.path, error)
+            return None
+        shift = self._monotonic() - self._wall()
+        now = self._monotonic()
+        windows = [
+            (chat_id, user_id, start + shift, current, previous, expires_at + shift)
+            for chat_id, user_id, start, current, previous, expires_at in state.flood_windows
+            if expires_at + shift > now
+        ]
+        configs = [(chat_id, payload, expires_at + shift, negative) for chat_id, payload, expires_at, negative in state.configs]
+        flood_windows = self.flood.restore_windows(windows)
+        cached = self.store.restore_configs(configs, state.config_watermark)
+        points = self.store.restore_point_deltas(state.point_deltas)
+        logger.info(
+            "restored %d flood windows, %d configs and %d point deltas from a snapshot taken %.0fs ago",
+            flood_windows, cached, points, self._wall() - state.saved_at,
+        )
+        if state.point_deltas:
+            # the restored deltas now live in the ledger; never restore them twice
+            self._write(self.capture())
+        return state
+
+    def capture(self, *, include_points: bool = False) -> WarmState:
+        """Copy the current state, rebased to wall-clock time."""
+
+        shift = self._wall() - self._monotonic()
+        return WarmState(
+            saved_at=self._wall(),
+            configs=[
+                (chat_id, payload, expires_at + shift, negative)
+                for chat_id, payload, expires_at, negative in self.store.export_configs()
+            ],
+            flood_windows=[
+                (chat_id, user_id, start + shift, current, previous, expires_at + shift)
+                for chat_id, user_id, start, current, previous, expires_at in self.flood.export_windows()
+            ],
+            point_deltas=self.store.pending_point_deltas() if include_points else [],
+            config_watermark=self.store.config_watermark,
+        )
+
+    async def save(self, *, include_points: bool = False) -> None:
+        state = self.capture(include_points=include_points)
+        await asyncio.to_thread(self._write, state)
+
+    def start(self) -> None:
+        if self._task is None and self.interval > 0:
+            self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def close(self) -> None:
+        """Stop the periodic task and write the final snapshot, including undelivered points.
+
+        Call it after the store is closed so its last flush already happened.
+        """
+
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.save(include_points=True)
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.save()
+            except OSError as error:
+                logger.warning("failed to write warm-start snapshot %s: %s", self.path, error)
+
+    def _write(self, state: WarmState) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        tmp.write_bytes(encode(state))
+        os.replace(tmp, self.path)
+
+    @staticmethod
+    def _monotonic() -> float:
+        return time.monotonic()
+
+    @staticmethod
+    def _wall() -> float:
+        return time.time()
@@ -4,3 +4,162 @@ from pathlib import Path
 ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
+
+import json
+from types import SimpleNamespace
+
+import httpx
+import pytest
+
+from telebot.bot import TelebotApplication
+from telebot.config import Settings
+from telebot.supabase import SupabaseConfigStore
+
+
+class FakeEvent:
+    """Just enough of a Telethon ``NewMessage`` event for the handlers."""
+
+    def __init__(self, text="", chat_id=1, sender_id=2, message_id=10, *, sender=None, chat=None):
+        self.raw_text = text
+        self.chat_id = chat_id
+        self.sender_id = sender_id
+        self.id = message_id
+        self.sender = sender
+        self.chat = chat
+        self.responses = []
+        self.lookups = 0
+
+    async def respond(self, message):
+        self.responses.append(message)
+
+    async def get_sender(self):
+        self.lookups += 1
+        return SimpleNamespace(id=self.sender_id, username="alice", first_name="Alice", last_name=None)
+
+    async def get_chat(self):
+        self.lookups += 1
+        return SimpleNamespace(id=self.chat_id, title="Group")
+
+
+class FakeClient:
+    """Records the Telegram calls the application makes."""
+
+    def __init__(self):
+        self.deleted = []
+        self.muted = []
+
+    async def delete_messages(self, chat, message_ids):
+        self.deleted.append((chat, list(message_ids)))
+
+    async def edit_permissions(self, chat, user, **kwargs):
+        self.muted.append(user)
+
+
+@pytest.fixture
+def make_app():
+    """Build a :class:`TelebotApplication` talking to a :class:`FakeClient` (``app.client``)."""
+
+    def factory(**overrides):
+        settings = Settings(**{"delete_batch_seconds": 0, **overrides})
+        return TelebotApplication(settings, client=FakeClient())
+
+    return factory
+
+
+@pytest.fixture
+def make_store():
+    """Build a Supabase-backed store whose HTTP calls go to ``handler``."""
+
+    def factory(handler, **overrides):
+        settings = Settings(supabase_url="https://example.supabase.co", supabase_service_role_key="service", **overrides)
+        store = SupabaseConfigStore(settings)
+        store._client = httpx.AsyncClient(base_url=settings.supabase_url, transport=httpx.MockTransport(handler))
+        return store
+
+    return factory
+
+
+class FakePostgrest:
+    """Tiny in-memory PostgREST stand-in served through ``httpx.MockTransport``.
+
+    Supports ``eq``/``in``/``gt``/``gte``/``lt`` filters combined with
+    ``or``/``and``, multi-column ``order``, ``limit`` and ``offset`` on GET,
+    inserts on POST and registered ``rpc/`` functions.
+    """
+
+    def __init__(self) -> None:
+        self.tables = {}
+        self.rpcs = {}
+        self.requests = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        self.requests.append(request)
+        path = request.url.path.removeprefix("/rest/v1/")
+        if path.startswith("rpc/"):
+            result = self.rpcs[path.removeprefix("rpc/")](json.loads(request.content or b"{}"))
+            return httpx.Response(200, json=result)
+        rows = self.tables.setdefault(path, [])
+        if request.method == "POST":
+            body = json.loads(request.content)
+            rows.extend(body if isinstance(body, list) else [body])
+            return httpx.Response(201)
+        return httpx.Response(200, json=self.select(rows, request.url.params))
+
+    @classmethod
+    def select(cls, rows, params):
+        result = list(rows)
+        for column, expression in params.multi_items():
+            if column in {"select", "order", "limit", "offset"}:
+                continue
+            condition = cls.condition(f"or{expression}" if column == "or" else f"{column}.{expression}")
+            result = [row for row in result if condition(row)]
+        if "order" in params:
+            for key in reversed(params["order"].split(",")):
+                column, _, direction = key.partition(".")
+                result.sort(key=lambda row: row.get(column), reverse=direction == "desc")
+        offset = int(params.get("offset", 0))
+        limit = int(params["limit"]) if "limit" in params else None
+        result = result[offset:]
+        return result[:limit] if limit is not None else result
+
+    @classmethod
+    def condition(cls, expression):
+        """Predicate for ``column.op.value`` or a nested ``and(...)``/``or(...)`` filter."""
+
+        for prefix, combine in (("and(", all), ("or(", any)):
+            if expression.startswith(prefix):
+                parts = [cls.condition(part) for part in split_top_level(expression[len(prefix) : -1])]
+                return lambda row: combine(part(row) for part in parts)
+        column, op, value = expression.split(".", 2)
+        if op == "in":
+            wanted = {item for item in value.strip("()").split(",") if item}
+            return lambda row: str(row.get(column)) in wanted
+        compare = {
+            "eq": lambda a, b: a == b,
+            "gt": lambda a, b: a > b,
+            "gte": lambda a, b: a >= b,
+            "lt": lambda a, b: a < b,
+        }[op]
+        return lambda row: row.get(column) is not None and compare(row[column], type(row[column])(value))
+
+
+def split_top_level(text):
+    parts, depth, current = [], 0, ""
+    for char in text:
+        if char == "," and depth == 0:
+            parts.append(current)
+            current = ""
+            continue
+        depth += char == "("
+        depth -= char == ")"
+        current += char
+    return parts + [current]
+
+
+@pytest.fixture
+def postgrest(make_store):
+    """A fake PostgREST backend plus a store factory wired to it."""
+
+    fake = FakePostgrest()
+    fake.store = lambda **overrides: make_store(fake, **overrides)
+    return fake
@@ -0,0 +1,68 @@
+import asyncio
+import json
+
+import httpx
+
+from telebot.audit import AuditLogWriter
+
+
+def test_record_action_is_written_as_bulk_insert(make_store):
+    requests = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(json.loads(request.content))
+        return httpx.Response(201)
+
+    store = make_store(handler, audit_batch_size=3, audit_flush_seconds=60)
+
+    async def scenario():
+        for message_id in range(7):
+            await store.record_action(1, 2, "delete", {"message_id": message_id})
+        await asyncio.sleep(0)
+        await store.close()
+
+    asyncio.run(scenario())
+    assert [len(batch) for batch in requests] == [3, 3, 1]
+    assert requests[0][0] == {"chat_id": 1, "user_id": 2, "action": "delete", "payload": {"message_id": 0}}
+    assert store.audit_writer.stats.written == 7
+
+
+def test_writer_flushes_on_interval():
+    batches = []
+
+    async def sink(batch):
+        batches.append(batch)
+
+    async def scenario():
+        writer = AuditLogWriter(sink, batch_size=100, flush_interval=0.01)
+        await writer.submit({"n": 1})
+        await asyncio.sleep(0.05)
+        assert batches == [[{"n": 1}]]
+        assert writer.queue_depth == 0
+        await writer.close()
+
+    asyncio.run(scenario())
+
+
+def test_full_queue_applies_backpressure():
+    async def scenario():
+        gate = asyncio.Event()
+        written = []
+
+        async def sink(batch):
+            await gate.wait()
+            written.extend(batch)
+
+        writer = AuditLogWriter(sink, batch_size=2, flush_interval=0.01, max_queue=2)
+        for n in range(4):
+            await writer.submit({"n": n})
+        blocked = asyncio.create_task(writer.submit({"n": 4}))
+        await asyncio.sleep(0.05)
+        assert not blocked.done()
+        assert writer.stats.blocked_submits >= 1
+        gate.set()
+        await blocked
+        await writer.close()
+        assert [record["n"] for record in written] == [0, 1, 2, 3, 4]
+
+    asyncio.run(scenario())
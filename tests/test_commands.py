@@ -0,0 +1,80 @@
+import asyncio
+
+from conftest import FakeEvent
+from telebot.commands import CommandRouter, parse_command
+
+
+def test_parse_command_splits_name_mention_and_args():
+    command = parse_command("/CheckIn@Telebot  today please ")
+    assert (command.name, command.mention, command.args) == ("checkin", "Telebot", "today please")
+    assert parse_command("hello /checkin") is None
+    assert parse_command("/") is None
+    assert parse_command("/me").args == ""
+
+
+def test_router_ignores_unknown_commands_and_other_bots():
+    router = CommandRouter(bot_username="telebot")
+    seen = []
+
+    @router.command("me")
+    async def me(event, command):
+        seen.append(command.name)
+
+    async def scenario():
+        assert await router.dispatch(None, "/me@TeleBot") is not None
+        assert await router.dispatch(None, "/me@other_bot") is None
+        assert await router.dispatch(None, "/media") is None
+        assert await router.dispatch(None, "say /me") is None
+
+    asyncio.run(scenario())
+    assert seen == ["me"]
+    assert "ME" in router and len(router) == 1
+
+
+def test_application_routes_commands_once_and_moderates_the_rest(make_app):
+    app = make_app()
+    client = app.client
+    app.store.seed_group_config(1, {"banned_keywords": ["广告"]})
+
+    async def scenario():
+        checkin = FakeEvent("/checkin")
+        await app.on_new_message(checkin)
+        await app.outbound.drain()
+        assert checkin.responses == ["✅ 签到成功，本次获得 5 积分。"]
+        assert await app.store.get_points(1, 2) == 5
+
+        inline = FakeEvent("please /checkin")
+        await app.on_new_message(inline)
+        assert inline.responses == []
+        assert await app.store.get_points(1, 2) == 5
+
+        smuggled = FakeEvent("/checkin 广告")
+        await app.on_new_message(smuggled)
+        await app.deletions.close()
+        await app.outbound.drain()
+        assert client.deleted == [(1, [10])]
+
+        me = FakeEvent("/me")
+        await app.on_new_message(me)
+        await app.outbound.drain()
+        assert me.responses == ["📊 当前积分：10"]
+
+    asyncio.run(scenario())
+
+
+def test_bare_commands_still_go_through_flood_control(make_app):
+    app = make_app()
+    app.store.seed_group_config(
+        1,
+        {"banned_keywords": ["checkin"], "flood_control": {"enabled": True, "max_messages": 3, "interval_seconds": 60}},
+    )
+
+    async def scenario():
+        for message_id in range(5):
+            await app.on_new_message(FakeEvent("/checkin", message_id=message_id))
+        await app.deletions.close()
+        await app.outbound.drain()
+
+    asyncio.run(scenario())
+    assert len(app.client.muted) == 1
+    assert app.client.deleted == []  # keyword rules do not apply to bare commands
@@ -0,0 +1,105 @@
+import asyncio
+
+import httpx
+
+from telebot.bot import TelebotApplication
+from telebot.config import Settings
+from telebot.supabase import DEFAULT_GROUP_CONFIG
+
+
+def _row(chat_id, keyword, updated_at):
+    return {"chat_id": chat_id, "payload": {"banned_keywords": [keyword]}, "updated_at": updated_at}
+
+
+def test_full_table_prefetch_pages_through_all_rows(postgrest):
+    postgrest.tables["group_configs"] = [_row(chat_id, f"k{chat_id}", "2024-01-01T00:00:00+00:00") for chat_id in range(1, 8)]
+    store = postgrest.store(config_prefetch_page_size=3)
+
+    async def scenario():
+        assert await store.prefetch_group_configs() == 7
+        before = len(postgrest.requests)
+        assert await store.fetch_group_config(5) == {"banned_keywords": ["k5"]}
+        assert len(postgrest.requests) == before
+        await store.close()
+
+    asyncio.run(scenario())
+    assert len(postgrest.requests) == 3
+
+
+def test_prefetch_by_ids_negatively_caches_missing_chats(postgrest):
+    postgrest.tables["group_configs"] = [_row(1, "a", "2024-01-01T00:00:00+00:00")]
+    store = postgrest.store(config_prefetch_page_size=2)
+
+    async def scenario():
+        assert await store.prefetch_group_configs([1, 2, 3]) == 1
+        assert await store.fetch_group_config(3) is DEFAULT_GROUP_CONFIG
+        await store.close()
+
+    asyncio.run(scenario())
+    assert len(postgrest.requests) == 2
+    assert postgrest.requests[0].url.params["chat_id"] == "in.(1,2)"
+    assert store._cache[3].negative
+
+
+def test_change_feed_applies_updates_past_the_watermark(postgrest):
+    table = postgrest.tables["group_configs"] = [
+        _row(1, "old", "2024-01-01T00:00:00+00:00"),
+        _row(2, "other", "2024-01-01T00:00:01+00:00"),
+    ]
+    store = postgrest.store(config_cache_seconds=0, config_stale_seconds=0, config_poll_seconds=0.01)
+
+    async def scenario():
+        await store.prefetch_group_configs()
+        store.start_config_sync()
+        await asyncio.sleep(0.02)
+        table[0] = _row(1, "new", "2024-01-02T00:00:00+00:00")
+        table.append(_row(99, "uncached", "2024-01-02T00:00:00+00:00"))
+        await asyncio.sleep(0.05)
+        requests_before = len(postgrest.requests)
+        # entries stay fresh through the feed although their TTL is zero
+        assert await store.fetch_group_config(1) == {"banned_keywords": ["new"]}
+        assert await store.fetch_group_config(2) == {"banned_keywords": ["other"]}
+        assert len(postgrest.requests) == requests_before
+        await store.close()
+
+    asyncio.run(scenario())
+    assert 99 not in store._cache
+    assert store._config_watermark == "2024-01-02T00:00:00+00:00"
+
+
+def test_change_feed_does_not_skip_rows_sharing_a_timestamp_across_pages(postgrest):
+    stamp = "2024-01-01T00:00:00+00:00"
+    table = postgrest.tables["group_configs"] = [_row(chat_id, "old", stamp) for chat_id in range(1, 6)]
+    store = postgrest.store(config_prefetch_page_size=2)
+
+    async def scenario():
+        await store.prefetch_group_configs()
+        later = "2024-01-02T00:00:00.5+00:00"
+        table[:] = [_row(chat_id, "new", later) for chat_id in range(1, 6)]
+        assert await store.poll_config_changes() == 5
+        assert store._config_watermark_chat == 5
+        table.append(_row(3, "newer", later))
+        del table[2]
+        assert await store.poll_config_changes() == 0
+        table[-1]["updated_at"] = "2024-01-03T00:00:00+00:00"
+        assert await store.poll_config_changes() == 1
+        await store.close()
+
+    asyncio.run(scenario())
+    assert all(store._cache[chat_id].payload["banned_keywords"] == ["new"] for chat_id in (1, 2, 4, 5))
+    assert store._cache[3].payload == {"banned_keywords": ["newer"]}
+
+
+def test_warm_up_starts_cold_when_supabase_is_down():
+    settings = Settings(supabase_url="https://example.supabase.co", supabase_service_role_key="service")
+    app = TelebotApplication(settings, client=object())
+    app.store._client = httpx.AsyncClient(
+        base_url=settings.supabase_url, transport=httpx.MockTransport(lambda request: httpx.Response(503))
+    )
+
+    async def scenario():
+        await app.warm_up()
+        await app.store.close()
+
+    asyncio.run(scenario())
+    assert app.store._cache == {}
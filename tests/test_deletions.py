@@ -0,0 +1,116 @@
+import asyncio
+import json
+
+import httpx
+
+from telebot.deletions import DeleteBatcher
+
+
+def test_burst_is_deleted_in_batches_with_per_message_reports():
+    calls = []
+    batches = []
+    delivered = []
+
+    async def delete_messages(chat_id, entity, ids):
+        calls.append((chat_id, entity, len(ids)))
+
+    async def on_batch(chat_id, reports):
+        batches.append([report.message_id for report in reports])
+
+    async def scenario():
+        batcher = DeleteBatcher(delete_messages, on_batch=on_batch, window=0.01)
+        for message_id in range(250):
+            batcher.add(7, message_id, 1, "ban:spam", entity="chat-7", callback=delivered.append)
+        batcher.add(8, 1, 2, "flood")
+        await asyncio.sleep(0.05)
+        await batcher.close()
+
+    asyncio.run(scenario())
+    assert sorted(calls) == [(7, "chat-7", 50), (7, "chat-7", 100), (7, "chat-7", 100), (8, 8, 1)]
+    assert sum(len(batch) for batch in batches) == 251
+    assert len(delivered) == 250 and all(report.deleted for report in delivered)
+
+
+def test_failed_delete_is_reported_for_every_message():
+    reports = []
+
+    async def delete_messages(chat_id, entity, ids):
+        raise RuntimeError("MESSAGE_DELETE_FORBIDDEN")
+
+    async def scenario():
+        batcher = DeleteBatcher(delete_messages, window=60)
+        batcher.add(1, 10, 5, "rule", callback=reports.append)
+        batcher.add(1, 10, 5, "rule", callback=reports.append)
+        batcher.add(1, 11, 6, "rule", callback=reports.append)
+        assert batcher.pending(1) == 2
+        await batcher.flush(1)
+
+    asyncio.run(scenario())
+    assert [(report.message_id, report.deleted, report.error) for report in reports] == [
+        (10, False, "MESSAGE_DELETE_FORBIDDEN"),
+        (11, False, "MESSAGE_DELETE_FORBIDDEN"),
+    ]
+
+
+def test_close_waits_for_a_timer_flush_already_sending():
+    recorded = []
+    sending = None
+    release = None
+
+    async def delete_messages(chat_id, entity, ids):
+        sending.set()
+        await release.wait()
+
+    async def on_batch(chat_id, reports):
+        recorded.extend(report.message_id for report in reports)
+
+    async def scenario():
+        nonlocal sending, release
+        sending, release = asyncio.Event(), asyncio.Event()
+        batcher = DeleteBatcher(delete_messages, on_batch=on_batch, window=0.01)
+        batcher.add(1, 10, 5, "rule")
+        await sending.wait()
+        closing = asyncio.ensure_future(batcher.close())
+        await asyncio.sleep(0.01)
+        assert not closing.done()
+        release.set()
+        await closing
+
+    asyncio.run(scenario())
+    assert recorded == [10]
+
+
+def test_record_actions_writes_one_bulk_insert(make_store):
+    bodies = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        bodies.append(json.loads(request.content))
+        return httpx.Response(201)
+
+    store = make_store(handler)
+    entries = [(user_id, "delete", {"message_id": user_id}) for user_id in range(3)]
+    asyncio.run(store.record_actions(4, entries))
+    assert len(bodies) == 1
+    assert [row["user_id"] for row in bodies[0]] == [0, 1, 2]
+    assert {row["chat_id"] for row in bodies[0]} == {4}
+
+
+def test_shed_deletion_is_recorded_as_not_deleted(make_app):
+    app = make_app(delete_batch_seconds=60)
+    recorded = []
+
+    async def record(chat_id, reports):
+        recorded.extend((report.message_id, report.deleted, report.error) for report in reports)
+
+    app.deletions._on_batch = record
+
+    async def scenario():
+        app.outbound._paused_until = float("inf")  # e.g. a long FloodWait
+        app.deletions.add(1, 42, 7, "rule")
+        flushing = asyncio.ensure_future(app.deletions.close())
+        await asyncio.sleep(0.01)
+        await app.outbound.close(timeout=0)  # shutdown drops the queued delete
+        await flushing
+
+    asyncio.run(scenario())
+    assert recorded == [(42, False, "dropped deletion of 1 messages")]
@@ -0,0 +1,93 @@
+import asyncio
+
+from conftest import FakeEvent
+from telebot.duplicates import ChatFingerprints, DuplicateDetector, similarity, sketch
+
+SPAM = "加我微信领取免费福利，限时优惠名额有限 vx: abc123"
+CONFIG = {"enabled": True, "min_senders": 3, "window_seconds": 60, "min_length": 10}
+
+
+def test_sketch_similarity_separates_edits_from_unrelated_text():
+    base = sketch(SPAM)
+    assert len(base) == 16
+    assert similarity(base, sketch(SPAM)) == 1.0
+    assert similarity(base, sketch(SPAM.replace("abc123", "abc124"))) >= 0.5
+    assert similarity(base, sketch("今天下午三点开会，请大家准时参加并带上电脑")) < 0.3
+
+
+def test_fires_once_enough_distinct_senders_post_near_copies():
+    detector = DuplicateDetector()
+    variants = [SPAM, SPAM.replace("abc123", "abc124"), "ＶＸ" + SPAM, SPAM + "!!"]
+    assert detector.check(1, 10, 100, variants[0], CONFIG, now=0) is None
+    assert detector.check(1, 10, 101, variants[1], CONFIG, now=1) is None  # same sender again
+    assert detector.check(1, 11, 102, variants[2], CONFIG, now=2) is None
+    assert detector.check(2, 12, 103, variants[3], CONFIG, now=3) is None  # other chat
+    hit = detector.check(1, 12, 104, variants[3], CONFIG, now=3)
+    assert hit.triggered and hit.senders == 3
+    assert hit.earlier == [(10, 100), (10, 101), (11, 102)]
+    later = detector.check(1, 13, 105, SPAM, CONFIG, now=4)
+    assert later and not later.triggered and later.earlier == []
+    assert detector.check(1, 14, 106, "完全不同的一条正常消息，大家晚上好呀", CONFIG, now=5) is None
+
+
+def test_clusters_expire_and_memory_is_bounded():
+    detector = DuplicateDetector(max_chats=2)
+    config = dict(CONFIG, max_fingerprints=5)
+    detector.check(1, 10, 1, SPAM, config, now=0)
+    detector.check(1, 11, 2, SPAM, config, now=1)
+    assert detector.check(1, 12, 3, SPAM, config, now=100) is None  # window passed
+    for index in range(20):
+        detector.check(1, index, index, f"第{index}条互不相同的消息内容 {index * 7919}", config, now=101)
+    state = detector._chats[1]
+    assert len(state.clusters) <= 5
+    assert all(cluster_id in state.clusters for bucket in state.index.values() for cluster_id in bucket)
+    detector.check(2, 1, 1, SPAM, config, now=101)
+    detector.check(3, 1, 1, SPAM, config, now=101)
+    assert list(detector._chats) == [2, 3]
+
+
+def test_senders_are_counted_within_the_window_only():
+    detector = DuplicateDetector()
+    config = dict(CONFIG, window_seconds=300)
+    # one sender every four minutes keeps the cluster alive but never three at once
+    assert detector.check(1, 10, 1, SPAM, config, now=0) is None
+    assert detector.check(1, 11, 2, SPAM, config, now=240) is None
+    assert detector.check(1, 12, 3, SPAM, config, now=480) is None
+    hit = detector.check(1, 13, 4, SPAM, config, now=500)
+    assert hit.triggered and hit.senders == 3
+    assert hit.earlier == [(11, 2), (12, 3)]
+    assert detector.check(1, 14, 5, SPAM, config, now=900) is None  # 11, 12 and 13 aged out
+    cluster = next(iter(detector._chats[1].clusters.values()))
+    assert not cluster.triggered
+    for user_id in range(1_000):
+        detector.check(1, 100 + user_id, 10 + user_id, SPAM, config, now=901)
+    assert len(cluster.senders) <= 256
+
+
+def test_full_index_bucket_drops_the_stalest_cluster():
+    detector = DuplicateDetector()
+    state = ChatFingerprints()
+    signature = sketch(SPAM)
+    for index in range(32):
+        detector._add(state, signature, now=index, limit=1_000)
+    state.clusters[0].last_seen = 100  # the first cluster is still active
+    detector._add(state, signature, now=101, limit=1_000)
+    assert all(len(bucket) == 32 for bucket in state.index.values())
+    assert 0 in state.clusters and 32 in state.clusters and 1 not in state.clusters
+
+
+def test_application_deletes_every_copy_once_the_cluster_trips(make_app):
+    app = make_app()
+    app.store.seed_group_config(1, {"duplicate_control": dict(CONFIG, notice="检测到重复广告")})
+
+    async def scenario():
+        events = [FakeEvent(SPAM + "!" * index, sender_id=10 + index, message_id=100 + index) for index in range(4)]
+        for event in events:
+            await app.on_new_message(event)
+        await app.deletions.close()
+        await app.outbound.drain()
+        return events
+
+    events = asyncio.run(scenario())
+    assert sorted(message_id for _, batch in app.client.deleted for message_id in batch) == [100, 101, 102, 103]
+    assert [len(event.responses) for event in events] == [0, 0, 1, 0]
@@ -0,0 +1,57 @@
+import asyncio
+from types import SimpleNamespace
+
+from conftest import FakeEvent
+from telebot.entities import EntityCache, TTLCache
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ttl_cache_expires_and_evicts_least_recent():
+    clock = Clock()
+    cache = TTLCache(max_entries=2, ttl=10, clock=clock)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    clock.now = 11
+    assert cache.get("a") is None
+    assert (cache.hits, cache.misses) == (1, 2)
+    assert len(cache) == 1
+
+
+def test_entity_cache_uses_update_payload_before_network():
+    cache = EntityCache()
+
+    async def scenario():
+        event = FakeEvent(sender=SimpleNamespace(id=42, username="bob", first_name="Bob"), chat=SimpleNamespace(title="T"))
+        cache.observe(event)
+        user = await cache.get_sender(event)
+        chat = await cache.get_chat(event)
+        assert (user.username, chat.title, event.lookups) == ("bob", "T", 0)
+
+    asyncio.run(scenario())
+    assert cache.users.hit_rate == 1.0
+
+
+def test_entity_cache_resolves_once_on_miss():
+    cache = EntityCache()
+
+    async def scenario():
+        first = FakeEvent()
+        assert (await cache.get_sender(first)).first_name == "Alice"
+        assert (await cache.get_chat(first)).title == "Group"
+        second = FakeEvent()
+        await cache.get_sender(second)
+        await cache.get_chat(second)
+        assert (first.lookups, second.lookups) == (2, 0)
+
+    asyncio.run(scenario())
+    assert cache.users.hit_rate == 0.5
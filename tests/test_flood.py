@@ -1,4 +1,4 @@
-from telebot.flood import FloodProtector
+from telebot.flood import FloodConfig, FloodProtector
 from telebot.rules import ActionType
 
 
@@ -24,3 +24,49 @@ def test_flood_protector_triggers_and_resets():
 def test_flood_protector_ignores_disabled_config():
     protector = FloodProtector()
     assert protector.check(99, 42, {"enabled": False}, now=0) is None
+
+
+def test_flood_protector_evicts_idle_keys_and_caps_size():
+    protector = FloodProtector(max_keys=3)
+    config = {"enabled": True, "max_messages": 5, "interval_seconds": 10}
+    for user_id in range(5):
+        protector.check(1, user_id, config, now=0)
+    assert len(protector) == 3
+    protector.check(1, 99, config, now=25)
+    assert len(protector) == 1
+
+
+def test_flood_protector_window_slides_over_interval_boundary():
+    protector = FloodProtector()
+    config = {"enabled": True, "max_messages": 3, "interval_seconds": 10}
+    for ts in (7, 8, 9):
+        assert protector.check(1, 1, config, now=ts) is None
+    # three messages late in the previous window still weigh in right after the boundary
+    assert protector.check(1, 1, config, now=10.5) is not None
+    assert protector.check(1, 2, config, now=0) is None
+    assert protector.check(1, 2, config, now=40) is None
+
+
+def test_flood_protector_reuses_parsed_config():
+    protector = FloodProtector()
+    config = {"enabled": True}
+    protector.check(1, 1, config, now=0)
+    parsed = protector._parse(config)
+    assert protector._parse(config) is parsed
+    assert protector._parse(FloodConfig(enabled=True)) is not parsed
+
+
+def test_flood_protector_evicts_short_intervals_behind_a_long_one():
+    protector = FloodProtector()
+    slow = {"enabled": True, "interval_seconds": 3600}
+    fast = {"enabled": True, "interval_seconds": 10}
+    protector.check(1, 1, slow, now=0)
+    for user_id in range(2, 50):
+        protector.check(2, user_id, fast, now=1)
+    protector.check(2, 99, fast, now=30)
+    assert sorted(protector._windows) == [(1, 1), (2, 99)]
+    # a key that keeps posting stays tracked past its first expiry
+    for ts in range(30, 100, 5):
+        protector.check(2, 99, fast, now=ts)
+    assert (2, 99) in protector._windows
+    assert len(protector._expiry) <= 3
@@ -0,0 +1,96 @@
+import asyncio
+
+from conftest import FakeEvent
+from telebot.ingress import IngressQueue
+
+
+def test_chats_are_ordered_but_do_not_block_each_other():
+    seen = []
+    release = None
+
+    async def handler(item, degraded):
+        if item == (1, 0):
+            await release.wait()
+        seen.append(item)
+
+    async def scenario():
+        nonlocal release
+        release = asyncio.Event()
+        queue = IngressQueue(handler, workers=2)
+        for index in range(3):
+            queue.submit(1, (1, index))
+            queue.submit(2, (2, index))
+        while len(seen) < 3:
+            await asyncio.sleep(0)
+        blocked = list(seen)
+        release.set()
+        await queue.close()
+        return blocked
+
+    blocked = asyncio.run(scenario())
+
+    assert blocked == [(2, 0), (2, 1), (2, 2)]
+    assert [item for item in seen if item[0] == 1] == [(1, 0), (1, 1), (1, 2)]
+
+
+def test_backlog_is_bounded_and_marks_items_degraded():
+    flags = []
+    clock = [0.0]
+
+    async def handler(item, degraded):
+        flags.append((item, degraded))
+
+    async def scenario():
+        queue = IngressQueue(handler, workers=1, max_pending=3, shed_pending=3, shed_lag=5.0, clock=lambda: clock[0])
+        accepted = [queue.submit(1, index) for index in range(4)]
+        await queue.drain()
+        clock[0] = 10.0
+        queue.submit(2, "late")
+        clock[0] = 16.0
+        await queue.close()
+        return accepted, queue.stats
+
+    accepted, stats = asyncio.run(scenario())
+
+    assert accepted == [True, True, True, False]
+    assert flags == [(0, True), (1, False), (2, False), ("late", True)]
+    assert (stats.dropped, stats.degraded, stats.processed) == (1, 2, 4)
+
+
+def test_overloaded_bot_keeps_moderating_but_skips_points_and_replies(make_app):
+    async def run(shed_pending):
+        app = make_app(ingress_shed_pending=shed_pending)
+        app.store.seed_group_config(
+            1,
+            {
+                "banned_keywords": ["广告"],
+                "auto_replies": [{"keyword": "签到", "reply": "记得每天签到"}],
+                "point_rules": [{"regex": "签到", "points": 3}],
+            },
+        )
+        event = FakeEvent("签到送广告")
+        await app.receive_message(event)
+        await app.ingress.close()
+        await app.deletions.close()
+        await app.outbound.drain()
+        return app.client.deleted, event.responses, await app.store.get_points(1, 2)
+
+    assert asyncio.run(run(shed_pending=100)) == ([(1, [10])], ["记得每天签到"], 3)
+    assert asyncio.run(run(shed_pending=1)) == ([(1, [10])], [], 0)
+
+
+def test_degraded_mode_sheds_mute_notices_and_commands(make_app):
+    async def run(degraded):
+        app = make_app()
+        app.store.seed_group_config(1, {"punishments": [{"regex": "刷单", "mute_seconds": 60, "notice": "已禁言"}]})
+        spam = FakeEvent("刷单了", message_id=11)
+        checkin = FakeEvent("/checkin", message_id=12)
+        await app.on_new_message(checkin, degraded=degraded)
+        await app.on_new_message(spam, degraded=degraded)
+        await app.deletions.close()
+        await app.outbound.drain()
+        return checkin.responses, spam.responses, await app.store.get_points(1, 2), len(app.client.muted)
+
+    checkin, notices, points, mutes = asyncio.run(run(degraded=False))
+    assert checkin and notices == ["已禁言"] and points == 5 and mutes == 1
+    assert asyncio.run(run(degraded=True)) == ([], [], 0, 1)
@@ -0,0 +1,36 @@
+import random
+import re
+
+from telebot.keywords import KeywordAutomaton, fold_text
+
+
+def test_automaton_reports_overlapping_keywords():
+    automaton = KeywordAutomaton([("he", "a"), ("she", "b"), ("hers", "c"), ("his", "d")])
+    assert automaton.search("USHERS") == {"a", "b", "c"}
+    assert automaton.search("nothing here") == {"a"}
+    assert automaton.search("xyz") == set()
+
+
+def test_automaton_handles_cjk_and_case_variants():
+    automaton = KeywordAutomaton([("广告", 0), ("Spam", 1), ("straße", 2), ("ΣΊΣΥΦΟΣ", 3)])
+    assert automaton.search("这是广告消息") == {0}
+    assert automaton.search("SPAM here") == {1}
+    assert automaton.search("STRAẞE") == {2}
+    assert automaton.search("σίσυφος") == {3}
+
+
+def test_automaton_agrees_with_ignorecase_regex():
+    rng = random.Random(7)
+    alphabet = "abcABCſıİKkσςΣ广告ß "
+    keywords = ["".join(rng.choice(alphabet) for _ in range(rng.randint(1, 3))) for _ in range(60)]
+    automaton = KeywordAutomaton((keyword, index) for index, keyword in enumerate(keywords))
+    patterns = [re.compile(re.escape(keyword), re.IGNORECASE) for keyword in keywords]
+    for _ in range(300):
+        text = "".join(rng.choice(alphabet) for _ in range(rng.randint(0, 12)))
+        expected = {index for index, pattern in enumerate(patterns) if pattern.search(text)}
+        assert automaton.search(text) == expected, text
+
+
+def test_fold_text_keeps_ascii_fast_path_consistent():
+    assert fold_text("HeLLo") == "hello"
+    assert fold_text("ſ") == fold_text("S")
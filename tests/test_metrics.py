@@ -0,0 +1,74 @@
+import asyncio
+
+from conftest import FakeEvent
+from telebot.metrics import MetricsRegistry, MetricsServer
+
+
+def test_registry_renders_histograms_counters_and_collectors():
+    metrics = MetricsRegistry(buckets=(0.01, 0.1))
+    metrics.observe("match", 0.005)
+    metrics.observe("match", 0.05)
+    metrics.observe("match", 1.0)
+    metrics.inc("telebot_rule_hits_total", rule='say "hi"')
+    metrics.inc("telebot_rule_hits_total", rule='say "hi"')
+    metrics.register_collector("telebot_cache_requests_total", "counter", "Cache lookups.", lambda: [({"cache": "engine"}, 3)])
+
+    text = metrics.render()
+    assert 'telebot_stage_seconds_bucket{stage="match",le="0.01"} 1' in text
+    assert 'telebot_stage_seconds_bucket{stage="match",le="0.1"} 2' in text
+    assert 'telebot_stage_seconds_bucket{stage="match",le="+Inf"} 3' in text
+    assert 'telebot_rule_hits_total{rule="say \\"hi\\""} 2' in text
+    assert 'telebot_cache_requests_total{cache="engine"} 3' in text
+
+
+def test_counter_label_sets_are_capped():
+    metrics = MetricsRegistry(max_series=3)
+    for index in range(10):
+        metrics.inc("telebot_rule_hits_total", rule=f"points:user regex {index}")
+    series = metrics.counters["telebot_rule_hits_total"]
+    assert len(series) == 4
+    assert series[(("rule", "other"),)] == 7
+
+
+def test_disabled_registry_records_nothing(make_app):
+    metrics = MetricsRegistry(enabled=False)
+    with metrics.time("match"):
+        pass
+    metrics.inc("telebot_rule_hits_total", rule="spam")
+    assert metrics.stages == {} and metrics.counters == {}
+    assert make_app().metrics.enabled is False
+
+
+def test_application_records_stages_rule_hits_and_serves_endpoint(make_app):
+    app = make_app(metrics_port=9464)
+    app.store.seed_group_config(1, {"banned_keywords": ["广告"]})
+
+    async def scenario():
+        await app.on_new_message(FakeEvent("买广告"))
+        await app.on_new_message(FakeEvent("hello", message_id=11))
+        await app.deletions.close()
+        await app.outbound.drain()
+
+        server = MetricsServer(app.metrics, port=0)
+        await server.start()
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", server.port)
+            writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+            await writer.drain()
+            response = (await reader.read()).decode()
+            writer.close()
+        finally:
+            await server.close()
+        return response
+
+    response = asyncio.run(scenario())
+    assert response.startswith("HTTP/1.1 200 OK")
+    assert 'telebot_stage_seconds_count{stage="match"} 2' in response
+    assert 'telebot_stage_seconds_count{stage="telegram.delete_messages"} 1' in response
+    assert 'telebot_rule_hits_total{rule="banned_keywords[0]"} 1' in response
+    assert 'telebot_cache_requests_total{cache="config",result="hit"} 1' in response
+    assert 'telebot_cache_requests_total{cache="snapshot",result="compiled"} 1' in response
+    assert 'telebot_audit{value="queue_depth"} 0' in response
+    assert 'telebot_points{value="pending_keys"} 0' in response
+    assert 'telebot_outbound{value="completed"} 1' in response
+    assert 'telebot_outbound{value="lanes"}' in response
@@ -0,0 +1,35 @@
+from telebot.normalize import NormalizedText, compact, fold, skeleton
+from telebot.rules import RuleEngine
+
+
+def test_views_fold_width_case_zero_width_homoglyphs_and_spaces():
+    text = "ＦＲＥＥ m​оnеy"  # full-width, zero-width space, Cyrillic о/е
+    assert fold(text) == "free mоnеy"
+    assert skeleton(text) == "free money"
+    assert compact("f r е e  money") == "freemoney"
+    normalized = NormalizedText(text)
+    assert normalized.view("raw") is text
+    assert normalized.view("skeleton") is normalized.view("skeleton")
+
+
+def test_rules_match_on_their_chosen_view():
+    engine = RuleEngine.from_config(
+        {
+            "banned_keywords": ["spam", {"keyword": "Free Money", "match_on": "compact"}],
+            "punishments": [{"regex": r"casino\d+", "match_on": "skeleton"}],
+        }
+    )
+    names = lambda text: [match.rule.name for match in engine.match(text)]
+    assert names("ＳＰＡＭ") == []  # raw rules keep the previous behaviour
+    assert names("spam") == ["ban:spam"]
+    assert names("f r e e   m​оney now") == ["ban:Free Money"]
+    assert names("visit саsino777") == [r"punish:casino\d+"]
+
+
+def test_default_views_leave_matching_unchanged():
+    config = {"banned_keywords": ["广告"], "point_rules": [{"regex": "签到"}]}
+    engine = RuleEngine.from_config(config)
+    assert all(rule.match_on == "raw" for rule in engine.rules)
+    for text in ["广告", "ＡＤ 广 告", "签到 广告"]:
+        assert [m.rule.name for m in engine.match(text)] == [m.rule.name for m in engine.match(NormalizedText(text))]
+        assert [m.rule.name for m in engine.match(text)] == [rule.name for rule in engine.rules if rule.matches(text)]
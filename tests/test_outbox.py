@@ -0,0 +1,167 @@
+import asyncio
+import json
+
+import httpx
+
+from telebot.outbox import DEAD_LETTER_FILE, CircuitBreaker, Outbox
+
+
+def test_store_delivers_through_outbox_despite_flaky_backend(postgrest, tmp_path):
+    failures = {"left": 4}
+
+    def flaky(request):
+        if request.method == "POST" and failures["left"]:
+            failures["left"] -= 1
+            if failures["left"] % 2:
+                raise httpx.ConnectError("connection reset", request=request)
+            return httpx.Response(503)
+        return postgrest(request)
+
+    delivered = []
+    postgrest.rpcs["increment_points_batch"] = lambda body: delivered.extend(body["deltas"])
+    store = postgrest.store(outbox_path=str(tmp_path), outbox_max_backoff_seconds=0.01, points_flush_seconds=0.01)
+    store._client._transport = httpx.MockTransport(flaky)
+
+    async def scenario():
+        for message_id in range(3):
+            await store.record_action(1, 2, "delete", {"message_id": message_id})
+            await store.record_action(2, 3, "delete", {"message_id": message_id})
+        await store.increment_points(1, 2, 5)
+        await store.close()
+
+    asyncio.run(scenario())
+    logs = postgrest.tables["action_logs"]
+    for chat_id in (1, 2):
+        assert [row["payload"]["message_id"] for row in logs if row["chat_id"] == chat_id] == [0, 1, 2]
+    assert delivered == [{"chat_id": 1, "user_id": 2, "delta": 5}]
+    assert failures["left"] == 0
+    assert store.outbox.backlog_bytes == 0
+
+
+def test_undelivered_records_survive_a_restart_across_segments(tmp_path):
+    async def failing(kind, items):
+        raise RuntimeError("backend down")
+
+    async def first_run():
+        outbox = Outbox(tmp_path, failing, segment_bytes=64, base_backoff=0.01)
+        for index in range(6):
+            outbox.append("action_logs", [{"n": index}])
+        await outbox.close(timeout=0.05)
+
+    received = []
+
+    async def deliver(kind, items):
+        received.extend(item["n"] for item in items)
+
+    async def second_run():
+        outbox = Outbox(tmp_path, deliver, segment_bytes=64)
+        outbox.append("action_logs", [{"n": 6}])
+        await outbox.close()
+        return outbox
+
+    asyncio.run(first_run())
+    assert len(list(tmp_path.glob("*.log"))) > 1
+    outbox = asyncio.run(second_run())
+    assert received == list(range(7))
+    assert len(list(tmp_path.glob("*.log"))) == 1
+    assert outbox.backlog_bytes == 0
+
+
+def test_circuit_breaker_opens_then_allows_a_trial_call():
+    clock = [0.0]
+    breaker = CircuitBreaker(failure_threshold=2, reset_timeout=10, clock=lambda: clock[0])
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open" and breaker.retry_in() == 10
+    clock[0] = 10
+    assert breaker.state == "half_open"
+    breaker.record_success()
+    assert breaker.state == "closed"
+
+
+def test_non_retryable_errors_do_not_block_the_log(tmp_path):
+    received = []
+
+    async def deliver(kind, items):
+        if kind == "bad":
+            raise ValueError("rejected")
+        received.extend(items)
+
+    async def scenario():
+        outbox = Outbox(tmp_path, deliver, retryable=lambda exc: not isinstance(exc, ValueError))
+        outbox.append("good", [1])
+        outbox.append("bad", [2])
+        outbox.append("good", [3])
+        await outbox.close()
+        return outbox
+
+    outbox = asyncio.run(scenario())
+    assert received == [1, 3]
+    assert outbox.stats.dead_lettered == 1
+    dead = [json.loads(line) for line in (tmp_path / DEAD_LETTER_FILE).read_text().splitlines()]
+    assert dead[0]["items"] == [2] and dead[0]["error"] == "rejected"
+
+
+def test_backlog_is_replayed_when_the_outbox_opens(tmp_path):
+    async def failing(kind, items):
+        raise OSError("backend down")
+
+    async def first_run():
+        outbox = Outbox(tmp_path, failing, base_backoff=0.01)
+        outbox.append("action_logs", [1, 2])
+        await outbox.close(timeout=0.02)
+
+    received = []
+
+    async def deliver(kind, items):
+        received.extend(items)
+
+    async def second_run():
+        outbox = Outbox(tmp_path, deliver)
+        await asyncio.wait_for(outbox._drained(), 1)
+        await outbox.close()
+
+    asyncio.run(first_run())
+    asyncio.run(second_run())
+    assert received == [1, 2]
+
+
+def test_store_dead_letters_payloads_that_cannot_succeed(postgrest, tmp_path):
+    store = postgrest.store(outbox_path=str(tmp_path))
+
+    async def scenario():
+        store.outbox.append("unknown_kind", [{"n": 1}])
+        await store.record_action(1, 2, "delete", {"message_id": 7})
+        await store.close()
+
+    asyncio.run(scenario())
+    assert store.outbox.stats.dead_lettered == 1
+    assert [row["payload"]["message_id"] for row in postgrest.tables["action_logs"]] == [7]
+
+
+def test_corrupt_lines_are_dead_lettered_and_worker_failures_logged(tmp_path, caplog):
+    received = []
+
+    async def deliver(kind, items):
+        received.extend(items)
+
+    async def scenario():
+        outbox = Outbox(tmp_path, deliver)
+        outbox.append("good", [1])
+        outbox._writer.write(b'{"kind": "good", "it\n[]\n')
+        outbox.append("good", [3])
+        await asyncio.wait_for(outbox._drained(), 1)
+        outbox._read_batch = lambda: 1 / 0
+        outbox.append("good", [4])
+        await asyncio.sleep(0.05)
+        assert outbox._task is None
+        await outbox.close()
+        return outbox
+
+    outbox = asyncio.run(scenario())
+    assert received == [1, 3]
+    assert outbox.stats.corrupt == 2
+    dead = [json.loads(line) for line in (tmp_path / DEAD_LETTER_FILE).read_text().splitlines()]
+    assert [entry["raw"] for entry in dead] == ['{"kind": "good", "it', "[]"]
+    assert "outbox worker stopped" in caplog.text
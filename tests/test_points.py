@@ -0,0 +1,111 @@
+import asyncio
+import json
+
+import httpx
+
+from telebot.points import PointsLedger
+
+
+def test_awards_are_coalesced_into_one_batch_rpc(make_store):
+    calls = []
+    balances = {(1, 7): 10}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/rpc/increment_points_batch"):
+            body = json.loads(request.content)
+            calls.append(body["deltas"])
+            for row in body["deltas"]:
+                key = (row["chat_id"], row["user_id"])
+                balances[key] = balances.get(key, 0) + row["delta"]
+            return httpx.Response(200, json=None)
+        user_id = int(request.url.params["user_id"].removeprefix("eq."))
+        return httpx.Response(200, json=[{"balance": balances.get((1, user_id), 0)}])
+
+    store = make_store(handler, points_flush_seconds=60)
+
+    async def scenario():
+        for _ in range(5):
+            await store.increment_points(1, 7, 2)
+        await store.increment_points(1, 8, 1)
+        # /me reads through deltas that are not flushed yet
+        assert await store.get_points(1, 7) == 20
+        assert calls == []
+        await store.close()
+
+    asyncio.run(scenario())
+    assert calls == [[{"chat_id": 1, "user_id": 7, "delta": 10}, {"chat_id": 1, "user_id": 8, "delta": 1}]]
+    assert balances[(1, 7)] == 20
+
+
+def test_failed_flush_keeps_deltas_for_retry():
+    attempts = []
+
+    async def sink(deltas):
+        attempts.append([delta.as_dict() for delta in deltas])
+        if len(attempts) == 1:
+            raise RuntimeError("backend down")
+
+    async def scenario():
+        ledger = PointsLedger(sink, flush_interval=60, close_retries=1)
+        ledger.add(1, 2, 3)
+        assert await ledger.flush() is False
+        ledger.add(1, 2, 4)
+        assert ledger.pending_delta(1, 2) == 7
+        await ledger.close()
+        assert ledger.pending_delta(1, 2) == 0
+
+    asyncio.run(scenario())
+    assert attempts[-1] == [{"chat_id": 1, "user_id": 2, "delta": 7}]
+
+
+def test_ledger_flushes_on_interval_in_chunks():
+    batches = []
+
+    async def sink(deltas):
+        batches.append(len(deltas))
+
+    async def scenario():
+        ledger = PointsLedger(sink, flush_interval=0.01, batch_size=2)
+        ledger.start()
+        for user_id in range(5):
+            ledger.add(1, user_id, 1)
+        await asyncio.sleep(0.05)
+        assert batches == [2, 2, 1]
+        await ledger.close()
+
+    asyncio.run(scenario())
+
+
+def test_balance_includes_deltas_waiting_in_the_outbox(make_store, tmp_path):
+    backend = {"up": False, "balance": 10}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path.endswith("/rpc/increment_points_batch"):
+            if not backend["up"]:
+                return httpx.Response(503)
+            backend["balance"] += sum(row["delta"] for row in json.loads(request.content)["deltas"])
+            return httpx.Response(200, json=None)
+        return httpx.Response(200, json=[{"balance": backend["balance"]}])
+
+    settings = dict(outbox_path=str(tmp_path), points_flush_seconds=60, outbox_max_backoff_seconds=0.01)
+
+    async def first_run():
+        store = make_store(handler, **settings)
+        await store.increment_points(1, 7, 5)
+        await store.points_ledger.flush()
+        assert await store.get_points(1, 7) == 15
+        await store.close()
+
+    async def second_run():
+        store = make_store(handler, **settings)
+        assert await store.get_points(1, 7) == 15  # counted from the backlog on disk
+        backend["up"] = True
+        store.open_outbox()
+        await asyncio.wait_for(store.outbox._drained(), 1)
+        balance = await store.get_points(1, 7)
+        await store.close()
+        return balance
+
+    asyncio.run(first_run())
+    assert asyncio.run(second_run()) == 15
+    assert backend["balance"] == 15
@@ -0,0 +1,95 @@
+import asyncio
+import logging
+
+import httpx
+import pytest
+
+from telebot.config import Settings
+from telebot.deadline import DeadlineExceeded, deadline
+from telebot.supabase import SupabaseConfigStore
+
+
+def test_client_uses_pool_and_timeout_settings(caplog):
+    settings = Settings(
+        supabase_url="https://example.supabase.co",
+        supabase_service_role_key="service",
+        supabase_max_connections=7,
+        supabase_connect_timeout=1.5,
+        supabase_read_timeout=4,
+        supabase_http2=True,
+    )
+    store = SupabaseConfigStore(settings)
+    with caplog.at_level(logging.WARNING):
+        client = store.client
+    assert (client.timeout.connect, client.timeout.read, client.timeout.pool) == (1.5, 4, 2.0)
+    assert client._transport._pool._max_connections == 7
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        assert "h2 package is missing" in caplog.text
+    asyncio.run(client.aclose())
+
+
+def test_config_miss_gives_up_at_deadline_but_refresh_completes(make_store):
+    async def slow(request):
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=[{"chat_id": 1, "payload": {"banned_keywords": ["spam"]}}])
+
+    store = make_store(slow)
+
+    async def scenario():
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        with deadline(0.05), pytest.raises(DeadlineExceeded):
+            await store.fetch_group_config(1)
+        assert loop.time() - started < 0.15
+        await asyncio.sleep(0.3)
+        assert await store.fetch_group_config(1) == {"banned_keywords": ["spam"]}
+        await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_shared_refresh_ignores_the_budget_of_the_message_that_started_it(make_store):
+    async def slow(request):
+        assert "timeout" not in request.extensions or request.extensions["timeout"]["read"] > 1
+        await asyncio.sleep(0.2)
+        return httpx.Response(200, json=[{"chat_id": 1, "payload": {"banned_keywords": ["spam"]}}])
+
+    store = make_store(slow)
+
+    async def impatient():
+        with deadline(0.05), pytest.raises(DeadlineExceeded):
+            await store.fetch_group_config(1)
+
+    async def patient():
+        await asyncio.sleep(0.01)
+        with deadline(5):
+            return await store.fetch_group_config(1)
+
+    async def scenario():
+        _, payload = await asyncio.gather(impatient(), patient())
+        await store.close()
+        return payload
+
+    assert asyncio.run(scenario()) == {"banned_keywords": ["spam"]}
+    assert store.cache_stats(1).refresh_failures == 0
+
+
+def test_budgeted_reads_are_capped_and_pool_usage_is_tracked(make_store):
+    async def slow(request):
+        assert request.extensions["timeout"]["read"] <= 0.5
+        await asyncio.sleep(0.05)
+        return httpx.Response(200, json=[{"balance": 3}])
+
+    store = make_store(slow)
+
+    async def scenario():
+        with deadline(0.5):
+            balances = await asyncio.gather(*(store.get_points(1, user_id) for user_id in range(4)))
+        await store.close()
+        return balances
+
+    assert asyncio.run(scenario()) == [3, 3, 3, 3]
+    stats = store.pool_stats
+    assert (stats.requests, stats.in_flight, stats.peak_in_flight) == (4, 0, 4)
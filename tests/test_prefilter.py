@@ -0,0 +1,69 @@
+import random
+import re
+
+from telebot.prefilter import can_combine, chunk_combinable, required_literals
+from telebot.rules import RuleEngine
+
+
+def literals(pattern: str):
+    return required_literals(re.compile(pattern, re.IGNORECASE))
+
+
+def test_required_literals_extracts_longest_run():
+    assert literals(r"buy\s+CHEAP\s+pills") == frozenset({"cheap"})
+    assert literals(r"(free|bonus) money") == frozenset({" money"})
+    assert literals(r"(?:free|bonus)\d+") == frozenset({"free", "bonus"})
+    assert literals(r"(?:ab)+c") == frozenset({"ab"})
+    assert literals(r"加(群|微)信号") == frozenset({"信号"})
+
+
+def test_required_literals_rejects_optional_or_short_fragments():
+    assert literals(r"\d{5,}") is None
+    assert literals(r"(?:spam)?\w+") is None
+    assert literals(r"a.b") is None
+    assert literals(r"(?:foo|)bar") == frozenset({"bar"})
+    assert literals(r"(?:foo|x)\d") is None
+
+
+def test_group_references_and_inline_flags_are_not_combined():
+    assert can_combine(re.compile(r"\d+", re.IGNORECASE))
+    assert not can_combine(re.compile(r"(a)\1", re.IGNORECASE))
+    assert not can_combine(re.compile(r"(?P<word>\w+)", re.IGNORECASE))
+    assert not can_combine(re.compile(r"(?s)a.b", re.IGNORECASE))
+
+
+def test_chunk_combinable_groups_compatible_patterns():
+    patterns = [re.compile(source, re.IGNORECASE) for source in (r"\d{3}", r"(x)\1", r"[a-c]{4}", r"^\s")]
+    groups, plain = chunk_combinable(enumerate(patterns))
+    assert [indices for _, indices in groups] == [[0, 2, 3]]
+    assert plain == [1]
+
+
+FRAGMENTS = [
+    "spam", "SPAM", "广告", "ab", "a", r"\d", r"\d+", r"\w{2}", r"\s", ".", "[xy]", "(?:ab|cd)",
+    "(ab)", "(?:签到|打卡)", "x?", "(?:z)*", r"\b", "^", "$", "(?=ab)", "(?!x)", r"ſt", "İ", "(?-i:Ab)",
+    "[^a]", "(?:ab)+", "k",
+]
+ALPHABET = "abcdxyzkKSPAM签到打卡广告ſıİ 1234"
+
+
+def random_pattern(rng: random.Random) -> str:
+    return "".join(rng.choice(FRAGMENTS) for _ in range(rng.randint(1, 4)))
+
+
+def test_engine_matches_naive_rule_loop():
+    rng = random.Random(1234)
+    for round_index in range(40):
+        count = rng.randint(1, 80)
+        config = {
+            "banned_keywords": ["".join(rng.choice(ALPHABET) for _ in range(3)) for _ in range(rng.randint(0, 40))],
+            "punishments": [{"regex": random_pattern(rng)} for _ in range(count // 2)],
+            "point_rules": [{"regex": random_pattern(rng), "points": 1} for _ in range(count - count // 2)],
+        }
+        config["punishments"].append({"regex": r"(a)\1"})
+        engine = RuleEngine.from_config(config)
+        for _ in range(50):
+            text = "".join(rng.choice(ALPHABET) for _ in range(rng.randint(0, 20)))
+            expected = [rule.name for rule in engine.rules if rule.matches(text)]
+            actual = [match.rule.name for match in engine.match(text)]
+            assert actual == expected, (round_index, text)
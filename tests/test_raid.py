@@ -0,0 +1,73 @@
+from telebot.raid import RaidDetector
+
+CONFIG = {
+    "enabled": True,
+    "max_joins": 3,
+    "max_new_senders": 2,
+    "interval_seconds": 10,
+    "lockdown_seconds": 60,
+    "restrict_seconds": 600,
+    "notice": "raid",
+}
+
+
+def test_join_flood_triggers_lockdown_with_recent_joiners():
+    detector = RaidDetector()
+    assert detector.record_join(1, 100, CONFIG, now=0) is None
+    for user_id, ts in ((101, 1), (102, 2)):
+        assert detector.record_join(1, user_id, CONFIG, now=ts) is None
+    alert = detector.record_join(1, 103, CONFIG, now=3)
+    assert alert is not None
+    assert alert.reason == "joins"
+    assert alert.suspects == [100, 101, 102, 103]
+    assert alert.restrict_seconds == 600
+    assert detector.lockdown_restriction(1, now=30) == 600
+    # further joins during the lockdown do not raise a second alert
+    for user_id in range(200, 210):
+        assert detector.record_join(1, user_id, CONFIG, now=4) is None
+    assert detector.lockdown_restriction(1, now=200) is None
+
+
+def test_slow_joins_do_not_trigger():
+    detector = RaidDetector()
+    for user_id in range(10):
+        assert detector.record_join(1, user_id, CONFIG, now=user_id * 20) is None
+    assert not detector.in_lockdown(1, now=200)
+
+
+def test_burst_of_messages_from_new_members_triggers_lockdown():
+    detector = RaidDetector()
+    for user_id, ts in ((1, 0), (2, 20), (3, 40)):
+        detector.record_join(5, user_id, CONFIG, now=ts)
+    assert detector.record_message(5, 99, CONFIG, now=41) is None  # long-standing member
+    assert detector.record_message(5, 1, CONFIG, now=42) is None
+    assert detector.record_message(5, 2, CONFIG, now=43) is None
+    alert = detector.record_message(5, 3, CONFIG, now=44)
+    assert alert is not None and alert.reason == "messages"
+    assert set(alert.suspects) == {1, 2, 3}
+    assert detector.is_recent_member(5, 2)
+
+
+def test_disabled_config_is_ignored():
+    detector = RaidDetector()
+    for user_id in range(50):
+        assert detector.record_join(1, user_id, {"enabled": False}, now=0) is None
+    assert detector.record_join(1, 1, None, now=0) is None
+
+
+def test_chat_state_is_dropped_once_its_windows_empty():
+    detector = RaidDetector()
+    config = dict(CONFIG, new_member_seconds=100)
+    for chat_id in range(20):
+        detector.record_join(chat_id, 1, config, now=0)
+    detector.record_join(99, 1, config, now=50)
+    assert len(detector) == 21
+    for user_id in (2, 3, 4, 5):
+        detector.record_join(98, user_id, config, now=60)
+    assert detector.record_join(97, 1, config, now=101) is None
+    assert sorted(detector._chats) == [97, 98, 99]
+    assert detector.in_lockdown(98, now=101)
+    assert detector.is_recent_member(99, 1)
+    detector.record_join(97, 2, config, now=200)
+    assert sorted(detector._chats) == [97]
+    assert detector.lockdown_restriction(98, now=200) is None
@@ -0,0 +1,64 @@
+import asyncio
+import re
+
+from telebot.prefilter import RISK_FLAGGED, RISK_REJECTED, RISK_SAFE, backtracking_risk
+from telebot.regex_guard import RegexGuard
+from telebot.rules import RuleEngine
+
+
+def risk(pattern: str) -> str:
+    return backtracking_risk(re.compile(pattern, re.IGNORECASE)).level
+
+
+def test_backtracking_risk_levels():
+    for pattern in (r"(a+)+$", r"(\w+\s?)*$", r"(a{1,5})+", r"(x+x+)+y"):
+        assert risk(pattern) == RISK_REJECTED, pattern
+    for pattern in (r"(a+b)+", r"\d+\d+", r".*.*x", r"(a|aa)+$", r"(\w)\1"):
+        assert risk(pattern) == RISK_FLAGGED, pattern
+    for pattern in (r"加.*微信", r"\d+\s+", r"\s*\S+\s*", r"(ab|cd)+", r"(?:x+)++", r"积分\s*\+\s*(\d+)"):
+        assert risk(pattern) == RISK_SAFE, pattern
+
+
+def test_engine_rejects_exponential_and_guards_flagged_patterns():
+    engine = RuleEngine.from_config(
+        {
+            "punishments": [{"regex": r"(a+)+$"}, {"regex": r"\d+\d+元"}],
+            "point_rules": [{"regex": "签到", "guarded": True}, {"regex": "打卡"}],
+        }
+    )
+
+    assert [rule.name for rule in engine.rules] == ["punish:\\d+\\d+元", "points:签到", "points:打卡"]
+    assert engine.rejected == [("punishments[0]", "nested quantifier over the same text")]
+    assert [rule.guarded for rule in engine.rules] == [True, True, False]
+    assert [match.rule.name for match in engine.match("签到 打卡 100元")] == [rule.name for rule in engine.rules]
+
+
+def test_amatch_runs_guarded_rules_in_workers_and_accounts_cost():
+    engine = RuleEngine.from_config({"point_rules": [{"regex": "签到", "guarded": True}, {"regex": "打卡"}]})
+    slow = re.compile(r"(x+x+)+y")
+
+    async def scenario():
+        guard = RegexGuard(workers=1, timeout=0.2, max_strikes=2, max_rules=3)
+        try:
+            matches = await engine.amatch("今日签到打卡", guard)
+            skipped = await engine.amatch("hello", guard)
+            timed_out = [await guard.search("slow", slow, "x" * 40)]
+            assert (len(guard._all), len(guard._replacing)) == (0, 1)  # respawned off the loop
+            timed_out += [await guard.search("slow", slow, "x" * 40) for _ in range(2)]
+            recovered = await guard.search("fast", re.compile("ok"), "ok")
+            # suspension follows the pattern, the accounting past ``max_rules`` names goes to "other"
+            assert await guard.search("punishments[7]", slow, "x" * 40) is False
+        finally:
+            await guard.close()
+        return matches, skipped, timed_out, recovered, guard.costs
+
+    matches, skipped, timed_out, recovered, costs = asyncio.run(scenario())
+
+    assert [match.rule.name for match in matches] == ["points:签到", "points:打卡"]
+    assert skipped == []
+    assert costs["point_rules[0]"].calls == 1  # "hello" lacks the literal and never reached a worker
+    assert timed_out == [False, False, False]
+    assert (costs["slow"].timeouts, costs["slow"].skipped) == (2, 1)
+    assert recovered is True
+    assert sorted(costs) == ["fast", "other", "point_rules[0]", "slow"]
+    assert (costs["other"].calls, costs["other"].skipped) == (0, 1)
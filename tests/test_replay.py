@@ -0,0 +1,68 @@
+import json
+
+from telebot.replay import Replayer, format_report, main, read_messages
+
+CONFIG = {
+    "banned_keywords": ["广告"],
+    "point_rules": [{"regex": "签到", "points": 2}],
+    "flood_control": {"enabled": True, "max_messages": 2, "interval_seconds": 10, "mute_seconds": 60},
+}
+
+
+def write_jsonl(path, records):
+    path.write_text("\n".join(json.dumps(record, ensure_ascii=False) for record in records) + "\n", encoding="utf-8")
+
+
+def test_replay_counts_rules_actions_and_flood(tmp_path):
+    export = tmp_path / "messages.jsonl"
+    write_jsonl(
+        export,
+        [
+            {"chat_id": 1, "user_id": 1, "text": "这是广告", "date": 100},
+            {"chat_id": 1, "user_id": 2, "text": "今日签到", "date": 101},
+            {"chat_id": 1, "user_id": 3, "text": "hello", "date": 102},
+            {"chat_id": 1, "user_id": 3, "text": "hello", "date": 103},
+            {"chat_id": 1, "user_id": 3, "text": "又是广告", "date": 104},
+            {"chat_id": 1, "user_id": 4, "text": ""},
+        ],
+    )
+
+    report = Replayer(CONFIG, samples=1).run(read_messages(export), chunk_size=2)
+
+    assert report.messages == 5
+    assert report.flood_mutes == 1
+    assert report.rule_hits["ban:广告"] == 1
+    assert report.rule_hits["points:签到"] == 1
+    assert report.deleted == 1
+    assert report.points_awarded == 2
+    assert report.samples["ban:广告"] == ["这是广告"]
+    assert "ban:广告" in format_report(report)
+
+
+def test_csv_export_with_iso_dates(tmp_path):
+    export = tmp_path / "messages.csv"
+    export.write_text(
+        "chat_id,user_id,text,date\n1,1,\"广告, 便宜\",2024-01-01T00:00:00Z\n1,2,签到,2024-01-01T00:00:05+00:00\n",
+        encoding="utf-8",
+    )
+
+    messages = list(read_messages(export))
+
+    assert [message.text for message in messages] == ["广告, 便宜", "签到"]
+    assert messages[1].timestamp - messages[0].timestamp == 5
+
+
+def test_process_pool_matches_inline_results(tmp_path, capsys):
+    export = tmp_path / "messages.jsonl"
+    write_jsonl(export, [{"chat_id": 1, "user_id": index, "text": "广告" if index % 3 == 0 else "签到"} for index in range(60)])
+    config = tmp_path / "config.json"
+    config.write_text(json.dumps(CONFIG, ensure_ascii=False), encoding="utf-8")
+    output = tmp_path / "report.json"
+
+    assert main([str(config), str(export), "--workers", "2", "--chunk-size", "7", "--json", str(output)]) == 0
+
+    report = json.loads(output.read_text(encoding="utf-8"))
+    inline = Replayer(CONFIG).run(read_messages(export), chunk_size=7)
+    assert report["rule_hits"] == dict(inline.rule_hits)
+    assert report["messages"] == 60
+    assert "msgs/s" in capsys.readouterr().out
@@ -27,3 +27,38 @@ def test_auto_reply_and_points_can_trigger_together():
     action_types = {match.action.type for match in matches}
     assert ActionType.REPLY in action_types
     assert ActionType.ADD_POINTS in action_types
+
+
+def test_malformed_rule_is_rejected_without_dropping_the_rest():
+    config = {
+        "banned_keywords": ["spam", {"keyword": "scam", "match_on": "bogus"}],
+        "punishments": [{"regex": "([unclosed"}, {"regex": r"buy\s+now", "mute_seconds": 30}],
+        "point_rules": [{"points": 3}],
+    }
+    engine = RuleEngine.from_config(config)
+    assert [rule.name for rule in engine.rules] == ["ban:spam", "punish:buy\\s+now"]
+    assert [name for name, _ in engine.rejected] == ["banned_keywords[1]", "punishments[0]", "point_rules[0]"]
+    assert engine.match("spam, buy now")
+
+
+def test_keyword_and_regex_rules_keep_config_order():
+    config = {
+        "point_rules": [{"regex": r"hello", "points": 1}],
+        "banned_keywords": ["HELLO"],
+        "auto_replies": [{"keyword": "hello", "reply": "hi"}],
+    }
+    engine = RuleEngine.from_config(config)
+    names = [match.rule.name for match in engine.match("Hello there")]
+    assert names == ["ban:HELLO", "reply:hello", "points:hello"]
+
+
+def test_large_keyword_lists_match_through_automaton():
+    keywords = [f"word{index}" for index in range(RuleEngine.automaton_threshold * 2)]
+    config = {
+        "banned_keywords": keywords,
+        "auto_replies": [{"keyword": "WORD7", "reply": "seven"}],
+        "point_rules": [{"regex": r"word\d+", "points": 1}],
+    }
+    engine = RuleEngine.from_config(config)
+    names = [match.rule.name for match in engine.match("say Word7 and word12")]
+    assert names == ["ban:word1", "ban:word7", "ban:word12", "reply:WORD7", "points:word\\d+"]
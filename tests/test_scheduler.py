@@ -0,0 +1,145 @@
+import asyncio
+import time
+
+from telethon.errors.rpcerrorlist import FloodWaitError
+
+from telebot.scheduler import OutboundScheduler, Priority
+
+
+def recorder(log, name, result=None):
+    async def action():
+        log.append(name)
+        return result
+
+    return action
+
+
+def test_moderation_runs_before_cosmetic_jobs():
+    async def scenario():
+        log = []
+        scheduler = OutboundScheduler(concurrency=1)
+        scheduler.submit(1, Priority.COSMETIC, recorder(log, "reply-1"))
+        scheduler.submit(1, Priority.COSMETIC, recorder(log, "reply-2"))
+        delete = scheduler.submit(1, Priority.MODERATION, recorder(log, "delete", result="ok"))
+        await scheduler.drain()
+        assert log == ["delete", "reply-1", "reply-2"]
+        assert delete.result() == "ok"
+        await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_busy_chat_does_not_block_other_chats():
+    async def scenario():
+        log = []
+        scheduler = OutboundScheduler(chat_rates={Priority.MODERATION: (10, 10), Priority.COSMETIC: (0.5, 1)})
+        scheduler.submit(1, Priority.COSMETIC, recorder(log, "chat1-a"))
+        scheduler.submit(1, Priority.COSMETIC, recorder(log, "chat1-b"))
+        scheduler.submit(2, Priority.COSMETIC, recorder(log, "chat2-a"))
+        await asyncio.sleep(0.05)
+        assert log == ["chat1-a", "chat2-a"]
+        assert scheduler.pending == 1
+        await scheduler.close(timeout=0)
+
+    asyncio.run(scenario())
+
+
+def test_flood_wait_pauses_and_retries():
+    async def scenario():
+        calls = []
+
+        async def flaky():
+            calls.append(time.monotonic())
+            if len(calls) == 1:
+                raise FloodWaitError(request=None, capture=1)
+            return "sent"
+
+        scheduler = OutboundScheduler()
+        future = scheduler.submit(1, Priority.MODERATION, flaky)
+        assert await asyncio.wait_for(future, 3) == "sent"
+        assert calls[1] - calls[0] >= 0.9
+        assert scheduler.stats.flood_waits == 1
+        await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_overload_sheds_cosmetic_work_first():
+    async def scenario():
+        log = []
+        scheduler = OutboundScheduler(max_pending=2)
+        first = scheduler.submit(1, Priority.COSMETIC, recorder(log, "reply-1"))
+        second = scheduler.submit(1, Priority.COSMETIC, recorder(log, "reply-2"))
+        dropped = scheduler.submit(1, Priority.COSMETIC, recorder(log, "reply-3"))
+        assert dropped.done() and dropped.result() is None
+        scheduler.submit(1, Priority.MODERATION, recorder(log, "delete"))
+        assert second.done()
+        await scheduler.drain()
+        assert first.done()
+        assert log == ["delete", "reply-1"]
+        assert scheduler.stats.shed == 2
+        await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_drain_waits_for_jobs_waiting_on_a_slot():
+    async def scenario():
+        log = []
+
+        async def slow():
+            await asyncio.sleep(0.05)
+            log.append("slow")
+
+        scheduler = OutboundScheduler(concurrency=1)
+        scheduler.submit(1, Priority.MODERATION, slow)
+        scheduler.submit(2, Priority.MODERATION, recorder(log, "next"))
+        await asyncio.sleep(0.01)
+        await scheduler.drain()
+        assert log == ["slow", "next"]
+        await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_idle_chat_lanes_are_dropped_once_their_bucket_refills():
+    async def scenario():
+        now = [0.0]
+        scheduler = OutboundScheduler(
+            global_burst=100,
+            chat_rates={Priority.MODERATION: (100, 1), Priority.COSMETIC: (100, 1)},
+            clock=lambda: now[0],
+        )
+        for chat_id in range(50):
+            scheduler.submit(chat_id, Priority.MODERATION, recorder([], chat_id))
+        await scheduler.drain()
+        assert scheduler.lanes == 50
+        now[0] = 1.0
+        scheduler.submit(99, Priority.MODERATION, recorder([], 99))
+        await scheduler.drain()
+        assert scheduler.lanes == 1
+        await scheduler.close()
+
+    asyncio.run(scenario())
+
+
+def test_dispatch_stays_cheap_with_a_deep_backlog():
+    async def scenario():
+        log = []
+        scheduler = OutboundScheduler(
+            global_rate=1e9, global_burst=1e9, max_pending=50_000, concurrency=64,
+            chat_rates={Priority.MODERATION: (1e9, 1e9), Priority.COSMETIC: (0.001, 1)},
+        )
+        for index in range(20_000):
+            scheduler.submit(index % 10, Priority.COSMETIC, recorder(log, index))
+        started = time.perf_counter()
+        for index in range(2_000):
+            scheduler.submit(index, Priority.MODERATION, recorder(log, index))
+        while len(log) < 2_010:
+            await asyncio.sleep(0.01)
+        elapsed = time.perf_counter() - started
+        assert scheduler.pending == 20_000 - 10
+        await scheduler.close(timeout=0)
+        return elapsed
+
+    assert asyncio.run(scenario()) < 2.0
@@ -0,0 +1,48 @@
+import asyncio
+
+import pytest
+
+from telebot.config import Settings
+from telebot.flood import FloodConfig
+from telebot.supabase import DEFAULT_GROUP_CONFIG, SupabaseConfigStore, compile_group_config
+
+
+def test_snapshot_is_frozen_private_and_degrades_invalid_sections():
+    payload = {
+        "banned_keywords": ["spam"],
+        "flood_control": {"enabled": True, "max_messages": 3, "bogus": 1},
+        "welcome": {"enabled": True, "text": "hi {mention}"},
+    }
+    snapshot = compile_group_config(payload)
+    payload["banned_keywords"].append("ham")
+
+    assert [rule.name for rule in snapshot.engine.rules] == ["ban:spam"]
+    assert snapshot.payload["banned_keywords"] == ["spam"]
+    assert snapshot.flood == FloodConfig()  # unknown key -> disabled default
+    assert snapshot.welcome.enabled and snapshot.welcome.text == "hi {mention}"
+    with pytest.raises(TypeError):
+        snapshot.payload["banned_keywords"] = []
+    with pytest.raises(AttributeError):
+        snapshot.engine = None
+    assert compile_group_config({"banned_keywords": ["spam"]}).content_hash == compile_group_config(
+        {"banned_keywords": ["spam"]}
+    ).content_hash
+
+
+def test_store_compiles_each_distinct_config_once():
+    store = SupabaseConfigStore(Settings())
+    store.seed_group_config(1, {"banned_keywords": ["spam"]})
+    store.seed_group_config(2, {"banned_keywords": ["spam"]})
+    defaults = dict(DEFAULT_GROUP_CONFIG)
+
+    async def scenario():
+        first = await store.fetch_snapshot(1)
+        assert await store.fetch_snapshot(1) is first
+        assert await store.fetch_snapshot(2) is first
+        assert (await store.fetch_snapshot(3)).content_hash != first.content_hash
+        await store.fetch_snapshot(4)
+        return first
+
+    asyncio.run(scenario())
+    assert (store.snapshot_stats.compiled, store.snapshot_stats.reused) == (2, 2)
+    assert DEFAULT_GROUP_CONFIG == defaults
@@ -0,0 +1,71 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from telebot.config import Settings
+from telebot.points import PointsDelta
+from telebot.storage import MemoryBackend, SQLiteBackend
+from telebot.supabase import DEFAULT_GROUP_CONFIG, SupabaseConfigStore
+
+
+def test_store_without_supabase_persists_to_sqlite(tmp_path):
+    path = str(tmp_path / "telebot.db")
+    settings = Settings(local_store_path=path)
+
+    async def first_run():
+        store = SupabaseConfigStore(settings)
+        await store.local.save_group_config(1, {"banned_keywords": ["广告"]})
+        await store.increment_points(1, 7, 3)
+        await store.increment_points(1, 7, 2)
+        assert await store.get_points(1, 7) == 5
+        await store.record_action(1, 7, "delete", {"message_id": 10})
+        await store.record_actions(1, [(8, "mute", {}), (9, "delete", {"message_id": 11})])
+        await store.close()
+
+    async def second_run():
+        store = SupabaseConfigStore(settings)
+        try:
+            assert await store.get_points(1, 7) == 5
+            assert await store.fetch_group_config(1) == {"banned_keywords": ["广告"]}
+            assert await store.fetch_group_config(2) is DEFAULT_GROUP_CONFIG
+        finally:
+            await store.close()
+
+    asyncio.run(first_run())
+    asyncio.run(second_run())
+
+    conn = sqlite3.connect(path)
+    assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    assert sorted(row[0] for row in conn.execute("SELECT action FROM action_logs")) == ["delete", "delete", "mute"]
+    with pytest.raises(sqlite3.IntegrityError, match="append-only"):
+        conn.execute("DELETE FROM action_logs")
+    conn.close()
+
+
+def test_sqlite_point_batches_are_summed_in_one_transaction(tmp_path):
+    backend = SQLiteBackend(str(tmp_path / "points.db"))
+
+    async def scenario():
+        await backend.apply_point_deltas([PointsDelta(1, 2, 4), PointsDelta(1, 3, 1)])
+        await backend.apply_point_deltas([PointsDelta(1, 2, -1)])
+        balances = (await backend.get_points(1, 2), await backend.get_points(1, 3), await backend.get_points(2, 2))
+        await backend.close()
+        return balances
+
+    assert asyncio.run(scenario()) == (3, 1, 0)
+
+
+def test_memory_backend_bounds_audit_log_and_keeps_configs_untouched():
+    store = SupabaseConfigStore(Settings(local_audit_limit=3))
+    store.seed_group_config(1, {"banned_keywords": ["spam"]})
+
+    async def scenario():
+        for message_id in range(5):
+            await store.record_action(1, 2, "delete", {"message_id": message_id})
+        await store.audit_writer.flush()
+        return await store.fetch_group_config(1)
+
+    assert asyncio.run(scenario()) == {"banned_keywords": ["spam"]}
+    assert isinstance(store.local, MemoryBackend)
+    assert [entry["payload"]["message_id"] for entry in store.local.audit_log] == [2, 3, 4]
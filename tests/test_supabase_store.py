@@ -1,7 +1,9 @@
 import asyncio
 
+import httpx
+
 from telebot.config import Settings
-from telebot.supabase import SupabaseConfigStore
+from telebot.supabase import DEFAULT_GROUP_CONFIG, SupabaseConfigStore
 
 
 def test_in_memory_points_balance_roundtrip():
@@ -15,3 +17,92 @@ def test_in_memory_points_balance_roundtrip():
         assert await store.get_points(1, 99) == 7
 
     asyncio.run(scenario())
+
+
+def _config_server(rows, calls, delay=0.0):
+    async def handler(request: httpx.Request) -> httpx.Response:
+        chat_id = int(request.url.params["chat_id"].removeprefix("eq."))
+        calls.append(chat_id)
+        await asyncio.sleep(delay)
+        payload = rows.get(chat_id)
+        return httpx.Response(200, json=[{"chat_id": chat_id, "payload": payload}] if payload else [])
+
+    return handler
+
+
+def test_concurrent_misses_share_one_request(make_store):
+    calls = []
+    store = make_store(_config_server({5: {"banned_keywords": ["x"]}}, calls, delay=0.01))
+
+    async def scenario():
+        results = await asyncio.gather(*(store.fetch_group_config(5) for _ in range(20)))
+        assert all(result == {"banned_keywords": ["x"]} for result in results)
+        await store.close()
+
+    asyncio.run(scenario())
+    assert calls == [5]
+    assert store.cache_stats(5).misses == 20
+    assert store.cache_stats(5).refreshes == 1
+
+
+def test_expired_entry_is_served_stale_while_refreshing(make_store):
+    calls = []
+    rows = {5: {"banned_keywords": ["old"]}}
+    store = make_store(_config_server(rows, calls), config_cache_seconds=0, config_stale_seconds=60)
+
+    async def scenario():
+        assert await store.fetch_group_config(5) == {"banned_keywords": ["old"]}
+        rows[5] = {"banned_keywords": ["new"]}
+        assert await store.fetch_group_config(5) == {"banned_keywords": ["old"]}
+        await asyncio.sleep(0.01)
+        assert await store.fetch_group_config(5) == {"banned_keywords": ["new"]}
+        await store.close()
+
+    asyncio.run(scenario())
+    stats = store.cache_stats(5)
+    assert (stats.misses, stats.stale_hits) == (1, 2)
+
+
+def test_staleness_cap_forces_a_blocking_refresh(make_store):
+    calls = []
+    store = make_store(_config_server({5: {"a": 1}}, calls), config_cache_seconds=0, config_stale_seconds=0)
+
+    async def scenario():
+        await store.fetch_group_config(5)
+        await store.fetch_group_config(5)
+        await store.close()
+
+    asyncio.run(scenario())
+    assert calls == [5, 5]
+    assert store.cache_stats(5).stale_hits == 0
+
+
+def test_missing_rows_are_negatively_cached(make_store):
+    calls = []
+    store = make_store(_config_server({}, calls), config_cache_seconds=0, config_negative_cache_seconds=60)
+
+    async def scenario():
+        first = await store.fetch_group_config(9)
+        second = await store.fetch_group_config(9)
+        assert first is second is DEFAULT_GROUP_CONFIG
+        await store.close()
+
+    asyncio.run(scenario())
+    assert calls == [9]
+    assert store._cache[9].negative is True
+
+
+def test_per_chat_cache_stats_are_bounded_but_totals_are_kept():
+    store = SupabaseConfigStore(Settings(), max_cache_stats=2)
+
+    async def scenario():
+        for chat_id in range(5):
+            store.seed_group_config(chat_id, {"banned_keywords": ["x"]})
+            await store.fetch_group_config(chat_id)
+            await store.fetch_group_config(chat_id)
+
+    asyncio.run(scenario())
+    assert list(store._cache_stats) == [3, 4]
+    assert store.cache_stats(4).hits == 1 and store.cache_stats(0).hits == 0
+    total = store.total_cache_stats()
+    assert (total.misses, total.hits, total.refreshes) == (5, 5, 5)
@@ -0,0 +1,97 @@
+import asyncio
+import time
+
+from telebot.config import Settings
+from telebot.flood import FloodConfig, FloodProtector
+from telebot.points import PointsDelta
+from telebot.supabase import SupabaseConfigStore
+from telebot.warmstart import WarmStart, WarmState, decode, encode
+
+FLOOD = FloodConfig(enabled=True, max_messages=3, interval_seconds=60)
+
+
+class Clocks:
+    def __init__(self, monotonic: float, wall: float) -> None:
+        self.monotonic = monotonic
+        self.wall = wall
+
+
+def warm_start(path, clocks, flood, store):
+    warm = WarmStart(path, flood=flood, store=store, interval=0)
+    warm._monotonic = lambda: clocks.monotonic
+    warm._wall = lambda: clocks.wall
+    return warm
+
+
+def test_encode_roundtrip_stores_shared_payloads_once():
+    shared = {"banned_keywords": ["广告"]}
+    state = WarmState(
+        saved_at=1_700_000_000.5,
+        configs=[(1, shared, 1_700_000_060.0, False), (2, shared, 1_700_000_030.0, True), (-3, {"x": 1}, 1.0, False)],
+        flood_windows=[(1, 42, 1_699_999_990.0, 2, 1, 1_700_000_110.0)],
+        point_deltas=[PointsDelta(1, 42, -5)],
+        config_watermark="2024-05-01T00:00:00+00:00",
+    )
+
+    data = encode(state)
+    restored = decode(data)
+
+    assert restored == state
+    assert restored.configs[0][1] is restored.configs[1][1]
+
+
+def test_flood_windows_and_configs_survive_restart(tmp_path):
+    path = tmp_path / "telebot.state"
+
+    async def first_run():
+        flood = FloodProtector()
+        store = SupabaseConfigStore(Settings())
+        store.seed_group_config(7, {"banned_keywords": ["刷单"]})
+        await store.fetch_group_config(7)
+        for offset in range(3):
+            assert flood.check(7, 1, FLOOD, now=1_000.0 + offset) is None
+        clocks = Clocks(monotonic=1_003.0, wall=50_000.0)
+        await warm_start(path, clocks, flood, store).save()
+        await store.close()
+
+    async def second_run():
+        flood = FloodProtector()
+        store = SupabaseConfigStore(Settings(config_cache_seconds=60))
+        # a new process: its monotonic clock has nothing in common with the old one
+        clocks = Clocks(monotonic=time.monotonic(), wall=50_010.0)
+        warm_start(path, clocks, flood, store).load()
+        snapshot = await store.fetch_snapshot(7)  # served from the restored cache, nothing seeded here
+        action = flood.check(7, 1, FLOOD, now=clocks.monotonic + 1)
+        await store.close()
+        return snapshot, action, store.cache_stats(7)
+
+    asyncio.run(first_run())
+    snapshot, action, stats = asyncio.run(second_run())
+
+    assert action is not None  # the fourth message in the window still counts the three before the restart
+    assert [rule.name for rule in snapshot.engine.rules] == ["ban:刷单"]
+    assert stats.hits == 1 and stats.misses == 0
+
+
+def test_pending_point_deltas_are_restored_exactly_once(tmp_path):
+    path = tmp_path / "telebot.state"
+    clocks = Clocks(monotonic=100.0, wall=50_000.0)
+
+    async def scenario():
+        old = SupabaseConfigStore(Settings())
+        old.points_ledger.add(1, 2, 5)  # an award whose final flush never happened
+        await warm_start(path, clocks, FloodProtector(), old).save(include_points=True)
+
+        first = SupabaseConfigStore(Settings())
+        warm_start(path, clocks, FloodProtector(), first).load()
+        balance = await first.get_points(1, 2)
+        await first.close()
+
+        second = SupabaseConfigStore(Settings())
+        state = warm_start(path, clocks, FloodProtector(), second).load()
+        return balance, state.point_deltas, second.pending_point_deltas()
+
+    balance, leftover, pending = asyncio.run(scenario())
+
+    assert balance == 5
+    assert leftover == [] and pending == []